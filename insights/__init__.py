@@ -20,6 +20,7 @@ for gathering data in myriad ways and providing a reliable object model for it.
 from __future__ import print_function
 
 import logging
+import multiprocessing
 import os
 import pkgutil
 import sys
@@ -52,6 +53,7 @@ from insights.core.context import (
     HostContext,
     SerializedArchiveContext,
 )
+from insights.core.engine import Engine
 from insights.core.exceptions import InvalidArchive, InvalidContentType, SkipComponent
 from insights.core.filters import add_filter, apply_filters, get_filters
 from insights.core.hydration import create_context, initialize_broker
@@ -134,7 +136,7 @@ def add_status(name, nvr, commit=None):
 add_status(package_info["NAME"], get_nvr(), package_info["COMMIT"])
 
 
-def process_dir(broker, root, graph, context, inventory=None, parallel=False):
+def process_dir(broker, root, graph, context, inventory=None, parallel=False, max_workers=None):
     ctx, broker = initialize_broker(root, context=context, broker=broker)
     log.debug("Processing %s with %s" % (root, ctx))
 
@@ -142,18 +144,17 @@ def process_dir(broker, root, graph, context, inventory=None, parallel=False):
         from .core.cluster import process_cluster
 
         archives = [f for f in ctx.all_files if f.endswith(COMPRESSION_TYPES)]
-        return process_cluster(graph, archives, broker=broker, inventory=inventory)
+        processes = (max_workers or multiprocessing.cpu_count()) if parallel else None
+        return process_cluster(graph, archives, broker=broker, inventory=inventory, processes=processes)
 
-    graph = dict((k, v) for k, v in graph.items() if k in dr.COMPONENTS[dr.GROUPS.single])
-    if parallel:
-        with get_pool(parallel, "insights-run-pool", {"max_workers": None}) as pool:
-            broker = dr.run_all(graph, broker, pool)
-    else:
-        broker = dr.run(graph, broker=broker)
-    return broker
+    plan = dr.get_execution_plan(graph).for_group(dr.GROUPS.single)
+    with get_pool(parallel, "insights-run-pool", {"max_workers": max_workers}) as pool:
+        return dr.run(plan, broker=broker, pool=pool)
 
 
-def _run(broker, graph=None, root=None, context=None, inventory=None, parallel=False):
+def _run(
+    broker, graph=None, root=None, context=None, inventory=None, parallel=False, max_workers=None
+):
     """
     run is a general interface that is meant for stand-alone scripts to use
     when executing insights components.
@@ -173,6 +174,10 @@ def _run(broker, graph=None, root=None, context=None, inventory=None, parallel=F
         context (obj): The execution context that's set.
         inventory (str): Path to inventory file.
         parallel (bool): Boolean as to weather to use parallel execution or not.
+        max_workers (int): The number of worker threads used when `parallel`
+            is True. `None` lets the pool pick its default. The archives of
+            the hosts of a cluster are processed in that many worker
+            processes instead, or one per CPU.
 
     Returns:
         broker: object containing the result of the evaluation.
@@ -180,29 +185,50 @@ def _run(broker, graph=None, root=None, context=None, inventory=None, parallel=F
     if not root:
         context = context or HostContext
         broker[context] = context()
-        graph = dict((k, v) for k, v in graph.items() if k in dr.COMPONENTS[dr.GROUPS.single])
-        if parallel:
-            with get_pool(parallel, "insights-run-pool", {"max_workers": None}) as pool:
-                dr.run_all(graph, broker, pool)
-        else:
-            return dr.run(graph, broker=broker)
+        plan = dr.get_execution_plan(graph).for_group(dr.GROUPS.single)
+        with get_pool(parallel, "insights-run-pool", {"max_workers": max_workers}) as pool:
+            return dr.run(plan, broker=broker, pool=pool)
 
     if os.path.isdir(root):
-        return process_dir(broker, root, graph, context, inventory=inventory, parallel=parallel)
+        return process_dir(
+            broker,
+            root,
+            graph,
+            context,
+            inventory=inventory,
+            parallel=parallel,
+            max_workers=max_workers,
+        )
     else:
         with extract(root) as ex:
             return process_dir(
-                broker, ex.tmp_dir, graph, context, inventory=inventory, parallel=parallel
+                broker,
+                ex.tmp_dir,
+                graph,
+                context,
+                inventory=inventory,
+                parallel=parallel,
+                max_workers=max_workers,
             )
 
 
-def load_default_plugins():
-    dr.load_components("insights.specs.default")
-    dr.load_components("insights.specs.insights_archive")
-    dr.load_components("insights.specs.core3_archive")
-    dr.load_components("insights.specs.sos_archive")
-    dr.load_components("insights.specs.jdr_archive")
-    dr.load_components("insights.specs.must_gather_archive")
+DEFAULT_PLUGINS = (
+    "insights.specs.default",
+    "insights.specs.insights_archive",
+    "insights.specs.core3_archive",
+    "insights.specs.sos_archive",
+    "insights.specs.jdr_archive",
+    "insights.specs.must_gather_archive",
+)
+
+
+def load_default_plugins(manifest=None, components=None):
+    """
+    Loads the default specs. With a component ``manifest`` built by
+    :func:`insights.core.dr.build_manifest`, only the ones the ``components``
+    need are loaded.
+    """
+    dr.load_components(*DEFAULT_PLUGINS, manifest=manifest, components=components)
 
 
 def load_packages(packages):
@@ -311,6 +337,9 @@ def run(
     inventory=None,
     print_component=None,
     store_skips=False,
+    parallel=False,
+    max_workers=None,
+    component_manifest=None,
 ):
     args = None
     formatters = None
@@ -331,6 +360,10 @@ def run(
         p.add_argument("-f", "--format", help="Output format.", default="insights.formats.text")
         p.add_argument("-i", "--inventory", help="Ansible inventory file for cluster analysis.")
         p.add_argument("-k", "--pkg-query", help="Expression to select rules by package.")
+        p.add_argument(
+            "--component-manifest",
+            help="Component manifest used to load only the default specs the rules need.",
+        )
         p.add_argument(
             "-p",
             "--plugins",
@@ -355,6 +388,11 @@ def run(
             "--no-load-default", help="Don't load the default plugins.", action="store_true"
         )
         p.add_argument("--parallel", help="Execute rules in parallel.", action="store_true")
+        p.add_argument(
+            "--max-workers",
+            type=int,
+            help="Number of worker threads used with --parallel.",
+        )
         p.add_argument(
             "--show-skips",
             help="Capture skips in the broker for troubleshooting.",
@@ -371,7 +409,8 @@ def run(
         p.parse_known_args(namespace=args)
         p = argparse.ArgumentParser(parents=[p])
 
-        if not args.no_load_default:
+        component_manifest = args.component_manifest
+        if not args.no_load_default and not component_manifest:
             load_default_plugins()
 
         global _COLOR
@@ -448,10 +487,13 @@ def run(
                 msg = "No components for tag expression: %s" % args.tags
                 raise Exception(msg)
 
-        graph = {}
-        for c in component:
-            graph.update(dr.get_dependency_graph(c))
+        if component_manifest and not (args and args.no_load_default):
+            load_default_plugins(manifest=component_manifest, components=component)
+
+        graph = dr.get_execution_plan(component).graph
     else:
+        if component_manifest and not (args and args.no_load_default):
+            load_default_plugins()
         graph = dr.COMPONENTS[dr.GROUPS.single]
 
     broker = dr.Broker()
@@ -485,9 +527,18 @@ def run(
                         context=context,
                         inventory=inventory,
                         parallel=args.parallel,
+                        max_workers=args.max_workers,
                     )
             else:
-                broker = _run(broker, graph, root, context=context, inventory=inventory)
+                broker = _run(
+                    broker,
+                    graph,
+                    root,
+                    context=context,
+                    inventory=inventory,
+                    parallel=parallel,
+                    max_workers=max_workers,
+                )
 
             for formatter in formatters:
                 formatter.postprocess(broker)
@@ -503,9 +554,18 @@ def run(
                         context=context,
                         inventory=inventory,
                         parallel=args.parallel,
+                        max_workers=args.max_workers,
                     )
             else:
-                broker = _run(broker, graph, root, context=context, inventory=inventory)
+                broker = _run(
+                    broker,
+                    graph,
+                    root,
+                    context=context,
+                    inventory=inventory,
+                    parallel=parallel,
+                    max_workers=max_workers,
+                )
 
             broker.print_component(print_component)
         else:
@@ -520,9 +580,18 @@ def run(
                         context=context,
                         inventory=inventory,
                         parallel=args.parallel,
+                        max_workers=args.max_workers,
                     )
             else:
-                broker = _run(broker, graph, root, context=context, inventory=inventory)
+                broker = _run(
+                    broker,
+                    graph,
+                    root,
+                    context=context,
+                    inventory=inventory,
+                    parallel=parallel,
+                    max_workers=max_workers,
+                )
 
         return broker
     except (InvalidContentType, InvalidArchive):
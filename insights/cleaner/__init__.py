@@ -34,7 +34,9 @@ import os
 import six
 import tempfile
 
-from insights.cleaner.filters import AllowFilter
+from functools import partial
+
+from insights.cleaner.filters import AllowFilter, Allowlist
 from insights.cleaner.hostname import Hostname
 from insights.cleaner.ip import IPv4, IPv6
 from insights.cleaner.keyword import Keyword
@@ -101,33 +103,20 @@ class Cleaner(object):
             # - MAC obfuscation
             self.obfuscate.update(mac=Mac()) if 'mac' in obfs else None
 
-    def clean_content(self, lines, no_obfuscate=None, no_redact=False, allowlist=None, width=False):
+    def _make_parsers(self, no_obfuscate=None, no_redact=False, allowlist=None, width=False):
         """
-        Clean lines one by one according to the configuration.
-
-        For some extra large files, e.g. logs, we want to keep the bottom
-        part of them.  So the lines are processed in reverse order.  But the
-        processed result is returned in the original order.
+        Build the ordered list of line cleaners for one spec.
         """
-
-        def _clean_line(line):
-            if len(line) > MAX_LINE_LENGTH:
-                # Keep the first MAX_LINE_LENGTH chars only (it rarely happens)
-                line = line[:MAX_LINE_LENGTH]
-                logger.debug('Extra-long line is truncated ...')
-
-            for parser, kwargs in parsers:
-                line = parser.parse_line(line, **kwargs)
-            return line
-
         # List of parsers to be applied with Order
         parsers = list()
         # 1. Redact when NO "no_redact=True" is set
         if self.redact['pattern'] and not no_redact:
-            parsers.append((self.redact['pattern'], {})) if not no_redact else None
+            parsers.append(self.redact['pattern'].parse_line) if not no_redact else None
         # 2. Filter as per allowlist got from add_filter  # copy it to avoid write back
         (
-            parsers.append((self.redact['allow_filter'], {'allowlist': dict(allowlist)}))
+            parsers.append(
+                partial(self.redact['allow_filter'].parse_line, allowlist=Allowlist(allowlist))
+            )
             if allowlist is not None
             else None
         )
@@ -140,17 +129,55 @@ class Cleaner(object):
         # - Password
         for obf in set(self.obfuscate.keys()) - set(no_obfuscate or []):
             if self.obfuscate[obf]:
-                parsers.append((self.obfuscate[obf], {'width': width}))
+                parsers.append(partial(self.obfuscate[obf].parse_line, width=width))
+        return parsers
 
+    @staticmethod
+    def _clean_line(parsers, line):
+        if len(line) > MAX_LINE_LENGTH:
+            # Keep the first MAX_LINE_LENGTH chars only (it rarely happens)
+            line = line[:MAX_LINE_LENGTH]
+            logger.debug('Extra-long line is truncated ...')
+
+        for parse_line in parsers:
+            line = parse_line(line)
+            if not line:
+                # removed or blank line, the rest parsers keep it as is
+                break
+        return line
+
+    def clean_lines(self, lines, no_obfuscate=None, no_redact=False, allowlist=None, width=False):
+        """
+        Clean the `lines` one by one according to the configuration.
+
+        The `lines` are expected in reverse order, i.e. the last line of the
+        content comes first, and the cleaned lines are yielded in the same
+        order.  Removed lines are not yielded.  It's a generator, so content
+        can be cleaned without loading all of it in memory.
+        """
+        parsers = self._make_parsers(no_obfuscate, no_redact, allowlist, width)
+        for line in lines:
+            line = self._clean_line(parsers, line)
+            if line is not None:
+                yield line
+
+    def clean_content(self, lines, no_obfuscate=None, no_redact=False, allowlist=None, width=False):
+        """
+        Clean lines one by one according to the configuration.
+
+        For some extra large files, e.g. logs, we want to keep the bottom
+        part of them.  So the lines are processed in reverse order.  But the
+        processed result is returned in the original order.
+        """
         # handle single string
         if not isinstance(lines, list):
-            return _clean_line(lines)
+            parsers = self._make_parsers(no_obfuscate, no_redact, allowlist, width)
+            return self._clean_line(parsers, lines)
 
-        result = []
         # process lines in reverse order
-        for idx in range(len(lines) - 1, -1, -1):
-            line = _clean_line(lines[idx])
-            result.append(line) if line is not None else None
+        result = list(
+            self.clean_lines(reversed(lines), no_obfuscate, no_redact, allowlist, width)
+        )
         if result and any(l for l in result):
             # When some lines Truthy, return them in right order
             result.reverse()
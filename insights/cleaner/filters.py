@@ -5,9 +5,34 @@ Filtering
 
 import logging
 
+from insights.cleaner.utilities import literal_matcher
+
 logger = logging.getLogger(__name__)
 
 
+class Allowlist(dict):
+    """
+    The allow list, a dict of the filter keys and the number of lines to keep
+    for each of them.  The :attr:`matcher` is a
+    :func:`~insights.cleaner.utilities.literal_matcher` of the remaining keys,
+    it is recompiled after a key is popped.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Allowlist, self).__init__(*args, **kwargs)
+        self._matcher = None
+
+    @property
+    def matcher(self):
+        if self._matcher is None and self:
+            self._matcher = literal_matcher(self)
+        return self._matcher
+
+    def pop(self, key, *args):
+        self._matcher = None
+        return super(Allowlist, self).pop(key, *args)
+
+
 class AllowFilter(object):
     """
     Class for filtering per allow list.
@@ -19,6 +44,10 @@ class AllowFilter(object):
             return line
         allowlist = kwargs.get('allowlist', {})
         if allowlist:
+            # skip the line with one scan when none of the keys is in it
+            matcher = getattr(allowlist, 'matcher', None)
+            if matcher and not matcher.search(line):
+                return
             for a_key in list(allowlist.keys()):  # copy keys to avoid RuntimeError
                 # keep line when any filter match
                 # FIXME:
@@ -50,9 +79,13 @@ class AllowFilter(object):
         :param allowlist: dictionary of allowlist
         :return: list of lines
         """
-        allowlist = dict(allowlist)  # copy it to avoid write back
+        allowlist = Allowlist(allowlist)  # copy it to avoid write back
         result = []
         for idx in range(len(lines) - 1, -1, -1):
+            if not allowlist:
+                break
+            if not allowlist.matcher.search(lines[idx]):
+                continue
             for a_key in list(allowlist.keys()):  # copy keys to avoid RuntimeError
                 if a_key in lines[idx]:
                     allowlist[a_key] -= 1
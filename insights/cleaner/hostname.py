@@ -36,6 +36,9 @@ class Hostname(object):
             else r'(?![\W\-\:\ \.])[a-zA-Z0-9\-\_\.]*\.{0}'.format('.'.join(fqdn_split[1:]))
         )
         self._hostname = fqdn_split[0]
+        self._regex = re.compile(self.pattern) if self.pattern else None
+        # the top-level domain is literally required by the pattern
+        self._tld = fqdn_split[-1]
         self._hn2db(fqdn)
 
     def _hn2db(self, hn):
@@ -57,11 +60,11 @@ class Hostname(object):
         '''
         Replace the exact hostname and all instances of the known domain with the obfuscated alternatives.
         '''
-        if not line:
+        if not line or (self._tld not in line and self._hostname not in line):
             return line
         try:
-            if self.pattern:
-                hostnames = [each for each in re.findall(self.pattern, line)]
+            if self._regex:
+                hostnames = [each for each in self._regex.findall(line)]
                 for hn in hostnames:
                     new_hn = self._hn2db(hn)
                     logger.debug("Obfuscating FQDN - {0} > {1}".format(hn, new_hn))
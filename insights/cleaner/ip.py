@@ -19,7 +19,7 @@ import six
 import socket
 import struct
 
-from insights.cleaner.utilities import write_report
+from insights.cleaner.utilities import ObfuscationDB, write_report
 
 logger = logging.getLogger(__name__)
 
@@ -31,11 +31,12 @@ class IPv4(object):
 
     def __init__(self):
         # - IP obfuscate information
-        self._ip_db = dict()  # IP database
         self._start_ip = '10.230.230.1'
+        self._ip_db = ObfuscationDB(start=self._ip2int(self._start_ip))  # IP database
         self._ignore_list = ["127.0.0.1"]
         # self.pattern = r'((?<!(\.|\d))([0-9]{1,3}\.){3}([0-9]){1,3}(\/([0-9]{1,2}))?)'
         self.pattern = r"(((\b25[0-5]|\b2[0-4][0-9]|\b1[0-9][0-9]|\b[1-9][0-9]|\b[1-9]))(\.(\b25[0-5]|\b2[0-4][0-9]|\b1[0-9][0-9]|\b[1-9][0-9]|\b[0-9])){3})"
+        self._regex = re.compile(self.pattern)
 
     def _ip2int(self, ipstr):
         # converts a dotted decimal IP address into an integer that can be incremented
@@ -50,25 +51,13 @@ class IPv4(object):
         adds an IP address to the IP database and returns the obfuscated entry, or returns the
         existing obfuscated IP entry
         FORMAT:
-        {$obfuscated_ip: $original_ip,}
+        {$original_ip: $obfuscated_ip,}
         '''
         ip_num = self._ip2int(ip)
-        ip_found = False
-        db = self._ip_db
-        for k, v in db.items():
-            if v == ip_num:
-                ret_ip = self._int2ip(k)
-                ip_found = True
-        if ip_found:  # the entry already existed
-            return ret_ip
-        else:  # the entry did not already exist
-            if len(self._ip_db) > 0:
-                new_ip = max(db.keys()) + 1
-            else:
-                new_ip = self._ip2int(self._start_ip)
-            db[new_ip] = ip_num
-
-            return self._int2ip(new_ip)
+        new_ip = self._ip_db.get(ip_num)
+        if new_ip is None:  # the entry did not already exist
+            new_ip = self._ip_db.add(ip_num, self._ip_db.next_value())
+        return self._int2ip(new_ip)
 
     def parse_line(self, line, **kwargs):
         '''
@@ -115,10 +104,10 @@ class IPv4(object):
             else:
                 return line.replace(ip, new_ip)
 
-        if not line:
+        if not line or line.count('.') < 3:  # no IPv4 without three dots
             return line
         try:
-            ips = [each[0] for each in re.findall(self.pattern, line)]
+            ips = [each[0] for each in self._regex.findall(line)]
             for ip in sorted(ips or [], key=len, reverse=True):
                 if ip not in self._ignore_list:  # ip must in line
                     if kwargs.get('width', False):
@@ -133,7 +122,7 @@ class IPv4(object):
     def mapping(self):
         mapping = []
         for k, v in self._ip_db.items():
-            mapping.append({'original': self._int2ip(v), 'obfuscated': self._int2ip(k)})
+            mapping.append({'original': self._int2ip(k), 'obfuscated': self._int2ip(v)})
         return mapping
 
     def generate_report(self, report_dir, archive_name):
@@ -142,7 +131,7 @@ class IPv4(object):
             logger.info('Creating IPv4 Report - %s', ip_report_file)
             lines = ['Obfuscated IPv4,Original IPv4']
             for k, v in self._ip_db.items():
-                lines.append('{0},{1}'.format(self._int2ip(k), self._int2ip(v)))
+                lines.append('{0},{1}'.format(self._int2ip(v), self._int2ip(k)))
         except Exception as e:  # pragma: no cover
             logger.exception(e)
             raise Exception('CreateReport Error: Error Creating IPv4 Report')
@@ -158,7 +147,7 @@ class IPv6(object):
     """
 
     def __init__(self):
-        self._ipv6_db = dict()  # IPv6 database
+        self._ipv6_db = ObfuscationDB()  # IPv6 database
         # Ignore list for IPv6
         self._ignore_list = [r'\s+']  # ignore whitespace
         # IPv6 pattern, stolen from sos
@@ -171,6 +160,8 @@ class IPv6(object):
             r"(([0-9a-f]{1,4}(:[0-9a-f]{0,4}){0,5}))([^.])::(([0-9a-f]{1,4}"
             r"(:[0-9a-f]{1,4}){0,5})?))(/\d{1,3})?(?![:\\a-z0-9])"
         )
+        self._regex = re.compile(self.pattern, re.I)
+        self._ignore_regex = [re.compile(_i, re.I) for _i in self._ignore_list]
 
     def _ip2db(self, ip):
         '''
@@ -192,12 +183,11 @@ class IPv6(object):
 
         try:
             if ip in self._ipv6_db:
-                return self._ipv6_db[ip]
-            if ip in self._ipv6_db.values():  # pragma: no cover
+                return self._ipv6_db.get(ip)
+            if self._ipv6_db.is_obfuscated(ip):  # pragma: no cover
                 # avoid nested obfuscating
                 return None
-            self._ipv6_db[ip] = ':'.join(obfuscate_hex(h) for h in ip.split(':'))
-            return self._ipv6_db[ip]
+            return self._ipv6_db.add(ip, ':'.join(obfuscate_hex(h) for h in ip.split(':')))
         except Exception as e:  # pragma: no cover
             logger.warning(e)
             raise Exception('SubIPv6Error: Unable to Substitute IPv6 Address - %s', ip)
@@ -212,11 +202,12 @@ class IPv6(object):
             # it's an obfuscated IP
             return line
 
-        if not line:
+        # no IPv6 without a "::" or seven colons
+        if not line or ('::' not in line and line.count(':') < 7):
             return line
 
-        for ip in re.findall(self.pattern, line, re.I):
-            if any(re.search(_i, ip[0], re.I) for _i in self._ignore_list):
+        for ip in self._regex.findall(line):
+            if any(_i.search(ip[0]) for _i in self._ignore_regex):
                 continue
             line = _sub_ip(line, ip[0])
         return line
@@ -6,7 +6,7 @@ Keyword Replacement
 import logging
 import os
 
-from insights.cleaner.utilities import write_report
+from insights.cleaner.utilities import literal_matcher, write_report
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +21,7 @@ class Keyword(object):
         self._kw_key = "keyword"
         self._kw_db = dict()  # keyword database
         self._keywords2db(keywords)
+        self._kw_matcher = literal_matcher(self._kw_db)
         self._obfuscated = set()  # keywords that have been replaced
 
     def _keywords2db(self, keywords):
@@ -39,7 +40,8 @@ class Keyword(object):
             logger.warning(e)
 
     def parse_line(self, line, **kwargs):
-        if not line:
+        # scan the line once for all the keywords before replacing them in order
+        if not line or not self._kw_matcher or not self._kw_matcher.search(line):
             return line
         for k, v in self._kw_db.items():
             if k in line:
@@ -9,7 +9,7 @@ import os
 import re
 import six
 
-from insights.cleaner.utilities import write_report
+from insights.cleaner.utilities import ObfuscationDB, write_report
 
 logger = logging.getLogger(__name__)
 
@@ -20,13 +20,15 @@ class Mac(object):
     """
 
     def __init__(self):
-        self._mac_db = dict()  # MAC database
+        self._mac_db = ObfuscationDB()  # MAC database
         # Ignore list for MAC addresses
         # - 00:00:00:00:00:00
         # - FF:FF:FF:FF:FF:FF
         self._ignore_list = [r'\b(?:(?:00:){5}00|(?:ff:){5}ff)\b']
         # MAC address patterns
         self.pattern = r'(?<![0-9a-fA-F:-])([0-9a-fA-F]{2}([:-])(?:[0-9a-fA-F]{2}\2){4}[0-9a-fA-F]{2})(?![0-9a-fA-F:-])'
+        self._regex = re.compile(self.pattern, re.I)
+        self._ignore_regex = [re.compile(_i, re.I) for _i in self._ignore_list]
 
     def _mac2db(self, mac):
         '''
@@ -43,14 +45,13 @@ class Mac(object):
 
         try:
             if mac in self._mac_db:
-                return self._mac_db[mac]
-            if mac in self._mac_db.values():  # pragma: no cover
+                return self._mac_db.get(mac)
+            if self._mac_db.is_obfuscated(mac):  # pragma: no cover
                 # avoid nested obfuscating
                 return None
             lower = not mac.isupper()
             sep = '-' if '-' in mac else ':'
-            self._mac_db[mac] = sep.join(obfuscate_hex(h, lower) for h in mac.split(sep))
-            return self._mac_db[mac]
+            return self._mac_db.add(mac, sep.join(obfuscate_hex(h, lower) for h in mac.split(sep)))
         except Exception as e:  # pragma: no cover
             logger.warning(e)
             raise Exception('SubMacError: Unable to Substitute MAC Addr - %s', mac)
@@ -65,11 +66,12 @@ class Mac(object):
             # it's an obfuscated MAC address
             return line
 
-        if not line:
+        # no MAC without five separators
+        if not line or (line.count(':') < 5 and line.count('-') < 5):
             return line
 
-        for mac in re.findall(self.pattern, line, re.I):
-            if not any(re.search(_i, mac[0], re.I) for _i in self._ignore_list):
+        for mac in self._regex.findall(line):
+            if not any(_i.search(mac[0]) for _i in self._ignore_regex):
                 line = _sub_mac(line, mac[0])
 
         return line
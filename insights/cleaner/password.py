@@ -13,6 +13,8 @@ DEFAULT_PASSWORD_REGEXS = [
     r"(password[a-zA-Z0-9_]*)(\s*\:\s*\"*\s*|\s*\"*\s*=\s*\"\s*|\s*=+\s*|\s*--md5+\s*|\s*)([a-zA-Z0-9_!@#$%^&*()+=/-]+)",
     r"(password[a-zA-Z0-9_]*)(\s*\*+\s+)(.+)",
 ]
+PASSWORD_REGEXS = [re.compile(regex) for regex in DEFAULT_PASSWORD_REGEXS]
+PASSWORD_KEY = "password"  # all the DEFAULT_PASSWORD_REGEXS require it
 
 
 class Password(object):
@@ -26,12 +28,12 @@ class Password(object):
     """
 
     def parse_line(self, line, **kwargs):
-        if not line:
+        if not line or PASSWORD_KEY not in line:
             return line
         # password obfuscation
-        for regex in DEFAULT_PASSWORD_REGEXS:
+        for regex in PASSWORD_REGEXS:
             tmp_line = line
-            line = re.sub(regex, r"\1\2********", tmp_line)
+            line = regex.sub(r"\1\2********", tmp_line)
             if line != tmp_line:
                 break
         return line
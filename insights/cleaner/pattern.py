@@ -4,7 +4,8 @@ Pattern Redaction
 """
 
 import logging
-import re
+
+from insights.cleaner.utilities import literal_matcher, regex_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +18,23 @@ class Pattern(object):
     def __init__(self, exclude, regex=False):
         self._exclude = exclude or []
         self._regex = regex
+        self._matchers = None
+
+    def _compile(self):
+        # all the patterns are merged, so a line is scanned once
+        if self._regex:
+            return regex_matcher(self._exclude)
+        matcher = literal_matcher(self._exclude)
+        return [matcher] if matcher else []
 
     def parse_line(self, line, **kwargs):
         # redact line per the file-content-redaction.yaml
         if not line:
             return line
+        if self._matchers is None:
+            self._matchers = self._compile()
         # patterns removal
-        find = re.search if self._regex else lambda x, y: x in y
-        if any(find(pat, line) for pat in self._exclude):
+        if any(m.search(line) for m in self._matchers):
             logger.debug("Pattern matched, removing line: %s" % line.strip())
             # patterns found, remove it
             return None
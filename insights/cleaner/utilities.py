@@ -6,10 +6,45 @@ Utilities for spec Cleaner
 import logging
 import json
 import os
+import re
 
 logger = logging.getLogger(__name__)
 
 
+def literal_matcher(literals):
+    """
+    Compile the `literals` into one regular expression that matches wherever
+    any of them occurs.
+
+    ``matcher.search(line)`` is a single scan of the line and equals
+    ``any(l in line for l in literals)``.  Returns None when there is nothing
+    to match.
+    """
+    literals = sorted(set(literals), key=len, reverse=True)
+    if not literals:
+        return None
+    return re.compile('|'.join(re.escape(l) for l in literals))
+
+
+def regex_matcher(patterns):
+    """
+    Compile the regular expression `patterns` into one alternation.
+
+    ``matcher.search(line)`` equals ``any(re.search(p, line) for p in
+    patterns)``.  Patterns with back references or groups that clash once
+    merged are compiled separately, so a list of compiled expressions is
+    returned.
+    """
+    if not patterns:
+        return []
+    if not any(re.search(r'\\[1-9]|\(\?P=', p) for p in patterns):
+        try:
+            return [re.compile('|'.join('(?:{0})'.format(p) for p in patterns))]
+        except re.error:
+            pass
+    return [re.compile(p) for p in patterns]
+
+
 def write_report(report, report_file, mode=0o644):
     # Get the current umask
     umask = os.umask(0o022)
@@ -26,3 +61,52 @@ def write_report(report, report_file, mode=0o644):
         os.chmod(report_file, mode & ~umask)
     except (IOError, OSError) as e:  # pragma: no cover
         logger.error('Could not write to %s: %s', report_file, str(e))
+
+
+class ObfuscationDB(object):
+    """
+    Bidirectional store of original and obfuscated values for the obfuscators.
+
+    Lookups in either direction are dictionary lookups, and entries are
+    iterated in insertion order so that the mapping and reports are stable.
+    A running counter is kept for obfuscators that hand out sequential
+    values, e.g. IPv4.
+
+    Args:
+        start (int): The first value returned by :meth:`next_value`.
+    """
+
+    def __init__(self, start=0):
+        self._obfuscated = dict()  # original -> obfuscated
+        self._original = dict()  # obfuscated -> original
+        self._counter = start
+
+    def __len__(self):
+        return len(self._obfuscated)
+
+    def __contains__(self, original):
+        return original in self._obfuscated
+
+    def get(self, original, default=None):
+        """Return the obfuscated value of `original`."""
+        return self._obfuscated.get(original, default)
+
+    def add(self, original, obfuscated):
+        """Store the `original` and `obfuscated` pair and return `obfuscated`."""
+        self._obfuscated[original] = obfuscated
+        self._original[obfuscated] = original
+        return obfuscated
+
+    def is_obfuscated(self, value):
+        """Return True if `value` was handed out as an obfuscated value."""
+        return value in self._original
+
+    def next_value(self):
+        """Return the next value of the running counter."""
+        value = self._counter
+        self._counter += 1
+        return value
+
+    def items(self):
+        """Return the (original, obfuscated) pairs in insertion order."""
+        return self._obfuscated.items()
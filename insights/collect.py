@@ -22,7 +22,8 @@ from insights import apply_configs, apply_default_enabled, get_pool
 from insights.cleaner import Cleaner
 from insights.core import blacklist, dr, filters
 from insights.core.serde import Hydration
-from insights.core.spec_factory import SAFE_ENV
+from insights.core.spec_factory import COMMAND_CACHE, SAFE_ENV
+from insights.specs.datasources import PACKAGE_OWNERS
 from insights.specs.manifests import manifests
 from insights.util import fs, utc
 from insights.util.hostname import determine_hostname
@@ -261,10 +262,13 @@ def collect(
         parallel = False
 
     pool_args = run_strategy.get("args", {})
+    COMMAND_CACHE.clear()
+    PACKAGE_OWNERS.clear()
     with get_pool(parallel, "insights-collector-pool", pool_args) as pool:
         h = Hydration(output_path, ctx, pool=pool)
         broker.add_observer(h.make_persister(to_persist))
         dr.run_all(broker=broker, pool=pool)
+    log.debug("Command cache: %d hits, %d misses", COMMAND_CACHE.hits, COMMAND_CACHE.misses)
 
     collect_errors = _parse_broker_exceptions(broker, EXCEPTIONS_TO_REPORT)
 
@@ -1,3 +1,4 @@
+import calendar
 import datetime
 import json
 import logging
@@ -9,8 +10,11 @@ import six
 import sys
 import yaml
 
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import OrderedDict
 from fnmatch import fnmatch
+from itertools import islice
 
 from insights.core.exceptions import (
     ContentException,
@@ -24,6 +28,15 @@ from insights.parsr import iniparser
 from insights.parsr.query import Directive, Entry, Result, Section, compile_queries
 from insights.util import deprecated
 
+try:
+    from itertools import accumulate
+except ImportError:  # pragma: no cover
+    def accumulate(iterable):
+        total = 0
+        for i in iterable:
+            total += i
+            yield total
+
 try:
     from yaml import CSafeLoader as SafeLoader
 except ImportError:  # pragma: no cover
@@ -973,12 +986,107 @@ class Scannable(six.with_metaclass(ScanMeta, Parser)):
                 scanner(self, obj)
 
 
+class _ScanPlan(object):
+    """
+    The ``token_scan``, ``keep_scan`` and ``last_scan`` scanners of a
+    :class:`TextFileOutput` class compiled into one plan. The lines are
+    joined once, and every distinct token is located with a single search of
+    the joined text that skips to the next line on each hit. Scanners
+    looking for the same tokens share the hits, and each one only picks the
+    lines it needs. Scanners registered with ``scan`` run afterwards, in
+    order.
+    """
+
+    def __init__(self, parser, scanners):
+        self.scanners = list(scanners.values())
+        self.fused = []
+        self.others = []
+        for key, scanner in scanners.items():
+            spec = getattr(scanner, 'fused_spec', None)
+            if spec is not None:
+                kind, token, check, num, reverse = spec
+                try:
+                    valid = parser._valid_search(token, check) is not None
+                except TypeError:
+                    valid = False
+                tokens = [token] if isinstance(token, six.string_types) else token
+                if (valid and check in (all, any) and not any('\n' in t for t in tokens) and
+                        (num is None or isinstance(num, six.integer_types))):
+                    self.fused.append((key, kind, tuple(tokens), check, num, reverse))
+                    continue
+            self.others.append(scanner)
+
+    def run(self, parser):
+        lines = parser.lines
+        try:
+            text = '\n'.join(lines)
+        except TypeError:
+            for scanner in self.scanners:
+                scanner(parser)
+            return
+
+        offsets = []
+        hits = {}
+        dense = 64 + len(lines) // 32
+
+        def find_all(token):
+            if not lines:
+                return []
+            if token not in hits:
+                if not offsets:
+                    offsets.append(0)
+                    offsets.extend(accumulate(len(l) + 1 for l in lines))
+                found = []
+                find = text.find
+                pos = find(token)
+                while pos != -1:
+                    idx = bisect_right(offsets, pos) - 1
+                    found.append(idx)
+                    if len(found) > dense:
+                        # checking each line is cheaper for common tokens
+                        found.extend(i for i, l in enumerate(islice(lines, idx + 1, None), idx + 1) if token in l)
+                        break
+                    pos = find(token, offsets[idx + 1])
+                hits[token] = found
+            return hits[token]
+
+        def matches(tokens, check):
+            if len(tokens) == 1:
+                return find_all(tokens[0])
+            sets = [set(find_all(t)) for t in tokens]
+            found = set.intersection(*sets) if check is all else set.union(*sets)
+            return sorted(found)
+
+        for key, kind, tokens, check, num, reverse in self.fused:
+            if kind == 'token':
+                if len(tokens) == 1 or check is any:
+                    value = bool(lines) and any(t in text for t in tokens)
+                else:
+                    value = bool(matches(tokens, check))
+            else:
+                found = matches(tokens, check)
+                if num is not None:
+                    found = (found[-num:] if reverse else found[:num]) if num > 0 else []
+                value = [parser._parse_line(lines[idx]) for idx in found]
+                if kind == 'last':
+                    value = value[0] if value else dict()
+            setattr(parser, key, value)
+        for scanner in self.others:
+            scanner(parser)
+
+
 class TextFileOutput(six.with_metaclass(ScanMeta, Parser)):
     """
     Class for parsing general text file content.
 
     File content is stored in raw format in the ``lines`` attribute.
 
+    The ``token_scan``, ``keep_scan`` and ``last_scan`` scanners of the class
+    are fused into one plan that searches the content once per distinct
+    token, instead of making one pass over the lines per scanner.  Set
+    ``fuse_scanners`` to ``False`` in a subclass to run every scanner in its
+    own pass.
+
     Assume the text file content is::
 
         Text file line one
@@ -1031,14 +1139,40 @@ class TextFileOutput(six.with_metaclass(ScanMeta, Parser)):
 
     """
 
+    fuse_scanners = True
+    """
+    Run the registered scanners as one fused plan instead of one pass over
+    the lines per scanner.
+    """
+
     def parse_content(self, content):
         """
         Use all the defined scanners to search the log file, setting the
         properties defined in the scanner.
         """
         self.lines = content
-        for scanner in self.scanners.values():
-            scanner(self)
+        self._run_scanners()
+
+    def _run_scanners(self):
+        """
+        Run all the registered scanners against ``self.lines``.
+        """
+        cls = type(self)
+        fusable = (
+            cls.fuse_scanners and
+            six.get_unbound_function(cls.get) is six.get_unbound_function(TextFileOutput.get) and
+            six.get_unbound_function(cls._valid_search) is six.get_unbound_function(TextFileOutput._valid_search)
+        )
+        if not fusable:
+            for scanner in self.scanners.values():
+                scanner(self)
+            return
+        keys = tuple(self.scanners)
+        plan = cls.__dict__.get('_scan_plan')
+        if plan is None or plan[0] != keys:
+            plan = (keys, _ScanPlan(self, self.scanners))
+            cls._scan_plan = plan
+        plan[1].run(self)
 
     def __contains__(self, s):
         """
@@ -1119,6 +1253,7 @@ class TextFileOutput(six.with_metaclass(ScanMeta, Parser)):
             result = func(self)
             setattr(self, result_key, result)
 
+        scanner.fused_spec = getattr(func, 'fused_spec', None)
         cls.scanners.update({result_key: scanner})
 
     @classmethod
@@ -1141,6 +1276,7 @@ class TextFileOutput(six.with_metaclass(ScanMeta, Parser)):
             search_by_expression = self._valid_search(token, check)
             return any(search_by_expression(l) for l in self.lines)
 
+        _scan.fused_spec = ('token', token, check, None, False)
         cls.scan(result_key, _scan)
 
     @classmethod
@@ -1163,6 +1299,7 @@ class TextFileOutput(six.with_metaclass(ScanMeta, Parser)):
         def _scan(self):
             return self.get(token, check=check, num=num, reverse=reverse)
 
+        _scan.fused_spec = ('keep', token, check, num, reverse)
         cls.scan(result_key, _scan)
 
     @classmethod
@@ -1184,9 +1321,246 @@ class TextFileOutput(six.with_metaclass(ScanMeta, Parser)):
             ret = self.get(token, check=check, num=1, reverse=True)
             return ret[0] if ret else dict()
 
+        _scan.fused_spec = ('last', token, check, 1, True)
         cls.scan(result_key, _scan)
 
 
+_TIME_FORMAT_CONVERSION = {
+    'a': r'\w{3}',
+    'A': r'\w+',  # Week day name
+    'w': r'[0123456]',  # Week day number
+    'd': r'([0 ][123456789]|[12]\d|3[01])',  # Day of month
+    'b': r'\w{3}',
+    'B': r'\w+',  # Month name
+    'm': r'([0 ]\d|1[012])',  # Month number
+    'y': r'\d{2}',
+    'Y': r'\d{4}',  # Year
+    'H': r'([01 ]\d|2[0123])',  # Hour - 24 hour format
+    'I': r'([0 ]?\d|1[012])',  # Hour - 12 hour format
+    'p': r'\w{2}',  # AM / PM
+    'M': r'([012345]\d)',  # Minutes
+    'S': r'([012345]\d|60)',  # Seconds, including leap second
+    'f': r'\d{1,6}',  # Microseconds
+}
+_TIME_PARSERS = {}
+
+
+def _time_parser(time_format):
+    """
+    Convert the ``time_format`` of a :class:`LogFileOutput` to a regular
+    expression that finds the timestamp in a line, a function that parses the
+    found timestamp and whether the timestamps have a year.  The result is
+    cached for each time format.
+    """
+    key = repr(time_format)
+    if key in _TIME_PARSERS:
+        return _TIME_PARSERS[key]
+
+    # Annoyingly, strptime insists that it get the whole time string and
+    # nothing but the time string.  However, for most logs we only have a
+    # string with the timestamp in it.  We can't just catch the ValueError
+    # because at that point we do not actually have a valid datetime
+    # object.  So we convert the time format string to a regex, use that
+    # to find just the timestamp, and then use strptime on that.  Thanks,
+    # Python.  All these need to cope with different languages and
+    # character sets.  Note that we don't include time zone or other
+    # outputs (e.g. day-of-year) that don't usually occur in time stamps.
+    timefmt_re = re.compile(r'%(\w)')
+
+    def replacer(match):
+        if match.group(1) in _TIME_FORMAT_CONVERSION:
+            return _TIME_FORMAT_CONVERSION[match.group(1)]
+        else:
+            raise ParseException(
+                "get_after does not understand strptime format '{c}'".format(c=match.group(0))
+            )
+
+    # Please do not attempt to be tricky and put a regular expression
+    # inside your time format, as we are going to also use it in
+    # strptime too and that may not work out so well.
+
+    # Check time_format - must be string or list.  Set the 'logs_have_year'
+    # flag and timestamp parser function appropriately.
+    # Grab values of dict as a list first
+    if isinstance(time_format, dict):
+        time_format = list(time_format.values())
+    if isinstance(time_format, six.string_types):
+        logs_have_year = '%Y' in time_format or '%y' in time_format
+        time_re = re.compile('(' + timefmt_re.sub(replacer, time_format) + ')')
+
+        # Curry strptime with time_format string.
+        def test_parser(logstamp):
+            return datetime.datetime.strptime(logstamp, time_format)
+
+        parse_fn = test_parser
+    elif isinstance(time_format, list):
+        logs_have_year = all('%Y' in tf or '%y' in tf for tf in time_format)
+        time_re = re.compile(
+            '(' + '|'.join(timefmt_re.sub(replacer, tf) for tf in time_format) + ')'
+        )
+
+        def test_all_parsers(logstamp):
+            # One of these must match, because the regex has selected only
+            # strings that will match.
+            for tf in time_format:
+                try:
+                    ts = datetime.datetime.strptime(logstamp, tf)
+                except ValueError:
+                    pass
+            return ts
+
+        parse_fn = test_all_parsers
+    else:
+        raise ParseException(
+            "get_after does not recognise time formats of type {t}".format(t=type(time_format))
+        )
+
+    _TIME_PARSERS[key] = (time_re, parse_fn, logs_have_year)
+    return _TIME_PARSERS[key]
+
+
+def _micros(delta):
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+try:
+    array('q')
+    _INT64 = 'q'
+except ValueError:  # pragma: no cover
+    # Python 2 has no arrays of 64 bits integers, doubles hold microseconds
+    # since the epoch exactly.
+    _INT64 = 'd'
+
+
+class _TimestampIndex(object):
+    """
+    The timestamps of the lines of a :class:`LogFileOutput`, parsed once.
+
+    ``owners`` maps every line to the position of its timestamp in ``keys``,
+    or to ``-1`` for lines without a timestamp, which belong to the closest
+    timestamped line before them.  ``positions`` maps the timestamps back to
+    their lines.  Lines whose timestamp can't be parsed are
+    mapped to ``-2`` and raise the parse error again when they're reached.
+    ``keys`` holds the timestamps in microseconds since the epoch, or since
+    the start of a leap year when the logs have no year.  In that case the
+    year of each timestamp is only settled against the sought timestamp.
+    ``sorted_keys`` are the keys in ascending order, and ``order`` their
+    positions in ``keys``.
+    """
+    EPOCH = datetime.datetime(1970, 1, 1)
+    LEAP_YEAR = 2000
+    DAY = 86400 * 1000000
+    FEB_29 = 59 * DAY
+    ELEVEN_MONTHS = 330 * DAY
+
+    def __init__(self, lines, time_re, parse_fn, logs_have_year):
+        self.lines = lines
+        self.time_re = time_re
+        self.parse_fn = parse_fn
+        self.logs_have_year = logs_have_year
+        self.owners = array('l')
+        self.keys = array(_INT64)
+        self.positions = array('l')
+        self.has_errors = False
+        search = time_re.search
+        keys = self.keys
+        start = self.EPOCH if logs_have_year else datetime.datetime(self.LEAP_YEAR, 1, 1)
+        for line in lines:
+            match = search(line)
+            if not match:
+                self.owners.append(-1)
+                continue
+            try:
+                logstamp = parse_fn(match.group(0))
+                if not logs_have_year:
+                    logstamp = logstamp.replace(year=self.LEAP_YEAR)
+            except Exception:
+                self.owners.append(-2)
+                self.has_errors = True
+                continue
+            self.owners.append(len(keys))
+            self.positions.append(len(self.owners) - 1)
+            keys.append(_micros(logstamp - start))
+        self.order = array('l', sorted(range(len(keys)), key=keys.__getitem__))
+        self.sorted_keys = array(_INT64, (keys[i] for i in self.order))
+
+    def raise_error(self, idx):
+        logstamp = self.parse_fn(self.time_re.search(self.lines[idx]).group(0))
+        logstamp.replace(year=self.LEAP_YEAR)
+
+    def _key(self, offset, year):
+        # The key of an offset in ``year`` for logs without year.  February
+        # 29th can't be parsed without a year, so it never has keys.
+        if offset >= self.FEB_29 and not calendar.isleap(year):
+            return offset + self.DAY
+        return offset
+
+    def key_ranges(self, start, end=None):
+        """
+        The ``(low, high)`` ranges of the keys of the timestamps from
+        ``start`` up to but excluding ``end``, ``high`` being None when
+        there's no upper bound.  Logs without year get the year of
+        ``start``, or the one before or after it when that brings them
+        closer than eleven months, so their keys are split in up to three
+        ranges.
+        """
+        low = _micros(start - self.EPOCH)
+        high = _micros(end - self.EPOCH) if end is not None else None
+        if self.logs_have_year:
+            return [(low, high)]
+        year = start.year
+        offset = _micros(start - datetime.datetime(year, 1, 1))
+        after = self._key(offset - self.ELEVEN_MONTHS, year)
+        before = self._key(offset + self.ELEVEN_MONTHS + 1, year)
+        ranges = []
+        for y, first, last in ((year + 1, None, after), (year, after, before), (year - 1, before, None)):
+            begin = _micros(datetime.datetime(y, 1, 1) - self.EPOCH)
+            first = self._key(low - begin, y) if first is None else max(first, self._key(low - begin, y))
+            if high is not None:
+                last = self._key(high - begin, y) if last is None else min(last, self._key(high - begin, y))
+            if last is None or first < last:
+                ranges.append((first, last))
+        return ranges
+
+    def select(self, start, end=None, search=None):
+        """
+        Yield the index of each line with a timestamp from ``start`` up to
+        but excluding ``end``, and the lines without timestamps that follow
+        them.  Only the lines ``search`` accepts are considered when it's
+        given.
+        """
+        if not self.keys and not self.has_errors:
+            return
+        ranges = self.key_ranges(start, end)
+        owners = self.owners
+        if search is None and not self.has_errors:
+            sorted_keys = self.sorted_keys
+            found = []
+            for low, high in ranges:
+                first = bisect_left(sorted_keys, low)
+                last = bisect_left(sorted_keys, high) if high is not None else len(sorted_keys)
+                found.extend(self.order[first:last])
+            found.sort()
+            positions = self.positions
+            for pos in found:
+                stop = positions[pos + 1] if pos + 1 < len(positions) else len(owners)
+                for idx in range(positions[pos], stop):
+                    yield idx
+            return
+        keys = self.keys
+        including = False
+        for idx, owner in enumerate(owners):
+            if search is not None and not search(self.lines[idx]):
+                continue
+            if owner >= 0:
+                key = keys[owner]
+                including = any(low <= key and (high is None or key < high) for low, high in ranges)
+            elif owner == -2:
+                self.raise_error(idx)
+            if including:
+                yield idx
+
+
 class LogFileOutput(TextFileOutput):
     """
     Class for parsing log file content.  For more details check it's super
@@ -1237,7 +1611,8 @@ class LogFileOutput(TextFileOutput):
         stamp matching this expression will trigger the decision to include
         or exclude lines. Therefore, if the log for some reason does not
         contain a time stamp that matches this format, no lines will be
-        returned.
+        returned.  The time stamps are only parsed on the first call, later
+        calls reuse them (see :meth:`get_between`).
 
         The time format is given in ``strptime()`` format, in the object's
         ``time_format`` property.  Users of the object should **not** change
@@ -1282,130 +1657,50 @@ class LogFileOutput(TextFileOutput):
                 made to recognise or parse the time zone or other obscure
                 values like day of year or week of year.
         """
-        time_format = self.time_format
-        if time_format is None:
-            raise RuntimeError('Not applied when time_format does not exist')
+        return self.get_between(timestamp, None, s)
 
-        # Annoyingly, strptime insists that it get the whole time string and
-        # nothing but the time string.  However, for most logs we only have a
-        # string with the timestamp in it.  We can't just catch the ValueError
-        # because at that point we do not actually have a valid datetime
-        # object.  So we convert the time format string to a regex, use that
-        # to find just the timestamp, and then use strptime on that.  Thanks,
-        # Python.  All these need to cope with different languages and
-        # character sets.  Note that we don't include time zone or other
-        # outputs (e.g. day-of-year) that don't usually occur in time stamps.
-        format_conversion_for = {
-            'a': r'\w{3}',
-            'A': r'\w+',  # Week day name
-            'w': r'[0123456]',  # Week day number
-            'd': r'([0 ][123456789]|[12]\d|3[01])',  # Day of month
-            'b': r'\w{3}',
-            'B': r'\w+',  # Month name
-            'm': r'([0 ]\d|1[012])',  # Month number
-            'y': r'\d{2}',
-            'Y': r'\d{4}',  # Year
-            'H': r'([01 ]\d|2[0123])',  # Hour - 24 hour format
-            'I': r'([0 ]?\d|1[012])',  # Hour - 12 hour format
-            'p': r'\w{2}',  # AM / PM
-            'M': r'([012345]\d)',  # Minutes
-            'S': r'([012345]\d|60)',  # Seconds, including leap second
-            'f': r'\d{1,6}',  # Microseconds
-        }
+    def get_between(self, start, end, s=None):
+        """
+        Find all the (available) logs that are at or after the time stamp
+        `start` and before the time stamp `end`.  When `end` is ``None``, all
+        the logs after `start` are returned, like :meth:`get_after`.
 
-        # Construct the regex from the time string
-        timefmt_re = re.compile(r'%(\w)')
+        The time stamps of the lines are parsed once, on the first call, and
+        kept in an index that later calls search with ``bisect`` when the log
+        is in time order.  See :meth:`get_after` for how `s`, lines without
+        time stamps and logs without a year are handled.  The year of logs
+        without a year is taken from `start`.
 
-        def replacer(match):
-            if match.group(1) in format_conversion_for:
-                return format_conversion_for[match.group(1)]
-            else:
-                raise ParseException(
-                    "get_after does not understand strptime format '{c}'".format(c=match.group(0))
-                )
-
-        # Please do not attempt to be tricky and put a regular expression
-        # inside your time format, as we are going to also use it in
-        # strptime too and that may not work out so well.
-
-        # Check time_format - must be string or list.  Set the 'logs_have_year'
-        # flag and timestamp parser function appropriately.
-        # Grab values of dict as a list first
-        if isinstance(time_format, dict):
-            time_format = list(time_format.values())
-        if isinstance(time_format, six.string_types):
-            logs_have_year = '%Y' in time_format or '%y' in time_format
-            time_re = re.compile('(' + timefmt_re.sub(replacer, time_format) + ')')
-
-            # Curry strptime with time_format string.
-            def test_parser(logstamp):
-                return datetime.datetime.strptime(logstamp, time_format)
-
-            parse_fn = test_parser
-        elif isinstance(time_format, list):
-            logs_have_year = all('%Y' in tf or '%y' in tf for tf in time_format)
-            time_re = re.compile(
-                '(' + '|'.join(timefmt_re.sub(replacer, tf) for tf in time_format) + ')'
-            )
+        Parameters:
+            start(datetime.datetime): lines before this time are ignored.
+            end(datetime.datetime): lines at or after this time are ignored.
+            s(str or list): one or more strings to search for.
+                If not supplied, all available lines are searched.
 
-            def test_all_parsers(logstamp):
-                # One of these must match, because the regex has selected only
-                # strings that will match.
-                for tf in time_format:
-                    try:
-                        ts = datetime.datetime.strptime(logstamp, tf)
-                    except ValueError:
-                        pass
-                return ts
-
-            parse_fn = test_all_parsers
-        else:
-            raise ParseException(
-                "get_after does not recognise time formats of type {t}".format(t=type(time_format))
-            )
+        Yields:
+            dict:
+                The parsed lines with timestamps in the range in the same
+                format they were supplied.  It at least contains the
+                ``raw_message`` as a key.
 
-        # Most logs will appear in string format, but some logs (e.g.
-        # Messages) are available in list-of-dicts format.  So we choose one
-        # of two 'date_compare' functions.  HOWEVER: we still have to check
-        # the string found for a valid date, because log parsing often fails.
-        # Because of generators, we check this per line
+        Raises:
+            ParseException: If the format conversion string contains a
+                format that we don't recognise.
+        """
+        time_format = self.time_format
+        if time_format is None:
+            raise RuntimeError('Not applied when time_format does not exist')
 
-        # Now try to find the time stamp in each log line and add lines to
-        # our output if they are currently being included in the log.
+        key = repr(time_format)
+        index = self.__dict__.get('_timestamp_index')
+        if index is None or index[0] != key:
+            index = (key, _TimestampIndex(self.lines, *_time_parser(time_format)))
+            self._timestamp_index = index
 
-        eleven_months = datetime.timedelta(days=330)
-        including_lines = False
         search_by_expression = self._valid_search(s)
-        for line in self.lines:
-            # If `s` is not None, keywords must be found in the line
-            if s and not search_by_expression(line):
-                continue
-            # Otherwise, search all lines
-            match = time_re.search(line)
-            if match:
-                logstamp = parse_fn(match.group(0))
-                if not logs_have_year:
-                    # Substitute timestamp year for logstamp year
-                    logstamp = logstamp.replace(year=timestamp.year)
-                    if logstamp - timestamp > eleven_months:
-                        # If timestamp in January and log in December, move
-                        # log to previous year
-                        logstamp = logstamp.replace(year=timestamp.year - 1)
-                    elif timestamp - logstamp > eleven_months:
-                        # If timestamp in December and log in January, move
-                        # log to next year
-                        logstamp = logstamp.replace(year=timestamp.year + 1)
-                if logstamp >= timestamp:
-                    # Later - include
-                    including_lines = True
-                    yield self._parse_line(line)
-                else:
-                    # Earlier - start excluding
-                    including_lines = False
-            else:
-                # If we're including lines, add this continuation line
-                if including_lines:
-                    yield self._parse_line(line)
+        lines = self.lines
+        for idx in index[1].select(start, end, search_by_expression if s else None):
+            yield self._parse_line(lines[idx])
 
 
 class LazyLogFileOutput(LogFileOutput):
@@ -2,11 +2,18 @@
 
 import logging
 import os
+import re
+import shutil
+import stat
+import tarfile
 import tempfile
+import time
+import zipfile
 
 from contextlib import contextmanager
 
-from insights.core.exceptions import InvalidContentType
+from insights.core.context import ExecutionContextMeta, SerializedArchiveContext
+from insights.core.exceptions import InvalidContentType, TimeoutException
 from insights.util import fs, subproc, which
 from insights.util.content_type import from_file as content_type_from_file
 
@@ -66,6 +73,309 @@ class TarExtractor(object):
         return self
 
 
+def _translate(pattern):
+    # Like fnmatch.translate, but "*" and "?" don't match "/" as in glob.
+    i, n, res = 0, len(pattern), []
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            res.append("[^/]*")
+        elif c == "?":
+            res.append("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and pattern[j] in "!]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                res.append("\\[")
+            else:
+                stuff = pattern[i:j].replace("\\", "\\\\")
+                i = j + 1
+                if stuff[0] == "!":
+                    stuff = "^" + stuff[1:]
+                res.append("[%s]" % stuff)
+        else:
+            res.append(re.escape(c))
+    return "".join(res)
+
+
+def _safe_name(name):
+    # The normalized relative name of a member, or None when it's absolute,
+    # escapes the extraction directory or is under a "dev" directory.
+    if name.startswith("/"):
+        return None
+    name = os.path.normpath(name)
+    if name in (".", "..") or name.startswith("../") or "/dev/" in name:
+        return None
+    return name
+
+
+def _link_target(name, linkname):
+    # The normalized name of the member a symbolic link points to, or None
+    # when it points outside of the archive.
+    if not linkname or linkname.startswith("/"):
+        return None
+    return _safe_name(os.path.join(os.path.dirname(name), linkname))
+
+
+class MemberFilter(object):
+    """
+    Selects the members of an archive that can be read by datasources, so
+    they're the only ones extracted.
+
+    Member names are matched against the patterns relative to the root of
+    the archive, which is located by the markers of the execution contexts,
+    like ``insights_commands``. A ``*`` doesn't match ``/``. Directories and
+    the first file under the marker are always selected so the context of
+    the archive is identified the same as with all the files. Links are
+    selected when they match a pattern or a parent directory of one, and
+    the members they point to are selected as well.
+
+    Args:
+        patterns (list): glob patterns of paths relative to the root of the
+            archive. See :func:`insights.core.spec_factory.archive_patterns`.
+    """
+    def __init__(self, patterns):
+        self.patterns = sorted(set(p.strip("/") for p in patterns))
+        self._match = self._compile(self.patterns)
+        parents = set()
+        for p in self.patterns:
+            parts = p.split("/")
+            parents.update("/".join(parts[:i]) for i in range(1, len(parts)))
+        self._match_parent = self._compile(parents)
+
+    @staticmethod
+    def _compile(patterns):
+        if not patterns:
+            return lambda n: None
+        regex = "|".join("(?:%s)" % _translate(p) for p in patterns)
+        return re.compile("(?:%s)\\Z" % regex).match
+
+    def _root(self, names):
+        # The prefix of the root of the archive and the first file under its
+        # marker, or None when there's no marker.
+        markers = set(c.marker for c in ExecutionContextMeta.registry if c.marker)
+        found = None
+        for name in names:
+            parts = name.split("/")
+            for i, part in enumerate(parts[:-1]):
+                if part in markers and (found is None or i < found[0]):
+                    found = (i, "/".join(parts[:i]), name)
+                    break
+        return found[1:] if found else None
+
+    def select(self, files, dirs=(), links=None):
+        """
+        Returns the names of the members to extract.
+
+        Args:
+            files (list): the names of the regular file members.
+            dirs (list): the names of the directory members.
+            links (dict): the member each link member points to, by name.
+
+        Returns:
+            set: the selected names, or None when all the members are needed
+                because the archive is serialized or has no known marker.
+        """
+        links = links or {}
+        names = list(files) + list(links)
+        if any(os.path.basename(n) == SerializedArchiveContext.marker for n in names):
+            return None
+        root = self._root(files)
+        if root is None:
+            return None
+        prefix, marker = root
+        prefix = prefix + "/" if prefix else ""
+        selected = set(dirs)
+        selected.add(marker)
+        selected.update(n for n in files if n.startswith(prefix) and self._match(n[len(prefix):]))
+        # Links to directories are followed by the patterns under them.
+        selected.update(
+            n for n in links if n.startswith(prefix) and (
+                self._match(n[len(prefix):]) or self._match_parent(n[len(prefix):])
+            )
+        )
+
+        pending = [n for n in selected if links.get(n)]
+        while pending:
+            target = links[pending.pop()]
+            for n in names:
+                if n not in selected and (n == target or n.startswith(target + "/")):
+                    selected.add(n)
+                    if links.get(n):
+                        pending.append(n)
+        return selected
+
+
+class _InProcessExtractor(object):
+    # Extracts the members of an archive selected by a MemberFilter in the
+    # calling process, without writing outside of the temporary directory.
+    def __init__(self, members, timeout=None):
+        self.members = members
+        self.timeout = timeout
+        self.content_type = None
+        self.tmp_dir = None
+        self.created_tmp_dir = False
+
+    def _check_content_type(self, content_type):
+        pass
+
+    def _entries(self, archive):
+        raise NotImplementedError()
+
+    def _open(self, path):
+        raise NotImplementedError()
+
+    def _inside(self, path):
+        path = os.path.realpath(path)
+        return path == self._real_root or path.startswith(self._real_root + os.sep)
+
+    def _destination(self, name, kind):
+        # Existing paths aren't overwritten, like with "unzip -n".
+        dest = os.path.join(self.tmp_dir, name)
+        parent = os.path.dirname(dest)
+        exists = os.path.lexists(dest) and not (kind == "dir" and os.path.isdir(dest))
+        if exists or not self._inside(parent):
+            logger.debug("Skipping archive member %s", name)
+            return None
+        if not os.path.isdir(parent):
+            # The parent can be a link to a directory that doesn't exist yet.
+            real_parent = os.path.realpath(parent)
+            if os.path.lexists(real_parent):
+                logger.debug("Skipping archive member %s", name)
+                return None
+            os.makedirs(real_parent)
+        return dest
+
+    def _symlink(self, name, linkname, dest):
+        # The link is resolved from where it's really created, which can be
+        # under another link, and is written relative to the resolved path so
+        # links extracted later can't make it point outside.
+        parent = os.path.realpath(os.path.dirname(dest))
+        target = os.path.realpath(os.path.join(parent, linkname))
+        if not self._inside(target):
+            logger.debug("Skipping archive member %s", name)
+            return
+        os.symlink(os.path.relpath(target, parent), dest)
+
+    def from_path(self, path, extract_dir=None, content_type=None):
+        if os.path.isdir(path):
+            self.tmp_dir = path
+            return self
+        self.content_type = content_type or content_type_from_file(path)
+        self._check_content_type(self.content_type)
+        self.tmp_dir = tempfile.mkdtemp(prefix="insights-", dir=extract_dir)
+        self.created_tmp_dir = True
+        self._real_root = os.path.realpath(self.tmp_dir)
+        deadline = time.time() + self.timeout if self.timeout else None
+        logger.debug("Extracting files in '%s'", self.tmp_dir)
+
+        with self._open(path) as archive:
+            entries = self._entries(archive)
+            files = [n for n, kind, _, _ in entries if kind == "file"]
+            dirs = [n for n, kind, _, _ in entries if kind == "dir"]
+            links = dict((n, t) for n, kind, t, _ in entries if kind == "link")
+            links.update((n, _link_target(n, t)) for n, kind, t, _ in entries if kind == "symlink")
+            selected = self.members.select(files, dirs, links)
+            for name, kind, target, member in entries:
+                if selected is not None and name not in selected:
+                    continue
+                if deadline and time.time() > deadline:
+                    raise TimeoutException("Extraction of %s timed out after %s seconds" % (path, self.timeout))
+                dest = self._destination(name, kind)
+                if dest is None:
+                    continue
+                if kind == "dir":
+                    if not os.path.isdir(dest):
+                        os.makedirs(dest)
+                elif kind == "symlink":
+                    self._symlink(name, target, dest)
+                elif kind == "link":
+                    source = os.path.join(self.tmp_dir, target)
+                    if self._inside(source) and os.path.isfile(source) and not os.path.islink(source):
+                        shutil.copyfile(source, dest)
+                    else:
+                        logger.debug("Skipping archive member %s", name)
+                else:
+                    self._write(archive, member, dest)
+        return self
+
+
+class TarFileExtractor(_InProcessExtractor):
+    """
+    Extracts the members of a tar archive selected by ``members``, a
+    :class:`MemberFilter`, with :mod:`tarfile` instead of the ``tar`` command.
+    """
+    def _check_content_type(self, content_type):
+        if content_type not in TarExtractor.TAR_FLAGS:
+            raise InvalidContentType(content_type)
+
+    def _open(self, path):
+        return tarfile.open(path)
+
+    def _entries(self, archive):
+        entries = []
+        for member in archive.getmembers():
+            name = _safe_name(member.name)
+            if name is None:
+                continue
+            if member.isdir():
+                entries.append((name, "dir", None, member))
+            elif member.isfile():
+                entries.append((name, "file", None, member))
+            elif member.issym():
+                if _link_target(name, member.linkname) is not None:
+                    entries.append((name, "symlink", member.linkname, member))
+            elif member.islnk():
+                target = _safe_name(member.linkname)
+                if target is not None:
+                    entries.append((name, "link", target, member))
+        return entries
+
+    def _write(self, archive, member, dest):
+        src = archive.extractfile(member)
+        with open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.chmod(dest, (member.mode & 0o777) | stat.S_IRUSR | stat.S_IWUSR)
+
+
+class ZipFileExtractor(_InProcessExtractor):
+    """
+    Extracts the members of a zip archive selected by ``members``, a
+    :class:`MemberFilter`, with :mod:`zipfile` instead of the ``unzip``
+    command.
+    """
+    def _open(self, path):
+        return zipfile.ZipFile(path)
+
+    def _entries(self, archive):
+        entries = []
+        for member in archive.infolist():
+            name = _safe_name(member.filename)
+            if name is None:
+                continue
+            mode = member.external_attr >> 16
+            if member.filename.endswith("/"):
+                entries.append((name, "dir", None, member))
+            elif stat.S_ISLNK(mode):
+                linkname = archive.read(member).decode("utf-8", "surrogateescape")
+                if _link_target(name, linkname) is not None:
+                    entries.append((name, "symlink", linkname, member))
+            else:
+                entries.append((name, "file", None, member))
+        return entries
+
+    def _write(self, archive, member, dest):
+        with archive.open(member) as src, open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        mode = (member.external_attr >> 16) & 0o777
+        if mode:
+            os.chmod(dest, mode | stat.S_IRUSR | stat.S_IWUSR)
+
+
 class Extraction(object):
     def __init__(self, tmp_dir, content_type):
         self.tmp_dir = tmp_dir
@@ -73,7 +383,7 @@ class Extraction(object):
 
 
 @contextmanager
-def extract(path, timeout=None, extract_dir=None, content_type=None):
+def extract(path, timeout=None, extract_dir=None, content_type=None, members=None):
     """
     Extract path into a temporary directory in `extract_dir`.
 
@@ -82,9 +392,17 @@ def extract(path, timeout=None, extract_dir=None, content_type=None):
 
     If the extraction takes longer than `timeout` seconds, the temporary path
     is removed, and an exception is raised.
+
+    When `members` is a :class:`MemberFilter`, the archive is extracted in
+    process and only the members it selects are written.
     """
     content_type = content_type or content_type_from_file(path)
-    if content_type == "application/zip":
+    if members is not None:
+        if content_type == "application/zip":
+            extractor = ZipFileExtractor(members, timeout=timeout)
+        else:
+            extractor = TarFileExtractor(members, timeout=timeout)
+    elif content_type == "application/zip":
         extractor = ZipExtractor(timeout=timeout)
     else:
         extractor = TarExtractor(timeout=timeout)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 import itertools
+import logging
 import os
 from collections import defaultdict
 
@@ -13,6 +14,7 @@ from insights.core.archives import extract
 from insights.core.hydration import create_context
 from insights.specs import Specs
 
+log = logging.getLogger(__name__)
 
 ID_GENERATOR = itertools.count()
 
@@ -46,34 +48,115 @@ def attach_machine_id(result, mid):
     return result
 
 
-def process_archives(graph, archives):
-    for archive in archives:
-        if os.path.isfile(archive):
-            with extract(archive) as ex:
-                ctx = create_context(ex.tmp_dir)
-                broker = dr.Broker()
-                broker[ctx.__class__] = ctx
-                yield dr.run(broker=broker)
-        else:
-            ctx = create_context(archive)
+def _process_archive(graph, archive):
+    if os.path.isfile(archive):
+        with extract(archive) as ex:
+            ctx = create_context(ex.tmp_dir)
             broker = dr.Broker()
             broker[ctx.__class__] = ctx
-            yield dr.run(graph, broker=broker)
+            return dr.run(graph, broker=broker)
+    ctx = create_context(archive)
+    broker = dr.Broker()
+    broker[ctx.__class__] = ctx
+    return dr.run(graph, broker=broker)
 
 
-def extract_facts(brokers):
+def process_archives(graph, archives):
+    for archive in archives:
+        yield _process_archive(graph, archive)
+
+
+def get_facts(broker):
+    """
+    Returns the results of the ``plugins.fact`` components in ``broker`` with
+    the machine id of the host attached, as lists by component name.
+    """
+    mid = broker[machine_id]
+    facts = {}
+    for k, v in broker.get_by_type(plugins.fact).items():
+        r = attach_machine_id(v, mid)
+        facts[dr.get_name(k)] = r if isinstance(r, list) else [r]
+    return facts
+
+
+_WORKER_GRAPH = [None]
+
+
+def _init_worker(names):
+    graph = {}
+    for name in names:
+        graph.update(dr.get_dependency_graph(dr.get_component(name)))
+    _WORKER_GRAPH[0] = graph
+
+
+def _archive_facts(args):
+    index, archive = args
+    broker = _process_archive(_WORKER_GRAPH[0], archive)
+    if Specs.machine_id not in broker and Specs.hostname not in broker:
+        # ID_GENERATOR counts in each worker, so the position of the archive
+        # makes the id unique instead.
+        broker.instances[machine_id] = str(index)
+    return get_facts(broker)
+
+
+def process_archives_parallel(graph, archives, processes=None, max_archives_per_worker=None):
+    """
+    Processes the archives of the hosts of a cluster in a pool of
+    ``processes`` worker processes, and yields the facts of each archive as
+    it's done. See :func:`get_facts`.
+
+    Workers only send the facts back, and they're replaced by new ones after
+    ``max_archives_per_worker`` archives to bound their memory. The graph is
+    sent to the workers by the names of the components nothing else in it
+    depends on, so it's processed in this process when one of them can't be
+    imported by name.
+    """
+    import multiprocessing
+
+    dependencies = set()
+    for deps in graph.values():
+        dependencies |= set(deps)
+    roots = [c for c in graph if c not in dependencies]
+    names = [dr.get_name(c) for c in roots]
+    if any(dr.get_component(n) is not c for n, c in zip(names, roots)):
+        log.warning("Processing the cluster archives serially: not all the components can be imported by name")
+        for broker in process_archives(graph, archives):
+            yield get_facts(broker)
+        return
+
+    pool = multiprocessing.Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(names,),
+        maxtasksperchild=max_archives_per_worker,
+    )
+    try:
+        for facts in pool.imap_unordered(_archive_facts, enumerate(archives)):
+            yield facts
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def merge_facts(all_facts):
+    """
+    Merges the facts of the hosts, as returned by :func:`get_facts`, into
+    lists by fact component.
+    """
     results = defaultdict(list)
-    for b in brokers:
-        mid = b[machine_id]
-        for k, v in b.get_by_type(plugins.fact).items():
-            r = attach_machine_id(v, mid)
-            if isinstance(r, list):
-                results[k].extend(r)
-            else:
-                results[k].append(r)
+    for facts in all_facts:
+        for name, values in facts.items():
+            results[dr.get_component(name)].extend(values)
     return results
 
 
+def extract_facts(brokers):
+    return merge_facts(get_facts(b) for b in brokers)
+
+
 def process_facts(facts, meta, broker, cluster_graph):
     broker[ClusterMeta] = meta
     for k, v in facts.items():
@@ -81,15 +164,28 @@ def process_facts(facts, meta, broker, cluster_graph):
     return dr.run(cluster_graph, broker=broker)
 
 
-def process_cluster(graph, archives, broker, inventory=None):
+def process_cluster(graph, archives, broker, inventory=None, processes=None, max_archives_per_worker=None):
+    """
+    Runs the host components of ``graph`` against each of the ``archives``
+    of the hosts of a cluster, and the cluster components against the
+    DataFrames of their facts.
+
+    The archives are processed one after the other, or in a pool of worker
+    processes when ``processes`` is set. See
+    :func:`process_archives_parallel`.
+    """
     host_graph = dict((k, v) for k, v in graph.items() if k in dr.COMPONENTS[dr.GROUPS.single])
     host_graph[machine_id] = dr.DELEGATES[machine_id].dependencies
     cluster_graph = dict((k, v) for k, v in graph.items() if k not in host_graph)
 
     inventory = parse_inventory(inventory) if inventory else {}
 
-    brokers = process_archives(host_graph, archives)
-    facts = extract_facts(brokers)
+    if processes:
+        facts = merge_facts(
+            process_archives_parallel(host_graph, archives, processes, max_archives_per_worker)
+        )
+    else:
+        facts = extract_facts(process_archives(host_graph, archives))
     meta = ClusterMeta(len(archives), inventory)
 
     return process_facts(facts, meta, broker, cluster_graph)
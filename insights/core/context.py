@@ -158,6 +158,11 @@ class ExecutionContextMeta(type):
 
 class ExecutionContext(six.with_metaclass(ExecutionContextMeta)):
     marker = None
+    file_index = None
+    """
+    :class:`insights.core.file_index.FileIndex` of an extracted archive, used
+    by the file datasources instead of the filesystem when it's set.
+    """
 
     def __init__(self, root="/", timeout=None, all_files=None):
         self.root = root
@@ -57,6 +57,7 @@ import pkgutil
 import re
 import six
 import sys
+import threading
 import time
 import traceback
 
@@ -111,6 +112,7 @@ def set_enabled(component, enabled=True):
 
     if component:
         ENABLED[component] = enabled
+        _PLANS.clear()
 
 
 def is_enabled(component):
@@ -505,15 +507,18 @@ def _import(path, continue_on_error):
             raise
 
 
+def _module_path(path):
+    if path.endswith(".py"):
+        path, _ = os.path.splitext(path)
+    return path.rstrip("/").replace("/", ".")
+
+
 def _load_components(path, include=".*", exclude="\\.tests", continue_on_error=True):
     do_include = re.compile(include).search if include else lambda x: True
     do_exclude = re.compile(exclude).search if exclude else lambda x: False
 
     num_loaded = 0
-    if path.endswith(".py"):
-        path, _ = os.path.splitext(path)
-
-    path = path.rstrip("/").replace("/", ".")
+    path = _module_path(path)
     if do_exclude(path):
         return 0
 
@@ -545,6 +550,11 @@ def load_components(*paths, **kwargs):
     Loads all components on the paths. Each path should be a package or module.
     All components beneath a path are loaded.
 
+    When a ``manifest`` built by :func:`build_manifest` and the ``components``
+    a run needs are passed, only the modules on the paths those components
+    transitively depend on are imported. All the modules are imported when
+    the manifest doesn't match the modules on the paths anymore.
+
     Args:
         paths (str): A package or module to load
 
@@ -555,6 +565,9 @@ def load_components(*paths, **kwargs):
             Defaults to 'test'
         continue_on_error (bool): If True, continue importing even if something
             raises an ImportError. If False, raise the first ImportError.
+        manifest (str or dict): A manifest or the path of a JSON file with one.
+        components (list): The components or names of the components to load
+            with the manifest.
 
     Returns:
         int: The total number of modules loaded.
@@ -562,12 +575,161 @@ def load_components(*paths, **kwargs):
     Raises:
         ImportError
     """
+    manifest = kwargs.pop("manifest", None)
+    components = kwargs.pop("components", None)
+    if manifest is not None and components:
+        modules = _manifest_modules(manifest, paths, components, **kwargs)
+        if modules is not None:
+            continue_on_error = kwargs.get("continue_on_error", True)
+            for name in modules:
+                _import(name, continue_on_error)
+            return len(modules)
+        log.info("Component manifest is out of date, loading all the components")
+
     num_loaded = 0
     for path in paths:
         num_loaded += _load_components(path, **kwargs)
     return num_loaded
 
 
+MANIFEST_VERSION = 1
+
+
+def _module_files(path, include=".*", exclude="\\.tests", **kwargs):
+    """
+    Yields the name and the file of each module :func:`_load_components`
+    imports for path, without importing them. The file is None when it isn't
+    a source file on the filesystem.
+    """
+    import importlib.util
+
+    do_include = re.compile(include).search if include else lambda x: True
+    do_exclude = re.compile(exclude).search if exclude else lambda x: False
+
+    def walk(name, spec_path, locations):
+        yield name, spec_path
+        if locations is None:
+            return
+        prefix = name + "."
+        for finder, sub, is_pkg in pkgutil.iter_modules(path=locations, prefix=prefix):
+            if not sub.startswith(prefix):
+                sub = prefix + sub
+            base = os.path.join(getattr(finder, "path", ""), sub.rpartition(".")[2])
+            if is_pkg:
+                if not do_exclude(sub):
+                    for m in walk(sub, os.path.join(base, "__init__.py"), [base]):
+                        yield m
+            elif do_include(sub) and not do_exclude(sub):
+                yield sub, base + ".py"
+
+    path = _module_path(path)
+    if do_exclude(path):
+        return
+    spec = importlib.util.find_spec(path)
+    if spec is None:
+        return
+    for m in walk(path, spec.origin, spec.submodule_search_locations):
+        yield m
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return [st.st_mtime, st.st_size]
+    except (OSError, TypeError):
+        pass
+
+
+def build_manifest(*paths, **kwargs):
+    """
+    Loads all components on the paths like :func:`load_components` and returns
+    a manifest of their modules for ``load_components(manifest=...)``. The
+    manifest is a JSON serializable dictionary with the modification time and
+    size of each module on the paths, and the module, type and dependencies of
+    each loaded component.
+
+    Args:
+        paths (str): A package or module to load
+
+    Keyword Args:
+        include (str): A regular expression of packages and modules to include.
+        exclude (str): A regular expression of packges and modules to exclude.
+        continue_on_error (bool): If True, continue importing even if something
+            raises an ImportError. If False, raise the first ImportError.
+
+    Returns:
+        dict: The manifest.
+    """
+    load_components(*paths, **kwargs)
+    modules = {}
+    for path in paths:
+        for name, filename in _module_files(path, **kwargs):
+            modules[name] = _stamp(filename)
+
+    components = {}
+    for component, delegate in list(DELEGATES.items()):
+        components[get_name(component)] = {
+            "module": getattr(component, "__module__", None),
+            "type": get_name(delegate.type),
+            "dependencies": sorted(get_name(d) for d in delegate.get_dependencies()),
+        }
+    return {"version": MANIFEST_VERSION, "modules": modules, "components": components}
+
+
+def _manifest_modules(manifest, paths, components, **kwargs):
+    """
+    Returns the sorted names of the modules on the paths that the components
+    depend on according to the manifest, or None when the manifest doesn't
+    match the modules on the paths.
+    """
+    if isinstance(manifest, six.string_types):
+        try:
+            with open(manifest) as f:
+                manifest = json.load(f)
+        except (IOError, ValueError) as ex:
+            log.warning("Unable to read the component manifest %s: %s", manifest, ex)
+            return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+
+    recorded = manifest["modules"]
+    on_paths = set()
+    try:
+        for path in paths:
+            prefix = _module_path(path) + "."
+            found = set()
+            for name, filename in _module_files(path, **kwargs):
+                stamp = _stamp(filename)
+                if stamp is None or recorded.get(name) != stamp:
+                    return None
+                found.add(name)
+            if found != set(m for m in recorded if m + "." == prefix or m.startswith(prefix)):
+                return None
+            on_paths |= found
+    except ImportError:
+        return None
+
+    known = manifest["components"]
+    pending = []
+    for c in components:
+        if isinstance(c, six.string_types):
+            pending.append(c)
+        else:
+            pending.extend(get_name(d) for d in get_dependency_graph(c))
+    seen = set()
+    modules = set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in known:
+            continue
+        seen.add(name)
+        entry = known[name]
+        if entry["module"] in on_paths:
+            modules.add(entry["module"])
+        pending.extend(entry["dependencies"])
+    return sorted(modules)
+
+
 def first_of(dependencies, broker):
     for d in dependencies:
         if d in broker:
@@ -611,6 +773,7 @@ def _register_component(delegate):
 
     MODULE_NAMES[component] = get_module_name(component)
     BASE_MODULE_NAMES[component] = get_base_module_name(component)
+    _PLANS.clear()
 
 
 class ComponentType(object):
@@ -809,6 +972,7 @@ class ComponentType(object):
 
         DEPENDENCIES[self.component].add(dep)
         COMPONENTS[group][self.component].add(dep)
+        _PLANS.clear()
 
 
 class Broker(object):
@@ -842,14 +1006,26 @@ class Broker(object):
             the execution time here is the sum of their individual execution
             times.
         store_skips (bool): Weather to store skips in the broker or not.
+        lazy (dict): components whose instances are produced on first access.
+            Values are the loaders registered with :func:`Broker.add_lazy`.
+        parser_cache (ParserCache): the
+            :class:`insights.core.parser_cache.ParserCache` parsers read their
+            results from, or None.
+        parser_cache_stats (defaultdict(int)): the ``hits``, ``misses`` and
+            ``uncacheable`` inputs of the parsers run with the ``parser_cache``.
     """
     def __init__(self, seed_broker=None):
         self.instances = dict(seed_broker.instances) if seed_broker else {}
+        self.lazy = dict(seed_broker.lazy) if seed_broker else {}
+        self._lazy_lock = threading.RLock()
+        self._loading = set()
         self.missing_requirements = {}
         self.exceptions = defaultdict(list)
         self.tracebacks = {}
         self.exec_times = {}
         self.store_skips = False
+        self.parser_cache = seed_broker.parser_cache if seed_broker else None
+        self.parser_cache_stats = defaultdict(int)
 
         self.observers = defaultdict(set)
         if seed_broker is not None:
@@ -913,44 +1089,88 @@ class Broker(object):
             self.exceptions[component].append(ex)
             self.tracebacks[ex] = tb
 
+    def add_lazy(self, component, loader):
+        """
+        Register a placeholder for ``component``. The first time the component
+        is looked up with ``in`` or ``[]``, ``loader(component, broker)`` is
+        called and is expected to set the component's instance in the broker.
+        If it doesn't, the component is treated as missing.
+        """
+        if component in self.instances or component in self.lazy:
+            raise KeyError("Already exists in broker with key: %s" % get_name(component))
+        self.lazy[component] = loader
+
+    def _load(self, component):
+        # Another thread looking the component up while it's loaded finds it
+        # in _loading and waits for the lock instead of seeing it missing.
+        with self._lazy_lock:
+            if component not in self.lazy:
+                return
+            self._loading.add(component)
+            loader = self.lazy.pop(component)
+            try:
+                loader(component, self)
+            except Exception as ex:
+                log.exception(ex)
+            finally:
+                self._loading.discard(component)
+
+    def _resolve(self, component):
+        if component in self.lazy or component in self._loading:
+            self._load(component)
+
+    def _load_all(self):
+        for component in list(self.lazy):
+            self._load(component)
+
     def __iter__(self):
+        self._load_all()
         return iter(self.instances)
 
     def keys(self):
+        self._load_all()
         return self.instances.keys()
 
     def items(self):
+        self._load_all()
         return self.instances.items()
 
     def values(self):
+        self._load_all()
         return self.instances.values()
 
     def get_by_type(self, _type):
         """
         Return all of the instances of :class:`ComponentType` ``_type``.
         """
+        for k in list(self.lazy):
+            if get_component_type(k) is _type:
+                self._load(k)
         r = {}
-        for k, v in self.items():
+        for k, v in self.instances.items():
             if get_component_type(k) is _type:
                 r[k] = v
         return r
 
     def __contains__(self, component):
+        self._resolve(component)
         return component in self.instances
 
     def __setitem__(self, component, instance):
         msg = "Already exists in broker with key: %s"
-        if component in self.instances:
+        if component in self.instances or component in self.lazy:
             raise KeyError(msg % get_name(component))
 
         self.instances[component] = instance
 
     def __delitem__(self, component):
+        self.lazy.pop(component, None)
         if component in self.instances:
             del self.instances[component]
             return
 
     def __getitem__(self, component):
+        self._resolve(component)
         if component in self.instances:
             return self.instances[component]
 
@@ -1053,87 +1273,256 @@ def determine_components(components):
 
 _determine_components = determine_components
 
+_PLANS = {}
+_PLANS_REGISTRY = [None]
+MAX_PLANS = 64
+"""
+The number of execution plans kept by :func:`get_execution_plan`.
+"""
+
+
+class ExecutionPlan(object):
+    """
+    A resolved dependency graph and the order to evaluate its components in.
+    Plans are built and cached by :func:`get_execution_plan` and can be
+    passed to :func:`run` and :func:`run_all` instead of the components.
+
+    Attributes:
+        graph (dict): the dependencies of each component. It's shared by all
+            the runs of the plan, so it must not be modified.
+        order (list): the components in an order that satisfies their
+            dependency relationships.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.order = run_order(graph)
+        self._groups = {}
+        self._subgraphs = None
+
+    def for_group(self, group):
+        """
+        Returns the plan of the components of the graph in ``group``.
+        """
+        plan = self._groups.get(group)
+        if plan is None:
+            members = COMPONENTS[group]
+            graph = dict((k, v) for k, v in self.graph.items() if k in members)
+            plan = self._groups[group] = ExecutionPlan(graph)
+        return plan
+
+    def subgraphs(self):
+        """
+        Returns the plans of the disjoint subgraphs of the graph.
+        """
+        if self._subgraphs is None:
+            self._subgraphs = [ExecutionPlan(g) for g in get_subgraphs(self.graph)]
+        return self._subgraphs
+
+
+def _plan_key(components):
+    if isinstance(components, dict):
+        for group, graph in list(COMPONENTS.items()):
+            if graph is components:
+                return ("group", group)
+        plan = _PLANS.get(("id", id(components)))
+        if plan is not None and plan.graph is components:
+            return ("id", id(components))
+        return ("graph", frozenset((k, frozenset(v)) for k, v in components.items()))
+    if isinstance(components, (list, set)):
+        return ("list", tuple(components))
+    return ("component", components)
+
 
-def run_components(ordered_components, components, broker):
+def get_execution_plan(components=None):
+    """
+    Returns the :class:`ExecutionPlan` of the components, which can be
+    anything :func:`run` accepts. Plans are cached until a component is
+    registered, enabled or disabled, or gets a new dependency.
+    """
+    if isinstance(components, ExecutionPlan):
+        return components
+    components = components or COMPONENTS[GROUPS.single]
+
+    registry = (id(COMPONENTS), id(DEPENDENCIES), id(DELEGATES))
+    if _PLANS_REGISTRY[0] != registry:
+        _PLANS.clear()
+        _PLANS_REGISTRY[0] = registry
+
+    key = _plan_key(components)
+    plan = _PLANS.get(key)
+    if plan is None:
+        graph = determine_components(components)
+        if key[0] == "graph":
+            graph = dict(graph)
+        if len(_PLANS) >= MAX_PLANS:
+            _PLANS.clear()
+        plan = _PLANS[key] = ExecutionPlan(graph)
+        _PLANS[("id", id(plan.graph))] = plan
+    return plan
+
+
+def _run_component(component, components, broker):
+    """
+    Attempts a single component, recording its result, exception, and execution
+    time in the broker. Observers are left to the caller.
+    """
+    start = time.time()
+    try:
+        if (component not in broker and component in components and
+           component in DELEGATES and
+           is_enabled(component)):
+            log.info("Trying %s" % get_name(component))
+            result = DELEGATES[component].process(broker)
+            broker[component] = result
+    except BlacklistedSpec as bs:
+        for x in get_registry_points(component):
+            BLACKLISTED_SPECS.append(str(x).split('.')[-1])
+        broker.add_exception(component, bs, traceback.format_exc())
+    except MissingRequirements as mr:
+        if log.isEnabledFor(logging.DEBUG):
+            name = get_name(component)
+            reqs = stringify_requirements(mr.requirements)
+            log.debug("%s missing requirements %s" % (name, reqs))
+        broker.add_exception(component, mr)
+    except SkipComponent as sc:
+        if broker.store_skips:
+            log.debug(sc)
+            broker.add_exception(component, sc, traceback.format_exc())
+        else:
+            pass
+    except Exception as ex:
+        log.debug(ex)
+        tb = traceback.format_exc()
+        broker.add_exception(component, ex, tb)
+        for reg_spec in get_registry_points(component):
+            broker.add_exception(reg_spec, ex, tb)
+    finally:
+        broker.exec_times[component] = time.time() - start
+
+
+def run_components(ordered_components, components, broker, pool=None):
     """
     Runs a list of preordered components using the provided broker.
 
     This function allows callers to order components themselves and cache the
     result so they don't incur the toposort overhead on every run.
+
+    If a ``pool`` is given, the work is handed to
+    :func:`run_components_parallel` instead.
     """
+    if pool is not None:
+        return run_components_parallel(ordered_components, components, broker, pool)
+
     for component in ordered_components:
-        start = time.time()
         try:
+            _run_component(component, components, broker)
+        finally:
+            broker.fire_observers(component)
+
+    return broker
+
+
+def run_components_parallel(ordered_components, components, broker, pool):
+    """
+    Runs a list of preordered components using the provided broker, submitting
+    each component to ``pool`` as soon as all of its dependencies have been
+    attempted.
+
+    Unlike :func:`run_all`, which can only run disjoint subgraphs side by side,
+    this schedules individual components from a ready queue, so independent
+    specs and parsers within one large graph are evaluated concurrently.
+
+    Components are evaluated against the shared broker, so ``pool`` must be a
+    thread based :class:`concurrent.futures.Executor`. Observers are fired from
+    the calling thread in the order components complete.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    ordered_components = list(ordered_components)
+    position = dict((c, i) for i, c in enumerate(ordered_components))
+    waiting_on = {}
+    dependents = defaultdict(list)
+    for component in ordered_components:
+        deps = set(d for d in components.get(component, ()) if d in position and d is not component)
+        waiting_on[component] = len(deps)
+        for dep in deps:
+            dependents[dep].append(component)
+
+    ready = [c for c in ordered_components if not waiting_on[c]]
+    running = {}
+
+    def finish(component):
+        broker.fire_observers(component)
+        for dependent in dependents[component]:
+            waiting_on[dependent] -= 1
+            if not waiting_on[dependent]:
+                ready.append(dependent)
+
+    while ready or running:
+        # keep dispatch order stable by preferring the toposorted order
+        ready.sort(key=position.get, reverse=True)
+        while ready:
+            component = ready.pop()
             if (component not in broker and component in components and
                component in DELEGATES and
                is_enabled(component)):
-                log.info("Trying %s" % get_name(component))
-                result = DELEGATES[component].process(broker)
-                broker[component] = result
-        except BlacklistedSpec as bs:
-            for x in get_registry_points(component):
-                BLACKLISTED_SPECS.append(str(x).split('.')[-1])
-            broker.add_exception(component, bs, traceback.format_exc())
-        except MissingRequirements as mr:
-            if log.isEnabledFor(logging.DEBUG):
-                name = get_name(component)
-                reqs = stringify_requirements(mr.requirements)
-                log.debug("%s missing requirements %s" % (name, reqs))
-            broker.add_exception(component, mr)
-        except SkipComponent as sc:
-            if broker.store_skips:
-                log.debug(sc)
-                broker.add_exception(component, sc, traceback.format_exc())
+                running[pool.submit(_run_component, component, components, broker)] = component
             else:
-                pass
-        except Exception as ex:
-            log.debug(ex)
-            tb = traceback.format_exc()
-            broker.add_exception(component, ex, tb)
-            for reg_spec in get_registry_points(component):
-                broker.add_exception(reg_spec, ex, tb)
-        finally:
-            broker.exec_times[component] = time.time() - start
-            broker.fire_observers(component)
+                # nothing to evaluate, so don't pay for a round trip to the pool
+                try:
+                    _run_component(component, components, broker)
+                finally:
+                    finish(component)
+
+        if running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                component = running.pop(future)
+                try:
+                    future.result()
+                finally:
+                    finish(component)
 
     return broker
 
 
-def run(components=None, broker=None):
+def run(components=None, broker=None, pool=None):
     """
     Executes components in an order that satisfies their dependency
     relationships.
 
     Keyword Args:
         components: Can be one of a dependency graph, a single component, a
-            component group, or a component type. If it's anything other than a
-            dependency graph, the appropriate graph is built for you and before
-            evaluation.
+            component group, a component type or an :class:`ExecutionPlan`.
+            If it's anything other than a plan, the plan is taken from
+            :func:`get_execution_plan`.
         broker (Broker): Optionally pass a broker to use for evaluation. One is
             created by default, but it's often useful to seed a broker with an
             initial dependency.
+        pool (Executor): Optionally pass a thread pool. Components are then
+            submitted to it as soon as their dependencies have been attempted.
+            See :func:`run_components_parallel`.
     Returns:
         Broker: The broker after evaluation.
     """
-    components = components or COMPONENTS[GROUPS.single]
-    components = determine_components(components)
+    plan = get_execution_plan(components)
     broker = broker or Broker()
     # If a SerializedArchiveContext then data found in the archive's
     # ./meta_data directory are prepopulated in the broker as Specs so
     # no need to collect them again
     if broker.get(SerializedArchiveContext) is not None:
+        components = dict(plan.graph)
         for comp in list(components):
             if comp in broker:
                 for dep in components[comp]:
                     components.pop(dep, None)
-    return run_components(run_order(components), components, broker)
+        return run_components(run_order(components), components, broker, pool=pool)
+    return run_components(plan.order, plan.graph, broker, pool=pool)
 
 
 def generate_incremental(components=None, broker=None):
-    components = components or COMPONENTS[GROUPS.single]
-    components = determine_components(components)
-    for graph in get_subgraphs(components):
-        yield graph, broker or Broker()
+    for plan in get_execution_plan(components).subgraphs():
+        yield plan.graph, broker or Broker()
 
 
 def run_incremental(components=None, broker=None):
@@ -1155,15 +1544,24 @@ def run_incremental(components=None, broker=None):
     Yields:
         Broker: the broker used to evaluate each subgraph.
     """
-    for graph, _broker in generate_incremental(components, broker):
-        yield run(graph, broker=_broker)
+    for plan in get_execution_plan(components).subgraphs():
+        yield run(plan, broker=broker or Broker())
 
 
 def run_all(components=None, broker=None, pool=None):
+    """
+    Executes components in an order that satisfies their dependency
+    relationships and returns a list of the brokers used to evaluate each
+    disjoint subgraph.
+
+    If a ``pool`` is given, components within each subgraph are submitted to
+    it as soon as their dependencies have been attempted. When a ``broker`` is
+    also given, every subgraph shares it, so they're scheduled together as a
+    single graph.
+    """
     if pool:
-        futures = []
-        for graph, _broker in generate_incremental(components, broker):
-            futures.append(pool.submit(run, graph, _broker))
-        return [f.result() for f in futures]
+        if broker is not None:
+            return [run(components, broker=broker, pool=pool)]
+        return [run(plan, broker=Broker(), pool=pool) for plan in get_execution_plan(components).subgraphs()]
     else:
         return list(run_incremental(components=components, broker=broker))
@@ -0,0 +1,316 @@
+"""
+A long lived engine that processes many archives with the same components.
+
+The components are loaded and their execution plan is resolved once, and the
+archives are processed one by one in the calling process or in a pool of
+worker processes that are recycled after a number of archives:
+
+    .. code-block:: python
+
+       from insights import Engine
+       from my_rules import rules
+
+       with Engine(rules.report, processes=4, max_archives_per_worker=100) as engine:
+           for result in engine.process(paths):
+               if result.error:
+                   log.error("%s failed: %s", result.archive, result.error)
+               else:
+                   store(result.archive, result.result, result.timings)
+"""
+import logging
+import os
+import shutil
+import six
+import tempfile
+import time
+import traceback
+
+from collections import deque
+
+from insights.core import dr, plugins
+from insights.core.archives import MemberFilter, extract
+from insights.core.exceptions import ContentException, SkipComponent
+from insights.core.parser_cache import ParserCache
+from insights.core.spec_factory import archive_patterns
+
+log = logging.getLogger(__name__)
+
+_WORKER = [None]
+
+
+def rule_results(broker):
+    """
+    The default ``handler`` of :class:`Engine`. Returns the responses of the
+    rules in the broker by the names of the rules.
+    """
+    return dict(
+        (dr.get_name(c), v) for c, v in broker.instances.items() if plugins.is_rule(c)
+    )
+
+
+def _errors(broker):
+    errors = {}
+    for component, exceptions in broker.exceptions.items():
+        tbs = [
+            broker.tracebacks.get(ex) or str(ex)
+            for ex in exceptions
+            if not isinstance(ex, (ContentException, SkipComponent))
+        ]
+        if tbs:
+            errors[dr.get_name(component)] = tbs
+    return errors
+
+
+class ArchiveResult(object):
+    """
+    The outcome of processing one archive.
+
+    Attributes:
+        archive (str): the path or the name of the file object of the archive.
+        result: what the ``handler`` of the engine returned for the archive.
+        errors (dict): the tracebacks of the components that raised
+            exceptions, by component name. Missing content and skipped
+            components aren't included.
+        error (str): the traceback of the failure when the archive couldn't be
+            processed at all, or None.
+        timings (dict): seconds spent to ``extract`` the archive, ``run`` the
+            components and in ``total``.
+        parser_cache (dict): the ``parser_cache_stats`` of the broker of the
+            archive.
+    """
+    def __init__(self, archive):
+        self.archive = archive
+        self.result = None
+        self.errors = {}
+        self.error = None
+        self.timings = {}
+        self.parser_cache = {}
+
+    def to_dict(self):
+        return {
+            "archive": self.archive,
+            "result": self.result,
+            "errors": self.errors,
+            "error": self.error,
+            "timings": self.timings,
+            "parser_cache": self.parser_cache,
+        }
+
+    def __repr__(self):
+        return "<ArchiveResult(%r, error=%s)>" % (self.archive, self.error is not None)
+
+
+def _resolve(component):
+    if not isinstance(component, six.string_types):
+        return component
+    resolved = dr.get_component(component)
+    if resolved is None:
+        raise ValueError("Unknown component: %s" % component)
+    return resolved
+
+
+def _init_worker(options):
+    _WORKER[0] = Engine(**options)
+
+
+def _process_in_worker(archive):
+    return _WORKER[0].process_one(archive)
+
+
+class _Done(object):
+    # A result computed in the calling process, with the interface of an
+    # AsyncResult.
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class Engine(object):
+    """
+    Processes many archives with the same components.
+
+    Args:
+        components (list): the components, or their names, to run with their
+            dependencies. All the loaded components run when it's None.
+        packages (list): the packages or modules with components to load,
+            like ``insights-run -p``.
+        load_default (bool): whether to load the default specs.
+        processes (int): the number of worker processes. Archives are
+            processed in the calling process when it's 0 or None.
+        max_archives_per_worker (int): the number of archives a worker
+            process handles before it's replaced by a new one, to bound its
+            memory. None keeps the workers for the life of the engine.
+        context (ExecutionContext): the execution context of the archives.
+            It's identified from each archive when None.
+        timeout (int): the timeout of archive extractions in seconds.
+        extract_dir (str): the directory archives are extracted into.
+        handler (callable): called with the broker of each archive to return
+            the :attr:`ArchiveResult.result`. It must return a picklable value
+            when ``processes`` is set. Defaults to :func:`rule_results`.
+        filter_members (bool): whether to extract only the archive members
+            the file datasources of the components can read. See
+            :class:`insights.core.archives.MemberFilter`.
+        parser_cache (str): the directory of a
+            :class:`insights.core.parser_cache.ParserCache` shared by the
+            archives. Its statistics are in :attr:`ArchiveResult.parser_cache`.
+            Each of the ``processes`` has its own instance, which rescans the
+            directory to keep it near its ``max_size``.
+    """
+    def __init__(self, components=None, packages=None, load_default=True, processes=None,
+                 max_archives_per_worker=None, context=None, timeout=None, extract_dir=None,
+                 handler=None, filter_members=False, parser_cache=None):
+        from insights import load_default_plugins, load_packages
+
+        if load_default:
+            load_default_plugins()
+        load_packages(packages or [])
+
+        if components is not None:
+            if not isinstance(components, (list, set, tuple)):
+                components = [components]
+            components = [_resolve(c) for c in components]
+        self.plan = dr.get_execution_plan(list(components) if components else None)
+        self.context = context
+        self.timeout = timeout
+        self.extract_dir = extract_dir
+        self.handler = handler or rule_results
+        self.parser_cache = ParserCache(parser_cache) if parser_cache else None
+        self.members = None
+        if filter_members:
+            patterns = archive_patterns(self.plan.graph)
+            self.members = MemberFilter(patterns) if patterns is not None else None
+        self.processes = processes
+        self._pool = None
+        if processes:
+            import multiprocessing
+
+            options = dict(
+                components=[dr.get_name(c) for c in components] if components else None,
+                packages=packages,
+                load_default=load_default,
+                context=context,
+                timeout=timeout,
+                extract_dir=extract_dir,
+                handler=handler,
+                filter_members=filter_members,
+                parser_cache=parser_cache,
+            )
+            self._pool = multiprocessing.Pool(
+                processes,
+                initializer=_init_worker,
+                initargs=(options,),
+                maxtasksperchild=max_archives_per_worker,
+            )
+
+    def process_one(self, archive):
+        """
+        Processes an archive, or an extracted archive directory, in the
+        calling process.
+
+        Returns:
+            ArchiveResult: the outcome of the archive.
+        """
+        from insights import process_dir
+
+        result = ArchiveResult(archive)
+        start = time.time()
+        extracted = None
+        try:
+            if os.path.isdir(archive):
+                root, ex = archive, None
+            else:
+                ex = extract(archive, timeout=self.timeout, extract_dir=self.extract_dir,
+                             members=self.members)
+                root = ex.__enter__().tmp_dir
+            try:
+                extracted = time.time()
+                broker = dr.Broker()
+                broker.parser_cache = self.parser_cache
+                broker = process_dir(broker, root, self.plan.graph, self.context)
+                result.result = self.handler(broker)
+                result.errors = _errors(broker)
+                result.parser_cache = dict(broker.parser_cache_stats)
+            finally:
+                if ex is not None:
+                    ex.__exit__(None, None, None)
+        except Exception:
+            result.error = traceback.format_exc()
+            log.debug(result.error)
+        finish = time.time()
+        extracted = extracted or finish
+        result.timings = {
+            "extract": extracted - start,
+            "run": finish - extracted,
+            "total": finish - start,
+        }
+        return result
+
+    def _submit(self, archive):
+        spooled = None
+        if hasattr(archive, "read"):
+            name = getattr(archive, "name", None)
+            fd, spooled = tempfile.mkstemp(prefix="insights-engine-", dir=self.extract_dir)
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(archive, f)
+            archive = spooled
+        else:
+            name = archive
+
+        if self._pool is not None:
+            pending = self._pool.apply_async(_process_in_worker, (archive,))
+        else:
+            pending = _Done(self.process_one(archive))
+        return name, spooled, pending
+
+    def _collect(self, submitted):
+        name, spooled, pending = submitted
+        try:
+            result = pending.get()
+        except Exception:
+            result = ArchiveResult(name)
+            result.error = traceback.format_exc()
+        finally:
+            if spooled:
+                os.remove(spooled)
+        result.archive = name
+        return result
+
+    def process(self, archives):
+        """
+        Processes a stream of archives. Each archive is a path to an archive
+        or an extracted archive directory, or a binary file object with the
+        content of an archive.
+
+        Yields:
+            ArchiveResult: the outcome of each archive, in the order of the
+            archives.
+        """
+        window = 2 * self.processes if self._pool is not None else 1
+        pending = deque()
+        for archive in archives:
+            pending.append(self._submit(archive))
+            while len(pending) >= window:
+                yield self._collect(pending.popleft())
+        while pending:
+            yield self._collect(pending.popleft())
+
+    def close(self):
+        """
+        Stops the worker processes after they finish the pending archives.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is not None and self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self.close()
@@ -0,0 +1,179 @@
+"""
+In-memory index of the paths in an extracted archive.
+
+The tree of an extracted archive doesn't change while it's processed, so it's
+walked once when its context is created and the file datasources answer
+existence checks, directory listings and glob patterns from the index instead
+of asking the filesystem again for every spec.
+
+Paths that go through symbolic links, unreadable directories or special files
+are not resolved by the index. The methods of :class:`FileIndex` return
+``None`` for them, and callers fall back to the filesystem.
+"""
+import errno
+import fnmatch
+import logging
+import os
+import stat
+
+from glob import has_magic
+
+log = logging.getLogger(__name__)
+
+FILE = "file"
+DIR = "dir"
+MISSING = "missing"
+LINK = "link"
+OTHER = "other"
+
+
+if hasattr(os, "scandir"):
+    def _list(path):
+        with os.scandir(path) as it:
+            for ent in it:
+                if ent.is_symlink():
+                    yield ent.name, LINK
+                elif ent.is_dir(follow_symlinks=False):
+                    yield ent.name, DIR
+                elif ent.is_file(follow_symlinks=False):
+                    yield ent.name, FILE
+                else:
+                    yield ent.name, OTHER
+
+
+else:
+    def _list(path):
+        for name in os.listdir(path):
+            mode = os.lstat(os.path.join(path, name)).st_mode
+            if stat.S_ISLNK(mode):
+                yield name, LINK
+            elif stat.S_ISDIR(mode):
+                yield name, DIR
+            elif stat.S_ISREG(mode):
+                yield name, FILE
+            else:
+                yield name, OTHER
+
+
+def _missing(code, path):
+    return OSError(code, os.strerror(code), path)
+
+
+class FileIndex(object):
+    """
+    Index of the files, directories and symbolic links under ``root``.
+
+    Attributes:
+        root (str): the indexed directory.
+        files (list): the regular files under ``root``, in the same order as
+            :func:`insights.core.hydration.get_all_files` yields them.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.files = []
+        self._kinds = {self.root: DIR}
+        self._children = {}
+        self._walk(self.root)
+
+    def _walk(self, path):
+        names = []
+        for name, kind in _list(path):
+            names.append(name)
+            child = os.path.join(path, name)
+            self._kinds[child] = kind
+            if kind == DIR:
+                try:
+                    self._walk(child)
+                except OSError as ex:
+                    log.exception(ex)
+                    self._kinds[child] = OTHER
+            elif kind == FILE:
+                self.files.append(child)
+        self._children[path] = sorted(names)
+
+    def _parts(self, path):
+        # The relative components of a path under root, or None when they
+        # can't be resolved without the filesystem.
+        if path == self.root:
+            return []
+        prefix = os.path.join(self.root, "")
+        if not path.startswith(prefix):
+            return None
+        parts = path[len(prefix):].split(os.sep)
+        if any(p in ("", ".", "..") for p in parts):
+            return None
+        return parts
+
+    def kind(self, path):
+        """
+        Returns :data:`FILE`, :data:`DIR` or :data:`MISSING` for ``path``, or
+        ``None`` when only the filesystem can tell.
+        """
+        parts = self._parts(path)
+        if parts is None:
+            return None
+        current = self.root
+        for i, part in enumerate(parts):
+            current = os.path.join(current, part)
+            kind = self._kinds.get(current)
+            if kind is None:
+                return MISSING
+            if kind in (LINK, OTHER):
+                return None
+            if kind == FILE and i < len(parts) - 1:
+                return MISSING
+        return self._kinds[current]
+
+    def isdir(self, path):
+        """
+        Like :func:`os.path.isdir`, or ``None`` when only the filesystem can
+        tell.
+        """
+        kind = self.kind(path)
+        return None if kind is None else kind == DIR
+
+    def listdir(self, path):
+        """
+        Like :func:`os.listdir` with sorted names, or ``None`` when only the
+        filesystem can tell.
+
+        Raises:
+            OSError: when ``path`` doesn't exist or isn't a directory.
+        """
+        kind = self.kind(path)
+        if kind == DIR:
+            return list(self._children[path])
+        if kind == MISSING:
+            raise _missing(errno.ENOENT, path)
+        if kind == FILE:
+            raise _missing(errno.ENOTDIR, path)
+
+    def glob(self, pattern):
+        """
+        Like :func:`glob.glob` with sorted results, or ``None`` when only the
+        filesystem can tell.
+        """
+        parts = self._parts(pattern)
+        if parts is None:
+            return None
+        matches = [self.root]
+        for i, part in enumerate(parts):
+            last = i == len(parts) - 1
+            found = []
+            for parent in matches:
+                if has_magic(part):
+                    names = self._children[parent]
+                    if not part.startswith("."):
+                        names = [n for n in names if not n.startswith(".")]
+                    names = fnmatch.filter(names, part)
+                else:
+                    names = [part] if os.path.join(parent, part) in self._kinds else []
+                for name in names:
+                    path = os.path.join(parent, name)
+                    kind = self._kinds[path]
+                    if last or kind == DIR:
+                        found.append(path)
+                    elif kind in (LINK, OTHER):
+                        return None
+            matches = found
+        return matches
@@ -5,6 +5,7 @@ from insights.core import archives, dr
 from insights.core.context import (ClusterArchiveContext, ExecutionContextMeta, HostArchiveContext,
                                    SerializedArchiveContext)
 from insights.core.exceptions import InvalidArchive
+from insights.core.file_index import FileIndex
 from insights.core.serde import Hydration
 
 log = logging.getLogger(__name__)
@@ -52,16 +53,19 @@ def create_context(path, context=None):
     if arc:
         return ClusterArchiveContext(path, all_files=arc)
 
-    all_files = list(get_all_files(path))
+    index = FileIndex(path)
+    all_files = index.files
     if not all_files:
         raise InvalidArchive("No files in archive")
 
     common_path, ctx = identify(all_files)
     context = context or ctx
-    return context(common_path, all_files=all_files)
+    ctx = context(common_path, all_files=all_files)
+    ctx.file_index = index
+    return ctx
 
 
-def initialize_broker(path, context=None, broker=None):
+def initialize_broker(path, context=None, broker=None, pool=None, lazy=False):
     ctx = create_context(path, context=context)
     broker = broker or dr.Broker()
     if isinstance(ctx, ClusterArchiveContext):
@@ -69,6 +73,6 @@ def initialize_broker(path, context=None, broker=None):
 
     broker[ctx.__class__] = ctx
     if isinstance(ctx, SerializedArchiveContext):
-        h = Hydration(root=ctx.root, ctx=ctx)
-        broker = h.hydrate(broker=broker)
+        h = Hydration(root=ctx.root, ctx=ctx, pool=pool)
+        broker = h.hydrate(broker=broker, lazy=lazy)
     return ctx, broker
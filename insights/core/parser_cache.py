@@ -0,0 +1,255 @@
+"""
+An on-disk cache of parser results keyed by their content.
+
+Hosts upload the same files day after day, and many hosts share the same
+configuration, so most parsers see content they've already parsed. With a
+:class:`ParserCache` set as the ``parser_cache`` of a broker, a parser whose
+input has the same content, path and arguments as a cached one is rebuilt
+from the cache instead of parsing the content again:
+
+    .. code-block:: python
+
+       broker = dr.Broker()
+       broker.parser_cache = ParserCache("/var/cache/insights/parsers")
+       broker = insights.run(rules.report, broker=broker, root=archive)
+       log.info("parser cache: %s", dict(broker.parser_cache_stats))
+
+Entries are keyed by the name of the parser, its :func:`parser_version` and
+a hash of the content, so a parser changed by a new release of insights-core
+or by an edit of its module never reads results of its previous version.
+Parsers of streamed content and those decorated with
+``@parser(..., cache=False)`` aren't cached. The least recently used entries
+are removed when the cache grows over ``max_size`` bytes. Entries are pickled,
+so the directory of the cache must only be writable by trusted users.
+"""
+import hashlib
+import inspect
+import logging
+import os
+import sys
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+from six.moves import cPickle as pickle
+
+from insights.core import StreamParser, default_parser_deserializer, dr
+
+log = logging.getLogger(__name__)
+
+_VERSIONS = {}
+_HASHES = {}
+
+
+def _module_hash(name):
+    try:
+        return _HASHES[name]
+    except KeyError:
+        pass
+    module = sys.modules.get(name)
+    path = getattr(module, "__file__", None)
+    if path and path.endswith((".pyc", ".pyo")):
+        path = path[:-1]
+    try:
+        with open(path, "rb") as f:
+            result = hashlib.sha1(f.read()).hexdigest()
+    except (IOError, OSError, TypeError):
+        result = name
+    _HASHES[name] = result
+    return result
+
+
+def _imported_modules(name):
+    # The names of the modules imported by a module, directly or through the
+    # functions and classes it imports.
+    module = sys.modules.get(name)
+    names = set()
+    for value in list(vars(module).values()) if module else []:
+        if inspect.ismodule(value):
+            names.add(value.__name__)
+        elif inspect.isclass(value) or inspect.isfunction(value):
+            names.add(getattr(value, "__module__", None))
+    names.discard(None)
+    names.discard(name)
+    return names
+
+
+def parser_version(cls):
+    """
+    Returns a hash of the version and commit of insights-core, and of the
+    source of the modules that define ``cls`` and its base classes and of the
+    modules they import. Changes to modules imported only indirectly, or to
+    packages outside of insights-core that don't change their module source,
+    aren't detected, so the cache should be cleared when those change.
+    """
+    try:
+        return _VERSIONS[cls]
+    except KeyError:
+        from insights import package_info
+
+        modules = set(c.__module__ for c in inspect.getmro(cls))
+        for name in list(modules):
+            modules.update(_imported_modules(name))
+        digest = hashlib.sha1()
+        digest.update(("%(NAME)s-%(VERSION)s-%(RELEASE)s %(COMMIT)s\n" % package_info).encode("utf-8"))
+        for name in sorted(modules):
+            digest.update(("%s:%s\n" % (name, _module_hash(name))).encode("utf-8"))
+        version = _VERSIONS[cls] = digest.hexdigest()
+        return version
+
+
+def _content_hash(context):
+    digest = hashlib.sha256()
+    for line in context.content:
+        if not isinstance(line, bytes):
+            line = line.encode("utf-8", "surrogateescape")
+        digest.update(line)
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class ParserCache(object):
+    """
+    Caches parser results under ``path``.
+
+    Args:
+        path (str): the directory of the cache. It's created when missing and
+            may be shared by concurrent processes.
+        max_size (int): the most bytes the entries take on disk.
+
+    Attributes:
+        size (int): the bytes the entries take on disk when the directory was
+            last scanned, plus the bytes written since by this instance.
+
+    The directory is scanned again after each instance writes a tenth of
+    ``max_size`` bytes, so the entries written by other processes are counted
+    and the least recently used entries of all of them are removed. When ``N``
+    processes share the directory, it can briefly grow to about
+    ``max_size * (1 + N / 10)`` bytes.
+    """
+    def __init__(self, path, max_size=1024 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self.size = 0
+        self._written = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._scan()
+
+    def _scan(self):
+        # Rebuilds the entries from the directory, oldest used first.
+        entries = []
+        for sub in os.listdir(self.path):
+            sub = os.path.join(self.path, sub)
+            if not os.path.isdir(sub):
+                continue
+            for name in os.listdir(sub):
+                if name.startswith(".tmp-"):
+                    continue
+                entry = os.path.join(sub, name)
+                try:
+                    st = os.stat(entry)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, entry, st.st_size))
+        self._entries = OrderedDict()
+        self.size = self._written = 0
+        for _, entry, size in sorted(entries):
+            self._entries[entry] = size
+            self.size += size
+
+    def _key(self, component, context):
+        parts = [
+            dr.get_name(component),
+            parser_version(component),
+            context.relative_path,
+            os.path.basename(context.path) if context.path is not None else None,
+            getattr(context, "args", None),
+            getattr(context, "rc", None),
+            getattr(context, "last_client_run", None),
+            _content_hash(context),
+        ]
+        key = hashlib.sha256(repr(parts).encode("utf-8", "surrogateescape")).hexdigest()
+        return os.path.join(self.path, key[:2], key)
+
+    def _load(self, component, entry):
+        try:
+            with open(entry, "rb") as f:
+                data = pickle.load(f)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            log.debug("Ignoring the unreadable parser cache entry %s", entry)
+            return None
+        with self._lock:
+            try:
+                os.utime(entry, None)
+            except OSError:
+                pass
+            if entry in self._entries:
+                self._entries[entry] = self._entries.pop(entry)
+        return default_parser_deserializer(component, data)
+
+    def _store(self, entry, obj):
+        data = pickle.dumps(vars(obj), pickle.HIGHEST_PROTOCOL)
+        parent = os.path.dirname(entry)
+        if not os.path.isdir(parent):
+            try:
+                os.makedirs(parent)
+            except OSError:
+                pass
+        fd, tmp = tempfile.mkstemp(dir=parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.rename(tmp, entry)
+        except Exception:
+            os.remove(tmp)
+            raise
+        with self._lock:
+            self.size += len(data) - self._entries.pop(entry, 0)
+            self._entries[entry] = len(data)
+            self._written += len(data)
+            if self._written * 10 > self.max_size:
+                self._scan()
+            while self.size > self.max_size and self._entries:
+                old, size = self._entries.popitem(last=False)
+                self.size -= size
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    def parse(self, component, context, stats):
+        """
+        Returns ``component(context)``, from the cache when it has a result
+        for the same content.
+
+        Args:
+            component (type): the parser class.
+            context (ContentProvider): the input of the parser.
+            stats (dict): counts of ``hits``, ``misses`` and ``uncacheable``
+                inputs to update. Results that can't be pickled are counted
+                as misses and aren't saved.
+        """
+        if (not inspect.isclass(component) or issubclass(component, StreamParser) or
+                not hasattr(context, "content")):
+            stats["uncacheable"] += 1
+            return component(context)
+
+        entry = self._key(component, context)
+        obj = self._load(component, entry)
+        if obj is not None:
+            stats["hits"] += 1
+            return obj
+
+        stats["misses"] += 1
+        obj = component(context)
+        try:
+            self._store(entry, obj)
+        except Exception as ex:
+            log.debug("Not caching %s: %s", dr.get_name(component), ex)
+        return obj
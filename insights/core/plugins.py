@@ -38,6 +38,7 @@ from insights.core import dr
 from insights.core.context import HostContext
 from insights.core.exceptions import (CalledProcessError, ContentException, SkipComponent, TimeoutException,
                                       ValidationException)
+from insights.util.deadline import Deadline
 
 log = logging.getLogger(__name__)
 
@@ -87,18 +88,38 @@ class datasource(PluginType):
     raw = False
 
     def _handle_timeout(self, signum, frame):
-        raise TimeoutException("Datasource spec {ds_name} timed out after {secs} seconds!".format(
+        raise self._timeout_exception()
+
+    def _timeout_exception(self):
+        return TimeoutException("Datasource spec {ds_name} timed out after {secs} seconds!".format(
             ds_name=dr.get_name(self.component), secs=self.timeout))
 
     def invoke(self, broker):
         # Grab the timeout from the decorator, or use the default of 120.
-
+        # Subprocesses are stopped by a per thread deadline, so datasources can
+        # run concurrently. The alarm, which only works in the main thread, also
+        # interrupts datasources that don't start subprocesses.
+        alarm = False
+        timeout = None
         if HostContext in broker:
-            self.timeout = getattr(self, "timeout", 120)
-            signal.signal(signal.SIGALRM, self._handle_timeout)
-            signal.alarm(self.timeout)
+            self.timeout = timeout = getattr(self, "timeout", 120)
+            try:
+                signal.signal(signal.SIGALRM, self._handle_timeout)
+                signal.alarm(self.timeout)
+                alarm = True
+            except ValueError:
+                pass
         try:
-            return self.component(broker)
+            with Deadline(timeout) as deadline:
+                try:
+                    result = self.component(broker)
+                except Exception:
+                    # subprocesses stopped by the deadline fail in many ways
+                    if not deadline.expired:
+                        raise
+                if deadline.expired:
+                    raise self._timeout_exception()
+                return result
         except ContentException as ce:
             log.debug(ce)
             ce_tb = traceback.format_exc()
@@ -118,7 +139,7 @@ class datasource(PluginType):
                 broker.add_exception(reg_spec, te, te_tb)
             raise SkipComponent()
         finally:
-            if HostContext in broker:
+            if alarm:
                 signal.alarm(0)
 
 
@@ -139,19 +160,30 @@ class parser(PluginType):
         list succeeds, those parsers are passed on to dependents, even if
         others fail. If all parsers should succeed or fail together, pass
         ``continue_on_error=False``.
+
+    When the broker has a ``parser_cache``, results are read from and saved
+    to it. Pass ``cache=False`` for parsers whose results depend on more than
+    their input, see :class:`insights.core.parser_cache.ParserCache`.
     """
     def __init__(self, *args, **kwargs):
         group = kwargs.get('group', dr.GROUPS.single)
         self.continue_on_error = kwargs.get('continue_on_error', True)
+        self.cache = kwargs.get('cache', True)
         super(parser, self).__init__(*args, group=group)
 
+    def _parse(self, broker, value):
+        cache = broker.parser_cache
+        if cache is None or not self.cache:
+            return self.component(value)
+        return cache.parse(self.component, value, broker.parser_cache_stats)
+
     def invoke(self, broker):
         dep_value = broker[self.requires[0]]
         exception = False
 
         if not isinstance(dep_value, list):
             try:
-                return self.component(dep_value)
+                return self._parse(broker, dep_value)
             except ContentException as ce:
                 log.debug(ce)
                 broker.add_exception(self.component, ce, traceback.format_exc())
@@ -167,7 +199,7 @@ class parser(PluginType):
         results = []
         for d in dep_value:
             try:
-                r = self.component(d)
+                r = self._parse(broker, d)
                 if r is not None:
                     results.append(r)
             except ContentException as ce:
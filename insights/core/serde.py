@@ -9,6 +9,7 @@ to register as an observer on a :py:class:`Broker`.
 import json as ser
 import logging
 import os
+import threading
 import time
 import traceback
 
@@ -21,6 +22,13 @@ from insights.util import fs
 
 log = logging.getLogger(__name__)
 
+META_INDEX = "meta_data.index"
+"""
+Name of the optional file beneath the root of a :py:class:`Hydration` that
+holds the metadata of every dehydrated component, one ``name<TAB>document``
+line each.
+"""
+
 SERIALIZERS = {}
 DESERIALIZERS = {}
 
@@ -141,15 +149,24 @@ class Hydration(object):
     components. It puts metadata about a component's evaluation in a metadata
     file for the component and allows the serializer for a component to put raw
     data beneath a working directory.
+
+    When ``meta_index`` is ``True``, the metadata is also appended to a single
+    :py:data:`META_INDEX` file so :py:meth:`hydrate` can restore a broker with
+    one sequential read. When a ``pool`` is given, :py:meth:`hydrate` decodes
+    and unmarshals the components with it. ``hydrate(lazy=True)`` defers both
+    until a component is looked up.
     """
-    def __init__(self, root=None, ctx=None, meta_root="meta_data", data_root="data", pool=None):
+    def __init__(self, root=None, ctx=None, meta_root="meta_data", data_root="data", pool=None, meta_index=False):
         self.root = root
         self.ctx = ctx
         self.meta_root = os.path.join(root, meta_root) if root else None
         self.data_root = os.path.join(root, data_root) if root else None
+        self.meta_index = os.path.join(root, META_INDEX) if root else None
         self.ser_name = dr.get_base_module_name(ser)
         self.created = False
         self.pool = pool
+        self.write_index = meta_index
+        self._index_lock = threading.Lock()
 
     def _hydrate_one(self, doc):
         """ Returns (component, results, errors, duration) """
@@ -163,30 +180,123 @@ class Hydration(object):
         results = unmarshal(doc["results"], root=self.data_root, ctx=self.ctx, ds=key)
         return (key, results, exec_time, ser_time)
 
-    def hydrate(self, broker=None):
+    def _load(self, source):
         """
-        Loads a Broker from a previously saved one. A Broker is created if one
-        isn't provided.
+        Decodes and unmarshals the metadata of one component from a file path
+        or from a ``(name, document)`` or ``(name, offset)`` entry of the meta
+        index.
         """
+        if isinstance(source, tuple):
+            doc = source[1]
+            if isinstance(doc, int):
+                with open(self.meta_index, "rb") as f:
+                    f.seek(doc)
+                    doc = f.readline().partition(b"\t")[2].decode("utf-8")
+            doc = ser.loads(doc)
+        else:
+            with open(source) as f:
+                doc = ser.load(f)
+        return self._hydrate_one(doc)
 
-        broker = broker or dr.Broker()
-        for path in glob(os.path.join(self.meta_root, "*")):
+    def _try_load(self, source):
+        """
+        Returns the result of :py:meth:`_load` or the exception it raised.
+        """
+        try:
+            return self._load(source)
+        except Exception as ex:
+            return ex
+
+    def _apply(self, broker, res):
+        """
+        Puts a result of :py:meth:`_try_load` into the broker.
+        """
+        try:
+            if isinstance(res, Exception):
+                raise res
+            comp, results, exec_time, ser_time = res
+            if results:
+                broker[comp] = results
+                broker.exec_times[comp] = exec_time + ser_time
+        except ContentException as ex:
+            log.debug(ex)
+        except ValueError as ve:
+            log.debug(ve)
+        except Exception as ex:
+            log.warning(ex)
+
+    def _read_index(self, offsets=False):
+        """
+        Returns the ``(name, document)`` entries of the meta index, or
+        ``(name, offset)`` entries if ``offsets`` is ``True``. Returns ``None``
+        when there's no index. Later entries for a component replace earlier
+        ones.
+        """
+        if not self.meta_index or not os.path.isfile(self.meta_index):
+            return None
+        entries = {}
+        offset = 0
+        with open(self.meta_index, "rb") as f:
+            for line in f:
+                name, _, doc = line.partition(b"\t")
+                if doc:
+                    entries[name.decode("utf-8")] = offset if offsets else doc.decode("utf-8")
+                offset += len(line)
+        return list(entries.items())
+
+    def _hydrate_lazy(self, broker):
+        """
+        Registers a placeholder in the broker for every saved component
+        without reading its metadata.
+        """
+        sources = self._read_index(offsets=True)
+        if sources is None:
+            suffix = "." + self.ser_name
+            sources = []
+            for path in glob(os.path.join(self.meta_root, "*")):
+                name = os.path.basename(path)
+                sources.append((name[:-len(suffix)] if name.endswith(suffix) else name, path))
+
+        for name, source in sources:
+            comp = dr.get_component_by_name(name)
+            if comp is None:
+                log.debug("{} is not a loaded component.".format(name))
+                continue
+            source = (name, source) if isinstance(source, int) else source
             try:
-                with open(path) as f:
-                    doc = ser.load(f)
-                    res = self._hydrate_one(doc)
-                    comp, results, exec_time, ser_time = res
-                    if results:
-                        broker[comp] = results
-                        broker.exec_times[comp] = exec_time + ser_time
-            except ContentException as ex:
-                log.debug(ex)
-            except ValueError as ve:
-                log.debug(ve)
+                broker.add_lazy(comp, self._make_loader(source))
             except Exception as ex:
                 log.warning(ex)
         return broker
 
+    def _make_loader(self, source):
+        def loader(comp, broker):
+            self._apply(broker, self._try_load(source))
+        return loader
+
+    def hydrate(self, broker=None, lazy=False):
+        """
+        Loads a Broker from a previously saved one. A Broker is created if one
+        isn't provided.
+
+        If ``lazy`` is ``True``, only placeholders are registered and each
+        component is unmarshaled the first time it's looked up in the broker.
+        """
+
+        broker = broker or dr.Broker()
+        if lazy:
+            return self._hydrate_lazy(broker)
+
+        sources = self._read_index()
+        if sources is None:
+            sources = glob(os.path.join(self.meta_root, "*"))
+        load = self._try_load
+        # Only decoding and unmarshaling run in the pool, the broker is
+        # populated here in the order of the sources.
+        for res in (self.pool.map(load, sources) if self.pool else map(load, sources)):
+            self._apply(broker, res)
+        return broker
+
     def dehydrate(self, comp, broker):
         """
         Saves a component in the given broker to the file system.
@@ -231,6 +341,21 @@ class Hydration(object):
                     log.error("Could not serialize %s to %s: %r" % (name, self.ser_name, boom))
                     if path:
                         fs.remove(path)
+                else:
+                    if self.write_index:
+                        self._append_index(name, doc)
+
+    def _append_index(self, name, doc):
+        """
+        Appends the metadata of a component to the meta index as one line.
+        """
+        try:
+            line = name + "\t" + ser.dumps(doc) + "\n"
+            with self._index_lock:
+                with open(self.meta_index, "a") as f:
+                    f.write(line)
+        except Exception as boom:
+            log.error("Could not add %s to %s: %r" % (name, self.meta_index, boom))
 
     def make_persister(self, to_persist):
         """
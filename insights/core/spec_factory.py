@@ -6,10 +6,13 @@ import re
 import shlex
 import signal
 import six
+import tempfile
+import threading
 import traceback
 
-from collections import defaultdict
-from glob import glob
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from glob import iglob
 from subprocess import call
 
 from insights.cleaner import DEFAULT_OBFUSCATIONS
@@ -22,14 +25,17 @@ from insights.core.exceptions import (
     NoFilterException,
     SkipComponent,
 )
+from insights.core.file_index import MISSING
 from insights.core.plugins import component, datasource, is_datasource
 from insights.core.serde import deserializer, serializer
 from insights.util import fs, streams, which
 from insights.util.mangle import mangle_command
+from insights.util.subproc import Pipeline
 
 log = logging.getLogger(__name__)
 
 MAX_CONTENT_SIZE = 104857600 * 2  # 200 MB
+STREAM_WRITE_SIZE = 10485760  # 10 MB, larger files are cleaned and written by streaming
 SAFE_ENV = {
     "PATH": os.path.pathsep.join(
         [
@@ -52,6 +58,37 @@ PATH_ENV_OVERRIDER = "PATH=%s:$PATH" % SAFE_ENV["PATH"]
 safe_open, encoding = (open, "utf-8") if six.PY3 else (codecs.open, None)
 
 
+def _reversed_text_lines(f, start=0):
+    """
+    Yields the lines of the binary file `f` from the last one to the first
+    one, decoded the same as reading it in text mode with universal newlines.
+    """
+    for line in fs.read_lines_reversed(f, start):
+        line = line.decode("utf-8", "surrogateescape")
+        line = line[:-1] if line.endswith("\r") else line
+        for l in reversed(line.split("\r")):
+            yield l
+
+
+def _reversed_output_lines(f):
+    """
+    Yields the lines of the command output saved in the binary file `f` from
+    the last one to the first one, decoded and split the same as
+    :meth:`insights.core.context.ExecutionContext.shell_out`.
+    """
+    for line in fs.read_lines_reversed(f):
+        for l in reversed(line.decode("utf-8", "ignore").splitlines() or [""]):
+            yield l
+
+
+def _drop_last(lines):
+    prev = None
+    for idx, line in enumerate(lines):
+        if idx:
+            yield prev
+        prev = line
+
+
 class ContentProvider(object):
     def __init__(self):
         self.cmd = None
@@ -80,42 +117,93 @@ class ContentProvider(object):
     def _stream(self):
         raise NotImplementedError()
 
+    def _clean_args(self):
+        """
+        Returns the keyword arguments to clean the content with the Cleaner,
+        or None when the content doesn't need to be cleaned.
+        """
+        if not (isinstance(self.ctx, HostContext) and self.ds and self.cleaner):
+            return None
+        cleans = []
+        # Redacting?
+        no_red = getattr(self.ds, 'no_redact', False)
+        cleans.append("Redact") if not no_red else None
+        # Obfuscating?
+        no_obf = getattr(self.ds, 'no_obfuscate', [])
+        cleans.append("Obfuscate") if set(no_obf) != DEFAULT_OBFUSCATIONS else None
+        # Filtering?
+        allowlist = None
+        if self._filterable:
+            cleans.append("Filter")
+            allowlist = self._filters
+        # Cleaning - Entry
+        if cleans:
+            log.debug("Cleaning (%s) %s", "/".join(cleans), self.relative_path)
+            return dict(
+                no_obfuscate=no_obf,
+                allowlist=allowlist,
+                no_redact=no_red,
+                width=self.relative_path.endswith("netstat_-neopa"),
+            )
+        log.debug("Skipping cleaning %s", self.relative_path)
+
     def _clean_content(self):
         """
         Clean (Redact, Filter, and Obfuscate) the Spec Content ONLY when
         collecting data.
         """
         content = self.content  # load first for debugging info order
-        if content and isinstance(self.ctx, HostContext) and self.ds and self.cleaner:
-            cleans = []
-            # Redacting?
-            no_red = getattr(self.ds, 'no_redact', False)
-            cleans.append("Redact") if not no_red else None
-            # Obfuscating?
-            no_obf = getattr(self.ds, 'no_obfuscate', [])
-            cleans.append("Obfuscate") if set(no_obf) != DEFAULT_OBFUSCATIONS else None
-            # Filtering?
-            allowlist = None
-            if self._filterable:
-                cleans.append("Filter")
-                allowlist = self._filters
-            # Cleaning - Entry
-            if cleans:
-                log.debug("Cleaning (%s) %s", "/".join(cleans), self.relative_path)
-                content = self.cleaner.clean_content(
-                    content,
-                    no_obfuscate=no_obf,
-                    allowlist=allowlist,
-                    no_redact=no_red,
-                    width=self.relative_path.endswith("netstat_-neopa"),
-                )
+        if content:
+            clean_args = self._clean_args()
+            if clean_args:
+                content = self.cleaner.clean_content(content, **clean_args)
                 if len(content) == 0:
                     log.debug("Skipping %s due to empty after cleaning", self.path)
                     raise ContentException("Empty after cleaning: %s" % self.path)
-            else:
-                log.debug("Skipping cleaning %s", self.relative_path)
         return content
 
+    def _reversed_lines(self):
+        """
+        Returns a context manager which yields the lines of the content from
+        the last one to the first one without loading them, or None when the
+        content should be loaded to be written.
+        """
+        return None
+
+    def _write_stream(self, lines, dst):
+        """
+        Clean and write the `lines`, which come from the last one to the first
+        one, with bounded memory.  The cleaned lines are spooled to a temporary
+        file, and then written to `dst` in the original order.
+        """
+        read = [0]
+
+        def _count(lines):
+            for line in lines:
+                read[0] += 1
+                yield line
+
+        clean_args = self._clean_args()
+        lines = _count(lines)
+        if clean_args:
+            lines = self.cleaner.clean_lines(lines, **clean_args)
+        with tempfile.TemporaryFile() as spool:
+            not_blank = False
+            for line in lines:
+                not_blank = not_blank or bool(line)
+                spool.write(line.encode("utf-8", "surrogateescape") + b"\n")
+            if read[0] == 0:
+                log.debug("File is empty (after filtering): %s", self.path)
+                raise ContentException("Empty (after filtering): %s" % self.path)
+            if clean_args and not not_blank:
+                log.debug("Skipping %s due to empty after cleaning", self.path)
+                raise ContentException("Empty after cleaning: %s" % self.path)
+            with open(dst, "wb") as f:
+                sep = b""
+                for line in fs.read_lines_reversed(spool):
+                    f.write(sep + line.decode("utf-8", "surrogateescape").encode("utf-8"))
+                    sep = b"\n"
+
     @property
     def path(self):
         return os.path.join(self.root, self.relative_path)
@@ -143,10 +231,16 @@ class ContentProvider(object):
     def write(self, dst):
         fs.ensure_path(os.path.dirname(dst))
         # Clean Spec Content when writing it down to disk before uploading
-        content = "\n".join(self._clean_content())
-        content = content.encode("utf-8") if six.PY3 else content
-        with open(dst, "wb") as f:
-            f.write(content)
+        reversed_lines = self._reversed_lines()
+        if reversed_lines is not None:
+            # Extra-large content, don't load it in memory
+            with reversed_lines as lines:
+                self._write_stream(lines, dst)
+        else:
+            content = "\n".join(self._clean_content())
+            content = content.encode("utf-8") if six.PY3 else content
+            with open(dst, "wb") as f:
+                f.write(content)
 
         self.loaded = False
 
@@ -196,8 +290,20 @@ class DatasourceProvider(ContentProvider):
         return self.content
 
 
+def _filter_info(ds):
+    """
+    Returns whether the datasource ``ds`` is filterable and its filters.
+    """
+    if not ds:
+        return False, dict()
+    filterable = any(s.filterable for s in dr.get_registry_points(ds)) if filters.ENABLED else False
+    return filterable, filters.get_filters(ds, True)
+
+
 class FileProvider(ContentProvider):
-    def __init__(self, relative_path, root="/", save_as=None, ds=None, ctx=None, cleaner=None):
+    def __init__(
+        self, relative_path, root="/", save_as=None, ds=None, ctx=None, cleaner=None, filter_info=None
+    ):
         super(FileProvider, self).__init__()
         self.ds = ds
         self.ctx = ctx
@@ -206,12 +312,8 @@ class FileProvider(ContentProvider):
         self.relative_path = relative_path.lstrip("/")
         self.save_as = save_as
         self.file_name = os.path.basename(self.path)
-        self._filterable = (
-            any(s.filterable for s in dr.get_registry_points(self.ds))
-            if self.ds and filters.ENABLED
-            else False
-        )
-        self._filters = filters.get_filters(self.ds, True) if self.ds else dict()
+        # datasources creating many providers look the filters up only once
+        self._filterable, self._filters = filter_info or _filter_info(self.ds)
 
         self.validate()
 
@@ -227,12 +329,16 @@ class FileProvider(ContentProvider):
         return resolved.startswith(resolved_root)
 
     def validate(self):
-        if not self._is_inside_root():
+        # The file index of archives only resolves paths that are inside the
+        # root and don't go through links, so they need no filesystem checks.
+        index = getattr(self.ctx, "file_index", None)
+        kind = index.kind(self.path) if index is not None else None
+        if kind is None and not self._is_inside_root():
             msg = "Relative path points outside the root: %s"
             raise ValueError(msg % (self.path))
 
         # 1. No Such File
-        if not os.path.exists(self.path):
+        if kind == MISSING or (kind is None and not os.path.exists(self.path)):
             raise ContentException("%s does not exist." % self.path)
         # 2. Check only when collecting
         if isinstance(self.ctx, HostContext):
@@ -268,7 +374,7 @@ class RawFileProvider(FileProvider):
 
     def write(self, dst):
         fs.ensure_path(os.path.dirname(dst))
-        call([which("cp", env=SAFE_ENV), self.path, dst], env=SAFE_ENV)
+        call([COMMAND_CACHE.which("cp", env=SAFE_ENV), self.path, dst], env=SAFE_ENV)
 
 
 class TextFileProvider(FileProvider):
@@ -311,6 +417,41 @@ class TextFileProvider(FileProvider):
                 content = AllowFilter.filter_content(content, self._filters)
             return content
 
+    def _reversed_lines(self):
+        if (
+            six.PY3
+            and self._content is None
+            and not self._exception
+            and isinstance(self.ctx, HostContext)
+            and os.path.getsize(self.path) > STREAM_WRITE_SIZE
+        ):
+            return self._read_reversed()
+
+    @contextmanager
+    def _read_reversed(self):
+        """
+        Yields the lines from the last one to the first one, the same as
+        :meth:`load` but reversed and without loading them.
+        """
+        self.loaded = True
+        args = self.create_args()
+        if args:
+            with tempfile.TemporaryFile() as spool:
+                pipeline = Pipeline(*args, timeout=self.ctx.timeout, env=SAFE_ENV)
+                self.rc = pipeline.write(spool, keep_rc=True)
+                yield _reversed_output_lines(spool)
+            return
+
+        fsize = os.stat(self.path).st_size
+        with open(self.path, "rb") as f:
+            if fsize > MAX_CONTENT_SIZE:
+                # read the last ``MAX_CONTENT_SIZE`` MB only
+                log.debug("Extra-huge file is truncated %s", self.relative_path)
+                # discard the first line which is broken
+                yield _drop_last(_reversed_text_lines(f, fsize - MAX_CONTENT_SIZE))
+            else:
+                yield _reversed_text_lines(f)
+
     def _stream(self):
         """
         Returns a generator of lines instead of a list of lines.
@@ -345,6 +486,73 @@ class SerializedRawOutputProvider(RawFileProvider):
     pass
 
 
+class CommandCache(object):
+    """
+    Caches the ``shlex.split`` of command strings and the ``which`` lookup of
+    executables, so the providers of a collection don't parse the same command
+    or search the ``PATH`` again for every instance.
+
+    Lookups are keyed by the executable and the ``PATH`` of the environment.
+    The cache is shared by all command providers through :data:`COMMAND_CACHE`
+    and is cleared at the start of every collection. Each map keeps at most
+    ``max_size`` entries, the least recently used ones are dropped, so the
+    commands of ``foreach_execute`` specs don't grow it without bound.
+
+    Attributes:
+        hits (int): number of lookups answered from the cache.
+        misses (int): number of lookups that had to be computed.
+    """
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._split = OrderedDict()
+        self._which = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, cache, key, func, *args):
+        with self._lock:
+            if key in cache:
+                value = cache[key] = cache.pop(key)
+                self.hits += 1
+                return value
+        value = func(*args)
+        with self._lock:
+            cache[key] = value
+            self.misses += 1
+            while len(cache) > self.max_size:
+                cache.popitem(last=False)
+        return value
+
+    def split(self, cmd):
+        """
+        Returns a new list with the ``shlex.split`` of ``cmd``.
+        """
+        return list(self._get(self._split, cmd, shlex.split, cmd))
+
+    def which(self, cmd, env=None):
+        """
+        Returns the same as :func:`insights.util.which`.
+        """
+        path = (env or os.environ).get("PATH")
+        return self._get(self._which, (cmd, path), which, cmd, env)
+
+    def clear(self):
+        """
+        Drops the cached results and resets the counters.
+        """
+        with self._lock:
+            self._split.clear()
+            self._which.clear()
+            self.hits = self.misses = 0
+
+
+COMMAND_CACHE = CommandCache()
+"""
+The :class:`CommandCache` shared by the providers of a collection.
+"""
+
+
 class CommandOutputProvider(ContentProvider):
     """
     Class used in datasources to return output from commands.
@@ -400,8 +608,8 @@ class CommandOutputProvider(ContentProvider):
 
     def validate(self):
         # 1. No Such Command
-        cmd = shlex.split(self.cmd)[0]
-        if not which(cmd, env=self._env):
+        cmd = COMMAND_CACHE.split(self.cmd)[0]
+        if not COMMAND_CACHE.which(cmd, env=self._env):
             raise ContentException("Command not found: %s" % cmd)
         # 2. Check only when collecting
         if isinstance(self.ctx, HostContext):
@@ -414,7 +622,7 @@ class CommandOutputProvider(ContentProvider):
                 raise BlacklistedSpec()
 
     def create_args(self):
-        command = [shlex.split(self.cmd)]
+        command = [COMMAND_CACHE.split(self.cmd)]
 
         if self.split and self._filters:
             log.debug("Pre-filtering  %s", self.relative_path)
@@ -708,6 +916,24 @@ def _get_context(context, broker):
     return broker.get(context)
 
 
+def _glob(ctx, pattern):
+    index = getattr(ctx, "file_index", None)
+    paths = index.glob(pattern) if index is not None else None
+    return iglob(pattern) if paths is None else paths
+
+
+def _isdir(ctx, path):
+    index = getattr(ctx, "file_index", None)
+    isdir = index.isdir(path) if index is not None else None
+    return os.path.isdir(path) if isdir is None else isdir
+
+
+def _listdir(ctx, path):
+    index = getattr(ctx, "file_index", None)
+    names = index.listdir(path) if index is not None else None
+    return os.listdir(path) if names is None else names
+
+
 class simple_file(object):
     """
     Creates a datasource that reads the file at path when evaluated.
@@ -767,7 +993,8 @@ class glob_file(object):
         context (ExecutionContext): the context under which the datasource
             should run.
         kind (FileProvider): One of TextFileProvider or RawFileProvider.
-        max_files (int): Maximum number of glob files to process.
+        max_files (int): Maximum number of glob files to process. The
+            datasource fails as soon as more files match.
 
     Returns:
         function: A datasource that reads all files matching the glob patterns.
@@ -802,35 +1029,43 @@ class glob_file(object):
         cleaner = broker.get('cleaner')
         ctx = _get_context(self.context, broker)
         root = ctx.root
-        results = []
+        # Match all the patterns before creating any provider, so that too
+        # many matches are rejected without reading any of them.
+        matches = []
         for pattern in self.patterns:
             pattern = ctx.locate_path(pattern)
-            for path in sorted(glob(os.path.join(root, pattern.lstrip('/')))):
-                if self.ignore_func(path) or os.path.isdir(path):
+            paths = []
+            for path in _glob(ctx, os.path.join(root, pattern.lstrip('/'))):
+                if self.ignore_func(path) or _isdir(ctx, path):
                     continue
-                try:
-                    results.append(
-                        self.kind(
-                            path[len(root) :],
-                            root=root,
-                            save_as=self.save_as,
-                            ds=self,
-                            ctx=ctx,
-                            cleaner=cleaner,
-                        )
+                paths.append(path)
+                if len(matches) + len(paths) > self.max_files:
+                    raise ContentException(
+                        "Number of files matched is over the {0} file limit, please refine "
+                        "the specs file pattern to narrow down results".format(self.max_files)
                     )
-                except NoFilterException as nfe:
-                    raise nfe
-                except Exception:
-                    log.debug(traceback.format_exc())
-        if results:
-            if len(results) > self.max_files:
-                raise ContentException(
-                    "Number of files returned [{0}] is over the {1} file limit, please refine "
-                    "the specs file pattern to narrow down results".format(
-                        len(results), self.max_files
+            matches.extend(sorted(paths))
+
+        filter_info = _filter_info(self)
+        results = []
+        for path in matches:
+            try:
+                results.append(
+                    self.kind(
+                        path[len(root) :],
+                        root=root,
+                        save_as=self.save_as,
+                        ds=self,
+                        ctx=ctx,
+                        cleaner=cleaner,
+                        filter_info=filter_info,
                     )
                 )
+            except NoFilterException as nfe:
+                raise nfe
+            except Exception:
+                log.debug(traceback.format_exc())
+        if results:
             return results
         raise ContentException("[%s] didn't match." % ', '.join(self.patterns))
 
@@ -938,7 +1173,7 @@ class listdir(object):
         p = os.path.join(ctx.root, self.path.lstrip('/'))
         p = ctx.locate_path(p)
         try:
-            result = os.listdir(p)
+            result = _listdir(ctx, p)
         except OSError as e:
             raise ContentException(str(e))
         return sorted([r for r in result if not self.ignore_func(r)])
@@ -963,7 +1198,7 @@ class listglob(listdir):
         ctx = _get_context(self.context, broker)
         p = os.path.join(ctx.root, self.path.lstrip('/'))
         p = ctx.locate_path(p)
-        result = glob(p)
+        result = _glob(ctx, p)
         # generator expression; we don't need the full list at this step
         result = (os.path.relpath(r, start=ctx.root) for r in result)
         result = sorted([r for r in result if not self.ignore_func(r)])
@@ -1304,10 +1539,11 @@ class foreach_collect(object):
             source = source.content
         if not isinstance(source, (list, set)):
             source = [source]
+        filter_info = _filter_info(self)
         for e in source:
             pattern = ctx.locate_path(self.path % e)
-            for p in glob(os.path.join(root, pattern.lstrip('/'))):
-                if self.ignore_func(p) or os.path.isdir(p):
+            for p in _glob(ctx, os.path.join(root, pattern.lstrip('/'))):
+                if self.ignore_func(p) or _isdir(ctx, p):
                     continue
                 try:
                     result.append(
@@ -1318,6 +1554,7 @@ class foreach_collect(object):
                             ds=self,
                             ctx=ctx,
                             cleaner=cleaner,
+                            filter_info=filter_info,
                         )
                     )
                 except NoFilterException as nfe:
@@ -1598,6 +1835,35 @@ class find(object):
         return dict(results)
 
 
+def archive_patterns(graph):
+    """
+    Returns the glob patterns, relative to the root of an archive, of the
+    paths the file datasources in ``graph`` can read. They're used to build
+    a :class:`insights.core.archives.MemberFilter`.
+
+    Returns:
+        list: the patterns, or None when a datasource in ``graph`` reads
+            files from an archive context on its own, so every path is needed.
+    """
+    patterns = set()
+    for c in graph:
+        if isinstance(c, (simple_file, listglob)):
+            patterns.add(c.path)
+        elif isinstance(c, listdir):
+            patterns.add(os.path.join(c.path, "*"))
+        elif isinstance(c, first_file):
+            patterns.update(c.paths)
+        elif isinstance(c, glob_file):
+            patterns.update(c.patterns)
+        elif isinstance(c, foreach_collect):
+            patterns.add(c.path.replace("%s", "*"))
+        elif is_datasource(c) and not isinstance(c, (RegistryPoint, head, first_of)):
+            for dep in dr.get_dependencies(c):
+                if isinstance(dep, type) and issubclass(dep, ExecutionContext) and dep is not HostContext:
+                    return None
+    return sorted(p.lstrip("/") for p in patterns)
+
+
 @serializer(CommandOutputProvider)
 def serialize_command_output(obj, root):
     rel = os.path.join("insights_commands", obj.relative_path)
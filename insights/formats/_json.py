@@ -4,6 +4,16 @@ import sys
 from insights.core import dr
 from insights.core.evaluators import SingleEvaluator as Evaluator, get_simple_module_name
 from insights.formats import EvaluatorFormatterAdapter, get_response_of_types, render
+from insights.parsers import ColumnarTable, TableRow
+
+
+def _default(obj):
+    # Rows of a ColumnarTable that rules put in their responses
+    if isinstance(obj, TableRow):
+        return obj.copy()
+    if isinstance(obj, ColumnarTable):
+        return [row.copy() for row in obj]
+    raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
 
 
 class JsonFormat(Evaluator):
@@ -42,7 +52,7 @@ class JsonFormat(Evaluator):
 
     def postprocess(self):
         response = get_response_of_types(self.get_response(), self.missing, self.show_rules)
-        json.dump(response, self.stream)
+        json.dump(response, self.stream, default=_default)
 
 
 class JsonFormatterAdapter(EvaluatorFormatterAdapter):
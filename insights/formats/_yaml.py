@@ -5,8 +5,11 @@ from insights.core.evaluators import SingleEvaluator
 from insights.formats import EvaluatorFormatterAdapter, get_response_of_types
 from yaml.representer import Representer
 from insights.core import ScanMeta
+from insights.parsers import ColumnarTable, TableRow
 
 Representer.add_representer(ScanMeta, Representer.represent_name)
+Representer.add_representer(TableRow, lambda r, row: r.represent_dict(row.copy()))
+Representer.add_representer(ColumnarTable, lambda r, table: r.represent_list([row.copy() for row in table]))
 
 
 class YamlFormat(SingleEvaluator):
@@ -1,7 +1,16 @@
 import pkgutil
+import re
+import six
 
+from array import array
+from bisect import bisect_left
 from collections import OrderedDict
 
+try:
+    from six.moves import collections_abc
+except ImportError:  # pragma: no cover
+    import collections as collections_abc
+
 from insights.core.exceptions import ParseException, SkipComponent  # noqa: F401
 
 
@@ -492,6 +501,357 @@ def parse_delimited_table(
     return r
 
 
+# Allows us to transform the key and do lookups like __contains and
+# __startswith
+_MATCHERS = {
+    'equals': lambda s, v: s == v,
+    'contains': lambda s, v: s is not None and v in s,
+    'startswith': lambda s, v: s is not None and s.startswith(v),
+    'endswith': lambda s, v: s is not None and s.endswith(v),
+    'lower_value': lambda s, v: None not in (s, v) and s.lower() == v.lower(),
+}
+
+
+def _key_match(row, data_key, matcher, matcher_fn, value):
+    if matcher == 'equals':
+        return data_key in row and row[data_key] == value
+    return data_key in row and matcher_fn(row[data_key], value)
+
+
+class _RowIndexes(object):
+    """
+    The indexes :func:`keyword_search` uses to search a table of rows. See
+    :class:`KeywordSearchTable`.
+    """
+    min_index_rows = 64
+    """int: tables with fewer rows are always searched row by row."""
+
+    def _index(self, matcher, data_key):
+        if len(self) != self._indexed_len:
+            self._indexes = {}
+            self._indexed_len = len(self)
+        key = (matcher, data_key)
+        if key not in self._indexes:
+            self._indexes[key] = self._build_index(matcher, data_key)
+        return self._indexes[key]
+
+    def _key_values(self, data_key):
+        """
+        Yields the position and value of each row that has ``data_key``.
+        """
+        for pos, row in enumerate(self):
+            if data_key in row:
+                yield pos, row[data_key]
+
+    def _build_index(self, matcher, data_key):
+        values = []
+        for pos, value in self._key_values(data_key):
+            if value is None:
+                continue
+            if not isinstance(value, six.string_types):
+                return None
+            values.append((value, pos))
+        if matcher == 'equals':
+            index = {}
+            for value, pos in values:
+                index.setdefault(value, []).append(pos)
+            return index
+        values.sort()
+        return [v for v, _ in values], [p for _, p in values]
+
+    def _candidates(self, data_key, matcher, value):
+        """
+        Returns the sorted positions of the rows that can match the term, or
+        ``None`` when there's no index for it.
+        """
+        if matcher not in ('equals', 'startswith') or not isinstance(value, six.string_types):
+            return None
+        index = self._index(matcher, data_key)
+        if index is None:
+            return None
+        if matcher == 'equals':
+            return index.get(value, [])
+        values, positions = index
+        lo = hi = bisect_left(values, value)
+        while hi < len(values) and values[hi].startswith(value):
+            hi += 1
+        return sorted(positions[lo:hi])
+
+    def _search(self, search_terms):
+        best = None
+        if len(self) >= self.min_index_rows:
+            for data_key, matcher, _, value in search_terms:
+                candidates = self._candidates(data_key, matcher, value)
+                if candidates is not None and (best is None or len(candidates) < len(best)):
+                    best = candidates
+                    if not best:
+                        return []
+        rows = self if best is None else (self[pos] for pos in best)
+        return [row for row in rows if all(_key_match(row, *term) for term in search_terms)]
+
+
+class KeywordSearchTable(_RowIndexes, list):
+    """
+    A list of rows that :func:`keyword_search` searches with indexes. Parsers
+    can store their rows in it instead of a plain list to make repeated
+    searches of large tables fast, the results are exactly the same.
+
+    The first search of a key for an exact value or with ``__startswith``
+    builds a hash or a sorted index of the key's values, which is kept for
+    the next searches. Of the indexes that apply to a search, the one with
+    the fewest candidate rows is used, and the candidates are then checked
+    against all the keywords. Keys with values other than strings or
+    ``None``, and the other suffixes, are checked row by row.
+
+    The indexes are rebuilt when rows are added or removed, rows themselves
+    shouldn't be changed once the table has been searched.
+
+    Examples:
+        >>> rows = KeywordSearchTable([
+        ...     {'domain': 'oracle', 'type': 'soft', 'item': 'nofile', 'value': 1024},
+        ...     {'domain': 'root', 'type': 'soft', 'item': 'nproc', 'value': -1}])
+        >>> keyword_search(rows, domain='root', item__startswith='np')
+        [{'domain': 'root', 'type': 'soft', 'item': 'nproc', 'value': -1}]
+    """
+
+    def __init__(self, *args):
+        super(KeywordSearchTable, self).__init__(*args)
+        self._indexes = {}
+        self._indexed_len = len(self)
+
+
+class _Missing(object):
+    """The value of a column in the rows that don't have it."""
+    def __reduce__(self):
+        return '_MISSING'
+
+    def __repr__(self):
+        return '_MISSING'
+
+
+_MISSING = _Missing()
+_INT_EMPTY = -1
+_INT_MISSING = -2
+_INT_MAX = 2 ** (8 * array('l').itemsize - 1) - 1
+_INT_RE = re.compile(r'(0|[1-9][0-9]*)\Z')
+
+
+def _encode_int(value):
+    """
+    Returns ``value`` as an item of an integer column, or ``None`` when it
+    can't be stored in one.
+    """
+    if value is _MISSING:
+        return _INT_MISSING
+    if not isinstance(value, six.string_types):
+        return None
+    if not value:
+        return _INT_EMPTY
+    if _INT_RE.match(value):
+        number = int(value)
+        if number <= _INT_MAX:
+            return number
+    return None
+
+
+def _decode_int(number):
+    if number == _INT_EMPTY:
+        return ''
+    if number == _INT_MISSING:
+        return _MISSING
+    return str(number)
+
+
+class TableRow(collections_abc.MutableMapping):
+    """
+    A row of a :class:`ColumnarTable`. It's a view of the table that behaves
+    like a ``dict`` of the row's column names and values: it compares equal
+    to a ``dict`` with the same items, and changes to it are made in the
+    table. :meth:`copy` returns a ``dict``.
+    """
+    __slots__ = ('_table', '_pos')
+
+    def __init__(self, table, pos):
+        self._table = table
+        self._pos = pos
+
+    def __getitem__(self, key):
+        value = self._table._get(self._pos, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._table._set(self._pos, key, value)
+
+    def __delitem__(self, key):
+        if self._table._get(self._pos, key) is _MISSING:
+            raise KeyError(key)
+        self._table._set(self._pos, key, _MISSING)
+
+    def __contains__(self, key):
+        return self._table._get(self._pos, key) is not _MISSING
+
+    def __iter__(self):
+        table, pos = self._table, self._pos
+        return (name for name in list(table._names) if table._get(pos, name) is not _MISSING)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(self.copy())
+
+    def copy(self):
+        """
+        Returns the row as a ``dict``.
+        """
+        return dict((name, self[name]) for name in self)
+
+
+class ColumnarTable(_RowIndexes):
+    """
+    A table of rows stored one column at a time, for the parsers of commands
+    with very long outputs such as ``lsof`` and ``ps``. The table is a
+    sequence of :class:`TableRow` views that behave like the ``dict`` rows of
+    a :class:`KeywordSearchTable`, and is searched with the same indexes by
+    :func:`keyword_search`, which returns the rows found as ``dict`` copies.
+    Rows don't need to have the same keys.
+
+    Columns whose values are all decimal numbers without leading zeros or
+    empty strings are stored in an ``array('l')``, and are read back as the
+    same strings. Other columns are lists in which equal values share one
+    string object, as long as the column has few distinct values.
+
+    Examples:
+        >>> rows = ColumnarTable([
+        ...     {'COMMAND': 'systemd', 'PID': '1', 'USER': 'root'},
+        ...     {'COMMAND': 'bash', 'PID': '42', 'USER': 'root'}])
+        >>> rows[1]
+        {'COMMAND': 'bash', 'PID': '42', 'USER': 'root'}
+        >>> keyword_search(rows, COMMAND='systemd') == [{'COMMAND': 'systemd', 'PID': '1', 'USER': 'root'}]
+        True
+    """
+    max_shared_values = 1024
+    """int: the distinct values of a column that are always shared."""
+
+    def __init__(self, rows=()):
+        self._names = []
+        self._columns = {}
+        self._shared = {}
+        self._len = 0
+        self._indexes = {}
+        self._indexed_len = 0
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [TableRow(self, p) for p in range(*pos.indices(self._len))]
+        if pos < 0:
+            pos += self._len
+        if not 0 <= pos < self._len:
+            raise IndexError("table index out of range")
+        return TableRow(self, pos)
+
+    def __iter__(self):
+        for pos in range(self._len):
+            yield TableRow(self, pos)
+
+    def __eq__(self, other):
+        if isinstance(other, (ColumnarTable, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def append(self, row):
+        """
+        Adds a row, from a ``dict`` of column names and values, at the end of
+        the table.
+        """
+        for name in row:
+            if name not in self._columns:
+                self._add_column(name)
+        for name in self._names:
+            column = self._columns[name]
+            if isinstance(column, array):
+                column.append(_INT_MISSING)
+            else:
+                column.append(_MISSING)
+        self._len += 1
+        pos = self._len - 1
+        for name, value in row.items():
+            self._set(pos, name, value)
+
+    def extend(self, rows):
+        """
+        Adds the rows at the end of the table.
+        """
+        for row in rows:
+            self.append(row)
+
+    def _add_column(self, name):
+        self._names.append(name)
+        self._columns[name] = array('l', [_INT_MISSING]) * self._len
+
+    def _get(self, pos, name):
+        column = self._columns.get(name)
+        if column is None:
+            return _MISSING
+        if isinstance(column, array):
+            return _decode_int(column[pos])
+        return column[pos]
+
+    def _set(self, pos, name, value):
+        if self._indexes:
+            self._indexes = {}
+        if name not in self._columns:
+            if value is _MISSING:
+                return
+            self._add_column(name)
+        column = self._columns[name]
+        if isinstance(column, array):
+            number = _encode_int(value)
+            if number is not None:
+                column[pos] = number
+                return
+            column = self._columns[name] = [_decode_int(n) for n in column]
+            self._shared[name] = {}
+        shared = self._shared.get(name)
+        if shared is not None and isinstance(value, six.string_types):
+            value = shared.setdefault(value, value)
+            if len(shared) > self.max_shared_values and len(shared) * 2 > self._len:
+                # mostly distinct values, sharing them only costs memory
+                self._shared[name] = None
+        column[pos] = value
+
+    def _search(self, search_terms):
+        # The rows found are given to rules, which can keep them in their
+        # responses, so they are returned as dicts rather than views.
+        return [row.copy() for row in super(ColumnarTable, self)._search(search_terms)]
+
+    def _key_values(self, data_key):
+        column = self._columns.get(data_key)
+        if column is None:
+            return
+        for pos, value in enumerate(column):
+            if isinstance(column, array):
+                value = _decode_int(value)
+            if value is not _MISSING:
+                yield pos, value
+
+
 def keyword_search(rows, parent=None, row_keys_change=False, **kwargs):
     """
     Takes a list of dictionaries and finds all the dictionaries where the
@@ -558,16 +918,6 @@ def keyword_search(rows, parent=None, row_keys_change=False, **kwargs):
     if not rows:
         return []
 
-    # Allows us to transform the key and do lookups like __contains and
-    # __startswith
-    matchers = {
-        'equals': lambda s, v: s == v,
-        'contains': lambda s, v: s is not None and v in s,
-        'startswith': lambda s, v: s is not None and s.startswith(v),
-        'endswith': lambda s, v: s is not None and s.endswith(v),
-        'lower_value': lambda s, v: None not in (s, v) and s.lower() == v.lower(),
-    }
-
     txform_cache_attr = '_transform_cache'
     if parent is None and hasattr(rows, '__dict__'):
         parent = rows
@@ -611,7 +961,7 @@ def keyword_search(rows, parent=None, row_keys_change=False, **kwargs):
             matcher = 'equals'
         else:
             data_key, _, matcher = search_keyword.partition('__')
-            if matcher not in matchers:
+            if matcher not in _MATCHERS:
                 # put key back the way we found it, matcher fn unchanged
                 data_key = search_keyword
                 matcher = 'equals'
@@ -622,15 +972,13 @@ def keyword_search(rows, parent=None, row_keys_change=False, **kwargs):
         # a coding error.
         if data_key not in txkeys:
             return []
-        search_terms.append((txkeys[data_key], matcher, matchers[matcher], value))
+        search_terms.append((txkeys[data_key], matcher, _MATCHERS[matcher], value))
 
-    def key_match(row, data_key, matcher, matcher_fn, value):
-        if matcher == 'equals':
-            return data_key in row and row[data_key] == value
-        return data_key in row and matcher_fn(row[data_key], value)
+    if isinstance(rows, _RowIndexes):
+        return rows._search(search_terms)
 
     data = list()
     for row in rows:
-        if all(key_match(row, *term) for term in search_terms):
+        if all(_key_match(row, *term) for term in search_terms):
             data.append(row)
     return data
@@ -79,7 +79,7 @@ class DocParser(object):
 
     def __call__(self, content):
         try:
-            return self.Top(content)
+            return self.Top(content, text=True)
         except Exception:
             raise ParseException("There was an exception when parsing one of the httpd config files.")
 
@@ -19,7 +19,7 @@ from insights.core.exceptions import SkipComponent
 from insights.specs import Specs
 from insights.util import deprecated
 from insights.util import rsplit
-from insights.util.rpm_vercmp import rpm_version_compare
+from insights.util.rpm_vercmp import version_key
 
 
 # This list of architectures is taken from PDC (Product Definition Center):
@@ -88,7 +88,9 @@ here https://pdc.fedoraproject.org/rest_api/v1/arches/.
 class RpmList(object):
     """
     Mixin class providing ``__contains__``, ``get_max``, ``get_min``,
-    ``newest``, and ``oldest`` implementations for components that handle rpms.
+    ``newest``, and ``oldest`` implementations for components that handle rpms,
+    along with bulk comparisons and lookups by architecture, vendor and
+    signature.
     """
 
     def __contains__(self, package_name):
@@ -124,7 +126,7 @@ class RpmList(object):
         if package_name not in self.packages:
             return None
         else:
-            return max(self.packages[package_name])
+            return max(self.packages[package_name], key=InstalledRpm.sort_key)
 
     def get_min(self, package_name):
         """
@@ -139,12 +141,116 @@ class RpmList(object):
         if package_name not in self.packages:
             return None
         else:
-            return min(self.packages[package_name])
+            return min(self.packages[package_name], key=InstalledRpm.sort_key)
 
     # re-export get_max/min with more descriptive names
     newest = get_max
     oldest = get_min
 
+    def compare_many(self, packages):
+        """
+        Compares the highest installed version of each package name with the
+        given versions in one pass. It's the same as comparing
+        ``self.get_max(ref.name)`` with every ``ref``, but the highest version
+        of each name is looked up once.
+
+        Args:
+            packages (list): package strings such as ``'bash-4.2.46-34.el7'``
+                or :class:`InstalledRpm` objects.
+
+        Returns:
+            list: for every item of ``packages``, -1, 0 or 1 when the highest
+            installed version is lower, equal or higher, or ``None`` when the
+            package isn't installed.
+        """
+        parsed = {}
+        newest = {}
+        verdicts = []
+        for package in packages:
+            ref = package
+            if not isinstance(ref, InstalledRpm):
+                ref = parsed.get(package)
+                if ref is None:
+                    ref = parsed[package] = InstalledRpm.from_package(package)
+            if ref.name not in newest:
+                rpm = self.get_max(ref.name)
+                newest[ref.name] = rpm.sort_key() if rpm is not None else None
+            installed = newest[ref.name]
+            if installed is None:
+                verdicts.append(None)
+            else:
+                fixed = ref.sort_key()
+                verdicts.append((installed > fixed) - (installed < fixed))
+        return verdicts
+
+    def vulnerable(self, fixed):
+        """
+        Returns the items of ``fixed`` for which the highest installed version
+        of the package is lower, i.e. the packages that are installed but not
+        updated to the version with the fix.
+
+        Args:
+            fixed (list): package strings or :class:`InstalledRpm` objects of
+                the first fixed versions.
+
+        Returns:
+            list: the items of ``fixed`` that aren't satisfied.
+        """
+        return [f for f, v in zip(fixed, self.compare_many(fixed)) if v == -1]
+
+    def _index(self):
+        # built once per packages dict
+        cached = self.__dict__.get('_rpm_index')
+        if cached is None or cached[0] is not self.packages:
+            by_arch, by_vendor, by_signed = defaultdict(list), defaultdict(list), defaultdict(list)
+            for rpms in self.packages.values():
+                for rpm in rpms:
+                    by_arch[(rpm.name, getattr(rpm, 'arch', None))].append(rpm)
+                    by_vendor[getattr(rpm, 'vendor', None)].append(rpm)
+                    by_signed[getattr(rpm, 'redhat_signed', None)].append(rpm)
+            cached = self._rpm_index = (self.packages, dict(by_arch), dict(by_vendor), dict(by_signed))
+        return cached
+
+    def get_by_arch(self, package_name, arch):
+        """
+        Returns the installed packages with the given name and architecture.
+
+        Args:
+            package_name (str): RPM package name such as 'glibc'
+            arch (str): architecture such as 'x86_64'
+
+        Returns:
+            list: the :class:`InstalledRpm` objects, empty when none is found
+        """
+        return list(self._index()[1].get((package_name, arch), []))
+
+    def get_by_vendor(self, vendor):
+        """
+        Returns the installed packages from the given vendor.
+
+        Args:
+            vendor (str): vendor such as 'Red Hat, Inc.', ``None`` returns the
+                packages without vendor information
+
+        Returns:
+            list: the :class:`InstalledRpm` objects, empty when none is found
+        """
+        return list(self._index()[2].get(vendor, []))
+
+    def get_by_signed(self, redhat_signed=True):
+        """
+        Returns the installed packages by their :attr:`InstalledRpm.redhat_signed`.
+
+        Args:
+            redhat_signed (bool): ``True`` for the packages signed by Red Hat,
+                ``False`` for the other signed ones and ``None`` for the
+                packages without signature information
+
+        Returns:
+            list: the :class:`InstalledRpm` objects, empty when none is found
+        """
+        return list(self._index()[3].get(redhat_signed, []))
+
 
 @parser(Specs.installed_rpms)
 class InstalledRpms(CommandParser, RpmList):
@@ -216,6 +322,12 @@ class InstalledRpms(CommandParser, RpmList):
         True
         >>> rpm < rpm2
         False
+        >>> rpms.compare_many(['kernel-3.10.0-327.36.3.el7', 'kernel-3.10.0-514.el7', 'zsh-5.0.2-14.el7', 'foo-1.0-1'])
+        [0, -1, 1, None]
+        >>> rpms.vulnerable(['kernel-3.10.0-514.el7', 'zsh-5.0.2-14.el7'])
+        ['kernel-3.10.0-514.el7']
+        >>> rpms.get_by_arch('kernel', 'x86_64')
+        [0:kernel-3.10.0-267.el7, 0:kernel-3.10.0-327.36.3.el7]
 
     """
 
@@ -597,10 +709,19 @@ class InstalledRpm(object):
     def __repr__(self):
         return str(self)
 
-    def __eq__(self, other):
-        if not isinstance(other, InstalledRpm):
-            return False
+    def sort_key(self):
+        """
+        tuple: The key that orders packages of the same name by epoch, version
+        and release like ``rpmvercmp``. It's computed once and recomputed only
+        if any of these attributes is changed.
+        """
+        evr = (self.epoch, self.version, self.release)
+        cached = self.__dict__.get('_sort_key')
+        if cached is None or cached[0] != evr:
+            cached = self._sort_key = (evr, tuple(version_key(v) for v in evr))
+        return cached[1]
 
+    def _check_name(self, other):
         if self.name != other.name:
             raise ValueError(
                 'Cannot compare packages with differing names {0} != {1}'.format(
@@ -608,16 +729,19 @@ class InstalledRpm(object):
                 )
             )
 
-        return rpm_version_compare(self, other) == 0
-
-    def __lt__(self, other):
+    def __eq__(self, other):
         if not isinstance(other, InstalledRpm):
             return False
 
-        if self == other:
+        self._check_name(other)
+        return self.sort_key() == other.sort_key()
+
+    def __lt__(self, other):
+        if not isinstance(other, InstalledRpm):
             return False
 
-        return rpm_version_compare(self, other) < 0
+        self._check_name(other)
+        return self.sort_key() < other.sort_key()
 
     def __ne__(self, other):
         return not self == other
@@ -632,13 +756,9 @@ class InstalledRpm(object):
         return isinstance(other, InstalledRpm) and not other.__lt__(self)
 
     def __hash__(self):
-        # Python 3 requires hash implementation to have hashable object.
-        try:
-            # Just NVR is not enouch for uniqueness. Try NVRA first.
-            value = self.nvra
-        except TypeError:
-            value = self.nvr
-        return hash(value)
+        # Packages that compare equal have the same name and sort key. The
+        # arch is kept so different arches of one package stay distinct.
+        return hash((self.name, self.arch, self.sort_key()))
 
 
 # re-exports
@@ -105,7 +105,7 @@ import re
 from insights.core import CommandParser
 from insights.core.exceptions import ParseException
 from insights.core.plugins import parser
-from insights.parsers import keyword_search
+from insights.parsers import KeywordSearchTable, keyword_search
 from insights.specs import Specs
 
 MAX_GENERATIONS = 20
@@ -259,7 +259,7 @@ class LSBlock(BlockDevices):
                     device['PARENT_NAMES'] = parents[:generation]
                 device_list.append(device)
 
-        self.rows = [BlockDevice(d) for d in device_list]
+        self.rows = KeywordSearchTable(BlockDevice(d) for d in device_list)
         self.device_data = dict((dev.name, dev) for dev in self.rows)
 
 
@@ -308,7 +308,7 @@ class LSBlockPairs(BlockDevices):
         inferred from the other data present.
     """
     def parse_content(self, content):
-        self.rows = []
+        self.rows = KeywordSearchTable()
         self.failed_device_paths = set()
         if "invalid option" in content[0] and "lsblk:" in content[0]:
             raise ParseException(content[0])
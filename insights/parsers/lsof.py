@@ -29,6 +29,12 @@ list of rows for which the data in all those keywords matched the respective
 given values.  (**Note**: the ``SIZE/OFF`` column is searched for using the
 key ``SIZE_OFF`` - see example below)
 
+The rows are not kept, only the results of the scanners.  The rows collected
+by ``collect_keys`` are kept in a compact, column by column, table.  To keep
+all the rows, call the ``keep_rows`` method; they can then be iterated over,
+or searched with the ``search`` method, which takes the same keyword arguments
+as :func:`insights.parsers.keyword_search`.
+
 Sample output::
 
     COMMAND     PID  TID           USER   FD      TYPE             DEVICE  SIZE/OFF       NODE NAME
@@ -46,6 +52,7 @@ Examples:
     >>> Lsof.any('systemd_commands', lambda x: 'systemd' in x['COMMAND'])
     >>> Lsof.collect('polkitd_user', lambda x: x['USER'] == 'polkitd')
     >>> Lsof.collect_keys('root_stdin', USER='root', FD='0r', SIZE_OFF='0t0')
+    >>> Lsof.keep_rows()
     >>> l = shared[Lsof]
     >>> l.systemd_commands
     True
@@ -57,12 +64,17 @@ Examples:
     2
     >>> l.root_stdin[0]['COMMAND']
     'abrt-watc'
+    >>> len(l.rows)
+    8
+    >>> [row['PID'] for row in l.search(COMMAND='polkitd', FD__startswith='1')]
+    ['642']
 
 """
 from insights.core import CommandParser, Scannable
 from insights.core.exceptions import SkipComponent
 from insights.core.filters import add_filter
 from insights.core.plugins import parser
+from insights.parsers import ColumnarTable, keyword_search
 from insights.specs import Specs
 
 add_filter(Specs.lsof, ['COMMAND'])
@@ -75,6 +87,10 @@ class Lsof(CommandParser, Scannable):
     widths from the first row and then puts the data in each row into a
     dictionary keyed on the column name and found by the locations of each
     column.  Leading and trailing spaces are stripped from data.
+
+    Attributes:
+        rows (ColumnarTable): All the rows, each a dict-like view keyed on
+            the column names, when ``keep_rows`` has been called.
     """
 
     def _calc_indexes(self, line):
@@ -132,10 +148,50 @@ class Lsof(CommandParser, Scannable):
         for line in self._start(content):
             yield self._parse_line(line)
 
+    def __iter__(self):
+        return iter(self._kept_rows())
+
+    def _kept_rows(self):
+        if 'rows' not in self.scanners:
+            raise ValueError("Call Lsof.keep_rows() to keep the rows")
+        return getattr(self, 'rows', [])
+
+    @classmethod
+    def keep_rows(cls):
+        """
+        Keep all the rows in the ``rows`` attribute, so they can be iterated
+        over and searched.  They take much more memory than the results of
+        the scanners, so call this class method only when needed, and before
+        using the class data.
+        """
+        if 'rows' in cls.scanners:
+            return
+
+        def scanner(self, obj):
+            if not hasattr(self, 'rows'):
+                self.rows = ColumnarTable()
+            self.rows.append(obj)
+
+        cls._scan('rows', scanner)
+
+    def search(self, **kwargs):
+        """
+        Returns the rows matching the keyword arguments, see
+        :func:`insights.parsers.keyword_search`.  (The ``SIZE/OFF`` column is
+        searched for using the key ``SIZE_OFF``.)  Requires ``keep_rows``.
+
+        Examples:
+            >>> len(l.search(USER='root', FD='0r', SIZE_OFF='0t0'))
+            2
+        """
+        kwargs = dict((k.replace('SIZE_OFF', 'SIZE/OFF', 1) if k.startswith('SIZE_OFF') else k, v)
+                      for k, v in kwargs.items())
+        return keyword_search(self._kept_rows(), **kwargs)
+
     @classmethod
     def collect_keys(cls, result_key, **kwargs):
         """
-        Store a list of lines having keyword=value matches in the given
+        Store a table of lines having keyword=value matches in the given
         attribute name.
 
         Keyword argument names that exist as column names in the data are
@@ -150,7 +206,7 @@ class Lsof(CommandParser, Scannable):
         def scanner(self, obj):
             # Have to set the attribute so it exists, even if it has no rows
             if not hasattr(self, result_key):
-                setattr(self, result_key, [])
+                setattr(self, result_key, ColumnarTable())
             # Minor hack - search for 'SIZE/OFF' as 'SIZE_OFF'.
             if 'SIZE_OFF' in kwargs:
                 kwargs['SIZE/OFF'] = kwargs['SIZE_OFF']
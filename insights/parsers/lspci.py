@@ -80,8 +80,7 @@ class LsPci(CommandParser, TextFileOutput):
         # properties defined in the scanner.
         content = get_active_lines(content)
         self.lines = [l for l in content if l and l[0].isdigit()]
-        for scanner in self.scanners.values():
-            scanner(self)
+        self._run_scanners()
         # Parse kernel driver lines
         self.data = {}
         slot = None
@@ -43,7 +43,7 @@ import os
 from insights.core import CommandParser
 from insights.core.exceptions import ParseException, SkipComponent
 from insights.core.plugins import parser
-from insights.parsers import get_active_lines, keyword_search
+from insights.parsers import KeywordSearchTable, get_active_lines, keyword_search
 from insights.specs import Specs
 
 
@@ -258,7 +258,7 @@ class Mount(MountedFileSystems):
         True
     """
     def _parse_mounts(self, content):
-        self.rows = []
+        self.rows = KeywordSearchTable()
         self.mounts = {}
         for line in get_active_lines(content):
             mount = {}
@@ -327,7 +327,7 @@ class ProcMounts(MountedFileSystems):
 
     def _parse_mounts(self, content):
 
-        self.rows = []
+        self.rows = KeywordSearchTable()
         self.mounts = {}
         for line in get_active_lines(content):
             mount = {}
@@ -416,7 +416,7 @@ class MountInfo(MountedFileSystems):
             })
             entry = MountEntry(mount)
             rows.append(entry)
-        self.rows = rows
+        self.rows = KeywordSearchTable(rows)
         self.mounts = dict([mnt['mount_point'], rows[idx]] for idx, mnt in enumerate(rows))
 
 
@@ -42,7 +42,7 @@ def parse_doc(content, ctx):
     Doc = Many(Stmt).map(skip_none)
     Top = Doc + EOF
 
-    return Entry(children=Top(content)[0])
+    return Entry(children=Top(content, text=True)[0])
 
 
 @parser(Specs.multipath_conf)
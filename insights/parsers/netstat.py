@@ -32,7 +32,7 @@ from collections import defaultdict
 from insights.core import CommandParser, LegacyItemAccess, Parser
 from insights.core.exceptions import ParseException, SkipComponent
 from insights.core.plugins import parser
-from insights.parsers import keyword_search, parse_delimited_table
+from insights.parsers import ColumnarTable, keyword_search, parse_delimited_table
 from insights.specs import Specs
 from insights.util import deprecated
 
@@ -303,7 +303,7 @@ class NetstatSection(object):
         self.data = {}
         for m in self.meta:
             self.data[m] = []
-        self.datalist = []
+        self.datalist = ColumnarTable()
         self.lines = []
 
     def add_meta_data(self, line):
@@ -332,20 +332,18 @@ class NetstatSection(object):
             i += 1
         self.data[i - 1].append(line[indexes[i - 1] :])
 
-        self.datalist.append(
-            dict((m, d) for m, d in zip(NETSTAT_SECTION_ID[self.name], [r[-1] for r in self.data]))
-        )
+        row = dict((m, d) for m, d in zip(NETSTAT_SECTION_ID[self.name], [r[-1] for r in self.data]))
         # For convenience, unpack 'PID/Program name' into 'PID' and 'Program name'
         # This field must exist because of NETSTAT_SECTION_ID and the
         # exception in add_meta_data
-        pidprogram = self.datalist[-1]['PID/Program name']
+        pidprogram = row['PID/Program name']
         if '/' in pidprogram:
             pid, program = pidprogram.split('/', 1)
-            self.datalist[-1]['PID'] = pid
-            self.datalist[-1]['Program name'] = program
+            row['PID'] = pid
+            row['Program name'] = program
         # For convenience, unpack 'Local Address' into 'Local IP' and 'Port'
-        if 'Local Address' in self.datalist[-1]:
-            local_addr = self.datalist[-1]['Local Address']
+        if 'Local Address' in row:
+            local_addr = row['Local Address']
             if ':' not in local_addr:
                 raise ParseException(
                     'Local Address is expected to have a colon separating address and port'
@@ -353,9 +351,10 @@ class NetstatSection(object):
             # Remember, IPv6 addresses have colons in them.  The port
             # is the last part.
             parts = local_addr.split(':')
-            self.datalist[-1]['Local IP'] = ':'.join(parts[:-1])
-            self.datalist[-1]['Port'] = parts[-1]
+            row['Local IP'] = ':'.join(parts[:-1])
+            row['Port'] = parts[-1]
         # Unix socket information doesn't have Local Address.
+        self.datalist.append(row)
 
     def _merge_data_index(self):
         merged_data = {}
@@ -403,7 +402,8 @@ class Netstat(CommandParser):
         data(dict): Keyed as above, each item is a dictionary of lists,
             corresponding to a column and row lookup from the table data.
             For example, the first line's State is ['State'][0]
-        datalist(dict): Keyed as above, each item is a list of dictionaries
+        datalist(dict): Keyed as above, each item is a
+            :class:`insights.parsers.ColumnarTable` of dict-like rows
             corresponding to a row and column lookup from the table.
             For example, the first line's State is [0]['State']
         lines(dict): Keyed as above, each item is a list of the original
@@ -153,7 +153,7 @@ class NginxConfPEG(ConfigParser):
 
     def parse_doc(self, content):
         try:
-            return Entry(children=self.Top("\n".join(content))[0], src=self)
+            return Entry(children=self.Top("\n".join(content), text=True)[0], src=self)
         except Exception:
             raise ParseException("There was an exception when parsing the config file.")
 
@@ -9,7 +9,7 @@ from insights.core import CommandParser, ContainerParser
 from insights.core.exceptions import ParseException
 from insights.core.filters import add_filter
 from insights.core.plugins import parser
-from insights.parsers import keyword_search, parse_delimited_table
+from insights.parsers import ColumnarTable, keyword_search, parse_delimited_table
 from insights.specs import Specs
 
 
@@ -34,8 +34,8 @@ class Ps(CommandParser):
             and ``command_name``) is not found in the input.
 
     Attributes:
-        data (list): List of dicts, where the keys in each dict are the
-            column headers and each item in the list represents a process.
+        data (ColumnarTable): Table of the processes, where each row is a
+            dict-like view keyed by the column headers.
         running (set): Set of full command strings for each command
             including optional path and arguments, in order of listing in the
             `ps` output.
@@ -80,19 +80,16 @@ class Ps(CommandParser):
         if header_line is not None:
             # parse_delimited_table allows short lines, but we specifically
             # want to ignore them.
-            self.data = [
-                row
-                for row in parse_delimited_table(
-                    content,
-                    heading_ignore=[header_line],
-                    max_splits=self.max_splits,
-                    raw_line_key=raw_line_key,
-                )
+            self.data = ColumnarTable()
+            for proc in parse_delimited_table(
+                content,
+                heading_ignore=[header_line],
+                max_splits=self.max_splits,
+                raw_line_key=raw_line_key,
+            ):
                 # skip the insights-client self grep process "grep -F .."
-                if self.command_name in row and not row[self.command_name].startswith('grep -F ')
-            ]
-            # The above list comprehension assures all rows have a command.
-            for proc in self.data:
+                if self.command_name not in proc or proc[self.command_name].startswith('grep -F '):
+                    continue
                 cmd = proc[self.command_name]
                 self.running.add(cmd)
                 cmd_name = cmd
@@ -103,8 +100,8 @@ class Ps(CommandParser):
                 proc["COMMAND_NAME"] = cmd_name
                 self.cmd_names.add(cmd_name)
                 proc["ARGS"] = cmd.split(" ", 1)[1] if " " in cmd else ""
-                self.services.append((cmd_name, proc[self.user_name], proc[raw_line_key]))
-                del proc[raw_line_key]
+                self.services.append((cmd_name, proc[self.user_name], proc.pop(raw_line_key)))
+                self.data.append(proc)
 
             pid = None
             stat = None
@@ -479,4 +476,4 @@ class PsEoCmd(Ps):
 
     def children(self, ppid):
         """list: Returns a list of dict for all rows with `ppid` as parent PID"""
-        return [row for row in self.data if row['PPID'] == ppid]
+        return [row.copy() for row in self.data if row['PPID'] == ppid]
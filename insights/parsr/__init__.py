@@ -110,17 +110,30 @@ def render(tree):
     print(text_format(tree))
 
 
+_FAILED = object()
+
+
 def _debug_hook(func):
     """
     _debug_hook wraps the process function of every parser. It maintains a
     stack of active parsers during evaluation to help with error reporting and
-    prints diagnostic messages for parsers with debug enabled.
+    prints diagnostic messages for parsers with debug enabled. In packrat mode
+    it also records the outcome of memoizable parsers at each position so
+    backtracking never evaluates them twice at the same place.
     """
     @functools.wraps(func)
     def inner(self, pos, data, ctx):
         if ctx.function_error is not None:
             # no point in continuing...
             raise Exception()
+        key = None
+        if ctx.memo is not None and id(self) in ctx.memo_ids:
+            key = (id(self), pos)
+            res = ctx.memo.get(key)
+            if res is _FAILED:
+                raise Exception()
+            if res is not None:
+                return res
         ctx.parser_stack.append(self)
         if self._debug:
             line = ctx.line(pos) + 1
@@ -130,8 +143,12 @@ def _debug_hook(func):
             res = func(self, pos, data, ctx)
             if self._debug:
                 log.debug("Result: {0}".format(res[1]))
+            if key is not None:
+                ctx.memo[key] = res
             return res
         except:
+            if key is not None:
+                ctx.memo[key] = _FAILED
             if self._debug:
                 ps = "-> ".join([str(p) for p in ctx.parser_stack])
                 log.debug("Failed: {0}".format(ps))
@@ -141,6 +158,61 @@ def _debug_hook(func):
     return inner
 
 
+def _memoizable(tree):
+    """
+    Returns the ids of the parsers in the tree worth memoizing. Only a parser
+    shared by several others can be tried twice at the same position, and
+    leaves are cheaper to rerun than to look up. Parsers that read or change
+    the indent or tag stacks of the :py:class:`Context` can't be replayed, nor
+    can anything that contains them.
+    """
+    parents = {}
+    nodes = []
+    stack = [tree]
+    seen = set([id(tree)])
+    while stack:
+        cur = stack.pop()
+        nodes.append(cur)
+        for c in cur.children:
+            parents.setdefault(id(c), []).append(cur)
+            if id(c) not in seen:
+                seen.add(id(c))
+                stack.append(c)
+
+    sensitive = [n for n in nodes if n._context_sensitive]
+    excluded = set(id(n) for n in sensitive)
+    while sensitive:
+        cur = sensitive.pop()
+        for p in parents.get(id(cur), []):
+            if id(p) not in excluded:
+                excluded.add(id(p))
+                sensitive.append(p)
+
+    return set(
+        id(n) for n in nodes
+        if n.children and id(n) not in excluded and len(parents.get(id(n), [])) > 1
+    )
+
+
+class _Input(object):
+    """
+    Indexes the original input instead of copying it into a list of
+    characters. Reading one position past the end returns ``None`` like the
+    terminal appended to the list.
+    """
+    __slots__ = ("data", "size")
+
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+
+    def __getitem__(self, pos):
+        return self.data[pos] if pos < self.size else None
+
+    def __iter__(self):
+        return iter(self.data)
+
+
 class Backtrack(Exception):
     """
     Mapped or Lifted functions should Backtrack if they want to fail without
@@ -166,6 +238,8 @@ class Context(object):
         self.parser_stack = []
         self.errors = []
         self.function_error = None
+        self.memo = None
+        self.memo_ids = set()
 
     def set(self, pos, msg):
         """
@@ -208,6 +282,8 @@ class Parser(with_metaclass(_ParserMeta, Node)):
     """
     Parser is the common base class of all Parsers.
     """
+    _context_sensitive = False
+
     def __init__(self):
         super(Parser, self).__init__()
         self.name = None
@@ -315,7 +391,7 @@ class Parser(with_metaclass(_ParserMeta, Node)):
     def process(self, pos, data, ctx):
         raise NotImplementedError()
 
-    def __call__(self, data, src=None, Ctx=Context):
+    def __call__(self, data, src=None, Ctx=Context, packrat=False, text=False):
         """
         Invoke the parser like a function on a regular string of characters.
 
@@ -323,10 +399,21 @@ class Parser(with_metaclass(_ParserMeta, Node)):
         the Context instance. You also can provide a Context subclass if your
         parsers have particular needs not covered by the default
         implementation that provides significant indent and tag stacks.
+
+        Set ``packrat`` to memoize the results of parsers by position so
+        grammars that backtrack heavily run in linear time at the cost of a
+        memo table. Set ``text`` to index ``data`` directly instead of
+        copying it into a list with one element per character.
         """
-        data = list(data)
-        data.append(None)  # add a terminal so we don't overrun
+        if text:
+            data = _Input(data)
+        else:
+            data = list(data)
+            data.append(None)  # add a terminal so we don't overrun
         ctx = Ctx(data, src=src)
+        if packrat:
+            ctx.memo = {}
+            ctx.memo_ids = _memoizable(self)
 
         try:
             _, ret = self.process(0, data, ctx)
@@ -1118,6 +1205,8 @@ class WithIndent(Wrapper):
             KVPair = WithIndent(Key + Opt(Sep >> Value))
 
     """
+    _context_sensitive = True
+
     def process(self, pos, data, ctx):
         new, _ = WS.process(pos, data, ctx)
         try:
@@ -1139,6 +1228,8 @@ class HangingString(Parser):
             KVPair = WithIndent(Key + Opt(Sep >> Value))
 
     """
+    _context_sensitive = True
+
     def __init__(self, chars, echars=None, min_length=1):
         super(HangingString, self).__init__()
         p = String(chars, echars=echars, min_length=min_length)
@@ -1170,6 +1261,8 @@ class StartTagName(Wrapper):
     etc. The tag result is captured and put onto a tag stack in the
     :py:class:`Context` object.
     """
+    _context_sensitive = True
+
     def process(self, pos, data, ctx):
         pos, res = self.children[0].process(pos, data, ctx)
         ctx.tags.append(res)
@@ -1183,6 +1276,8 @@ class EndTagName(Wrapper):
     :py:class:`Context` object. The tags must match for the parse to be
     successful.
     """
+    _context_sensitive = True
+
     def __init__(self, parser, ignore_case=False):
         super(EndTagName, self).__init__(parser)
         self.ignore_case = ignore_case
@@ -0,0 +1,98 @@
+import json
+import os
+import time
+
+import pytest
+
+from insights.parsr import (_memoizable, Char, Context, EOF, Forward, InSet, Letters, Literal, Many,
+        Number, StartTagName, WS)
+from insights.parsr.examples import (arith, corosync_conf, httpd_conf, json_parser, logrotate_conf,
+        multipath_conf, nginx_conf)
+from insights.parsr.examples.tests import (test_corosync, test_httpd, test_logrotate, test_multipath,
+        test_nginx)
+
+MODES = [{}, {"text": True}, {"packrat": True}, {"packrat": True, "text": True}]
+
+EXAMPLES = [
+    (arith.Top, "(1 + 2 * (3 - 4) / 5) * " * 20 + "7"),
+    (json_parser.Top, json.dumps([{"a": [1, 2.5, "x", None, True], "b": {"c": "d"}}] * 20)),
+    (httpd_conf.Top, test_httpd.DATA),
+    (nginx_conf.Top, test_nginx.NGINX_CONF),
+    (multipath_conf.Top, test_multipath.EXAMPLE),
+    (corosync_conf.Top, test_corosync.DATA),
+    (logrotate_conf.Top, test_logrotate.EXAMPLE),
+]
+
+
+def _backtracking_grammar():
+    # Every alternative reparses the same nested prefix before failing on the
+    # character after it, which is exponential without memoization.
+    expr = Forward()
+    atom = Number | (Char("(") >> expr << Char(")"))
+    expr <= (atom + Char("+") + expr) | (atom + Char("-") + expr) | atom
+    return expr << EOF
+
+
+@pytest.mark.parametrize("kwargs", MODES)
+@pytest.mark.parametrize("top, data", EXAMPLES)
+def test_modes_equivalent(top, data, kwargs):
+    assert repr(top(data, **kwargs)) == repr(top(data))
+
+
+@pytest.mark.parametrize("kwargs", MODES)
+def test_errors_equivalent(kwargs):
+    with pytest.raises(Exception) as expected:
+        json_parser.Top('{"a": [1, 2,]}')
+    with pytest.raises(Exception) as actual:
+        json_parser.Top('{"a": [1, 2,]}', **kwargs)
+    assert str(actual.value) == str(expected.value)
+
+
+@pytest.mark.parametrize("kwargs", MODES)
+def test_eof(kwargs):
+    p = Literal("abc") + EOF
+    assert p("abc", **kwargs) == ["abc", None]
+    with pytest.raises(Exception):
+        p("ab", **kwargs)
+    with pytest.raises(Exception):
+        p("abcd", **kwargs)
+
+
+def test_memoizable():
+    shared = Many(InSet("ab"))
+    tag = StartTagName(Letters)
+    top = (shared + Char("x")) | (shared + Char("y")) | (tag + shared)
+    ids = _memoizable(top)
+    assert id(shared) in ids
+    assert id(top) not in ids
+    assert id(tag) not in ids
+    # leaves are never memoized
+    assert not any(id(c) in ids for c in shared.children)
+
+
+def test_packrat_context():
+    ctx = Context(list("ab") + [None])
+    assert ctx.memo is None
+
+    grammar = _backtracking_grammar()
+    data = "(" * 6 + "1" + ")" * 6
+    assert grammar(data, packrat=True) == grammar(data)
+    assert WS("  ", packrat=True, text=True) == [" ", " "]
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_PARSR_BENCHMARK"),
+    reason="Benchmark of the parsr input modes. Use TEST_PARSR_BENCHMARK=True to enable it",
+)
+def test_benchmark():
+    grammars = [(top, data * 50) for top, data in EXAMPLES[2:]]
+    grammars.append((_backtracking_grammar(), "(" * 10 + "1" + ")" * 10))
+    for top, data in grammars:
+        timings = []
+        for kwargs in MODES:
+            start = time.time()
+            top(data, **kwargs)
+            timings.append(time.time() - start)
+        print("%8d chars: " % len(data) + ", ".join(
+            "%s %.3fs" % (sorted(kw) or ["list"], t) for kw, t in zip(MODES, timings)))
+    assert timings[2] < timings[0]
@@ -10,8 +10,12 @@ template to ensure it is loaded.
 """
 
 import os
+import signal
+import threading
 import time
 
+from six.moves import shlex_quote
+
 DEFAULT_SHELL_TIMEOUT = 10
 """ int: Default timeout in seconds for ctx.shell_out() commands, must be provided as an arg """
 
@@ -54,6 +58,80 @@ def get_running_commands(ps, ctx, commands):
     return sorted(ret)
 
 
+def _rpm_qf(ctx, paths):
+    return ctx.shell_out(
+        "/usr/bin/rpm -qf {0}".format(" ".join(shlex_quote(p) for p in paths)),
+        timeout=DEFAULT_SHELL_TIMEOUT,
+        keep_rc=True,
+        signum=signal.SIGTERM,
+    )
+
+
+def _owned(line):
+    return line and not line.startswith("error:") and "is not owned by any package" not in line
+
+
+class PackageOwners(object):
+    """
+    Caches the RPM packages that own files during a collection, so the
+    datasources that need the owners of files share the ``rpm`` queries.
+
+    Symbolic links are resolved in process, and the files that aren't cached
+    yet are queried with a single ``rpm -qf`` command. The cache is shared
+    through :data:`PACKAGE_OWNERS` and is cleared at the start of every
+    collection.
+    """
+    def __init__(self):
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def _query(self, ctx, paths):
+        rc, lines = _rpm_qf(ctx, paths)
+        if len(lines) == len(paths):
+            return dict((p, l if _owned(l) else None) for p, l in zip(paths, lines))
+        # A file owned by more than one package prints more than one line,
+        # so they can't be told apart. Ask for each file then.
+        owners = {}
+        for path in paths:
+            rc, lines = _rpm_qf(ctx, [path])
+            owners[path] = lines[0] if rc == 0 and lines and _owned(lines[0]) else None
+        return owners
+
+    def get(self, ctx, paths):
+        """
+        Returns the packages that own the files at ``paths``, by path.
+
+        Arguments:
+            ctx: The current execution context
+            paths(list): The full paths of the files
+
+        Returns:
+            dict: The name of the RPM package that provides each file, or
+            None when it doesn't exist or isn't associated with an RPM.
+        """
+        resolved = dict((p, os.path.realpath(p)) for p in paths if os.path.exists(p))
+        with self._lock:
+            missing = sorted(set(r for r in resolved.values() if r not in self._owners))
+        if missing:
+            owners = self._query(ctx, missing)
+            with self._lock:
+                self._owners.update(owners)
+        return dict((p, self._owners.get(resolved[p]) if p in resolved else None) for p in paths)
+
+    def clear(self):
+        """
+        Drops the cached owners.
+        """
+        with self._lock:
+            self._owners.clear()
+
+
+PACKAGE_OWNERS = PackageOwners()
+"""
+The :class:`PackageOwners` shared by the datasources of a collection.
+"""
+
+
 def get_recent_files(target_path, last_modify_hours=24, latest_count=0):
     """
     Get the recent updated or created files, limited to lastest_count files
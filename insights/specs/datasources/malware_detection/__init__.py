@@ -1,13 +1,17 @@
 import os
 import re
+import stat
 import time
 import json
 import yaml
+import heapq
+import hashlib
 import fnmatch
 from sys import exit
 import logging
 from glob import glob
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 from tempfile import NamedTemporaryFile, gettempdir
 try:
     # python 2
@@ -31,6 +35,7 @@ MALWARE_APP_URL = 'https://console.redhat.com/insights/malware'
 MALWARE_CONFIG_FILE = os.path.join(constants.default_conf_dir, "malware-detection-config.yml")
 LAST_FILESYSTEM_SCAN_FILE = os.path.join(constants.default_conf_dir, '.last_malware-detection_filesystem_scan')
 LAST_PROCESSES_SCAN_FILE = os.path.join(constants.default_conf_dir, '.last_malware-detection_processes_scan')
+FILESYSTEM_SCAN_STATE_FILE = os.path.join(constants.default_conf_dir, '.malware-detection_filesystem_scan_state')
 RULE_DOWNLOAD_DIR = constants.insights_core_lib_dir
 DEFAULT_MALWARE_CONFIG = """
 # Configuration file for the Red Hat Insights Malware Detection Client app
@@ -75,6 +80,11 @@ filesystem_scan_exclude:
 # No value means scan all files regardless of created/modified date
 filesystem_scan_since:
 
+# filesystem_scan_incremental: only scan the files that were added or changed (their size, modification time or inode)
+# since the last successful scan with the same rules.  Files with matches are always scanned again.
+# Can be combined with filesystem_scan_since.  Default is false, meaning scan all files
+filesystem_scan_incremental: false
+
 # Exclude mounted network/external filesystems mountpoints?
 # Scanning files within mounted network filesystems may be slow and cause extra network traffic.
 # They are excluded by default, meaning that files in network/externally mounted filesystems are not scanned.
@@ -130,6 +140,11 @@ nice_value: # 19
 # The max number of CPUs threads used by yara when scanning.  Autodetected, but default is 2
 cpu_thread_limit: # 2
 
+# The max number of yara processes scanning the filesystem at the same time.  Default is 1
+# The files to scan are split into this many parts of about the same size.  Each yara process uses up to
+# cpu_thread_limit threads and runs with nice_value, and the number of processes is limited to what the CPUs can run
+filesystem_scan_jobs: # 1
+
 # The location of the directory containing 3rd party rules to be used in malware scan
 rules_location: /etc/insights-client/signatures
 
@@ -141,10 +156,10 @@ use_remote_rules: true
 # Env vars are initially strings and need to be parsed to their appropriate type to match the yaml types
 ENV_VAR_TYPES = {
     'boolean': ['SCAN_FILESYSTEM', 'SCAN_PROCESSES', 'TEST_SCAN', 'ADD_METADATA',
-                'EXCLUDE_NETWORK_FILESYSTEM_MOUNTPOINTS', 'USE_REMOTE_RULES'],
+                'EXCLUDE_NETWORK_FILESYSTEM_MOUNTPOINTS', 'USE_REMOTE_RULES', 'FILESYSTEM_SCAN_INCREMENTAL'],
     'list': ['FILESYSTEM_SCAN_ONLY', 'FILESYSTEM_SCAN_EXCLUDE', 'PROCESSES_SCAN_ONLY', 'PROCESSES_SCAN_EXCLUDE',
              'NETWORK_FILESYSTEM_TYPES'],
-    'integer': ['SCAN_TIMEOUT', 'NICE_VALUE', 'CPU_THREAD_LIMIT', 'STRING_MATCH_LIMIT'],
+    'integer': ['SCAN_TIMEOUT', 'NICE_VALUE', 'CPU_THREAD_LIMIT', 'STRING_MATCH_LIMIT', 'FILESYSTEM_SCAN_JOBS'],
     'int_or_str': ['FILESYSTEM_SCAN_SINCE', 'PROCESSES_SCAN_SINCE', 'RULES_LOCATION']
 }
 
@@ -164,7 +179,8 @@ class MalwareDetectionClient:
         for option, value in [('nice_value', 19),
                               ('scan_timeout', 3600),
                               ('cpu_thread_limit', 2),
-                              ('string_match_limit', 10)]:
+                              ('string_match_limit', 10),
+                              ('filesystem_scan_jobs', 1)]:
             try:
                 setattr(self, option, int(self._get_config_option(option, value)))
             except Exception as e:
@@ -192,6 +208,13 @@ class MalwareDetectionClient:
             exit(constants.sig_kill_bad)
         self.disabled_rules = self._get_disabled_rules()
 
+        # For incremental scans, get the state of the files from the last successful scan with the same rules
+        self.scan_state = None
+        if (not self.test_scan and self.do_filesystem_scan and
+                self._get_config_option('filesystem_scan_incremental', False)):
+            self.scan_state = FilesystemScanState(FILESYSTEM_SCAN_STATE_FILE, self.rules_files)
+            logger.info("Scan for files added/changed since the last successful scan")
+
         # Build the yara command for non-compiled yara files and yara commands for compiled yara files
         # Compiled yara files must always be run separately.
         # These commands contain various command line options, that will be run
@@ -254,6 +277,10 @@ class MalwareDetectionClient:
                 if self.do_filesystem_scan:
                     write_data_to_file(filesystem_scan_start, LAST_FILESYSTEM_SCAN_FILE)
                     os.chmod(LAST_FILESYSTEM_SCAN_FILE, 0o644)
+                    if self.scan_state:
+                        # Files with matches must be scanned again next time
+                        self.scan_state.discard(self._matched_files())
+                        self.scan_state.save()
                 if self.do_process_scan:
                     write_data_to_file(processes_scan_start, LAST_PROCESSES_SCAN_FILE)
                     os.chmod(LAST_PROCESSES_SCAN_FILE, 0o644)
@@ -892,6 +919,11 @@ class MalwareDetectionClient:
             self.cpu_thread_limit = 1
         logger.debug("Using %s CPU thread(s) for scanning", self.cpu_thread_limit)
 
+        # Limit the number of yara processes scanning the filesystem at the same time to what the CPUs can run
+        cpus = int(nproc) if nproc else 1
+        self.filesystem_scan_jobs = max(1, min(self.filesystem_scan_jobs, cpus // max(self.cpu_thread_limit, 1)))
+        logger.debug("Using %s yara process(es) for filesystem scanning", self.filesystem_scan_jobs)
+
         # Construct the (partial) yara command that will be used later for scanning files and processes
         # The argument for the files and processes that will be scanned will be added later
         base_args = [
@@ -972,60 +1004,147 @@ class MalwareDetectionClient:
         logger.info("Starting filesystem scan ...")
         fs_scan_start = time.time()
 
-        for toplevel_dir in sorted(scan_dict):
-            # Make a copy of the self.active_cmd list and add to it the thing to scan
-            cmd = self.active_cmd[:]
-            dir_scan_start = time.time()
+        if self.filesystem_scan_jobs > 1:
+            self._scan_filesystem_in_parts(scan_dict)
+        else:
+            for toplevel_dir in sorted(scan_dict):
+                self._scan_toplevel_dir(toplevel_dir, scan_dict[toplevel_dir])
 
-            specified_log_txt = "specified " if 'include' in scan_dict[toplevel_dir] else ""
-            if self.filesystem_scan_since_dict['timestamp']:
+        fs_scan_end = time.time()
+        logger.info("Filesystem scan time: %s", time.strftime("%H:%M:%S", time.gmtime(fs_scan_end - fs_scan_start)))
+        return True
+
+    def _scan_toplevel_dir(self, toplevel_dir, scan_items):
+        """
+        Scan the files in toplevel_dir, or only its specified items, with a single yara process
+        """
+        # Make a copy of the self.active_cmd list and add to it the thing to scan
+        cmd = self.active_cmd[:]
+        dir_scan_start = time.time()
+        timestamp = self.filesystem_scan_since_dict['timestamp']
+        scanned_files = []
+
+        specified_log_txt = "specified " if 'include' in scan_items else ""
+        if timestamp or self.scan_state:
+            if timestamp:
                 logger.info("Scanning %sfiles in %s modified since %s ...", specified_log_txt, toplevel_dir,
                             self.filesystem_scan_since_dict['datetime'])
-                # Find the recently modified files in the given top level directory
+            else:
+                logger.info("Scanning %sfiles in %s changed since the last scan ...", specified_log_txt, toplevel_dir)
+            # Find the recently modified files in the given top level directory
+            scan_list_file = NamedTemporaryFile(prefix='%s_scan_list.' % os.path.basename(toplevel_dir),
+                                                mode='w', delete=True)
+            for path, _ in find_modified_files(scan_items.get('include', [toplevel_dir]), timestamp,
+                                               self.scan_state):
+                scan_list_file.write(path + "\n")
+                scanned_files.append(path)
+
+            scan_list_file.flush()
+            cmd.extend(['--scan-list', scan_list_file.name])
+        else:
+            logger.info("Scanning %sfiles in %s ...", specified_log_txt, toplevel_dir)
+            if 'include' in scan_items:
                 scan_list_file = NamedTemporaryFile(prefix='%s_scan_list.' % os.path.basename(toplevel_dir),
                                                     mode='w', delete=True)
-                if 'include' in scan_dict[toplevel_dir]:
-                    find_modified_include_items(scan_dict[toplevel_dir]['include'], self.filesystem_scan_since_dict['timestamp'], scan_list_file)
-                else:
-                    find_modified_in_directory(toplevel_dir, self.filesystem_scan_since_dict['timestamp'], scan_list_file)
-
+                scan_list_file.write('\n'.join(scan_items['include']))
                 scan_list_file.flush()
                 cmd.extend(['--scan-list', scan_list_file.name])
             else:
-                logger.info("Scanning %sfiles in %s ...", specified_log_txt, toplevel_dir)
-                if 'include' in scan_dict[toplevel_dir]:
-                    scan_list_file = NamedTemporaryFile(prefix='%s_scan_list.' % os.path.basename(toplevel_dir),
-                                                        mode='w', delete=True)
-                    scan_list_file.write('\n'.join(scan_dict[toplevel_dir]['include']))
-                    scan_list_file.flush()
-                    cmd.extend(['--scan-list', scan_list_file.name])
-                else:
-                    cmd.append(toplevel_dir)
+                cmd.append(toplevel_dir)
 
-            logger.debug("Yara command: %s", cmd)
-            try:
-                output = call([cmd]).strip()
-            except CalledProcessError as cpe:  # pragma: no cover
-                logger.debug("Unable to scan %s: %s", toplevel_dir, cpe.output.strip())
-                continue
+        output = self._run_yara(cmd, toplevel_dir)
+        self._handle_scan_output(output, toplevel_dir, time.time() - dir_scan_start, scanned_files)
 
-            try:
-                self.parse_scan_output(output.strip())
-            except Exception as e:  # pragma: no cover
-                self.potential_matches += 1
-                logger.exception("Rule match(es) potentially found in %s but problems encountered parsing the results: %s.  Skipping ...",
-                                 toplevel_dir, str(e))
+    def _scan_filesystem_in_parts(self, scan_dict):
+        """
+        Split the files to scan into filesystem_scan_jobs parts of about the same size
+        and scan the parts with that many yara processes running at the same time
+        """
+        timestamp = self.filesystem_scan_since_dict['timestamp']
+        if timestamp:
+            logger.info("Scanning files in %s modified since %s ...", ', '.join(sorted(scan_dict)),
+                        self.filesystem_scan_since_dict['datetime'])
+        else:
+            logger.info("Scanning files in %s ...", ', '.join(sorted(scan_dict)))
 
-            dir_scan_end = time.time()
-            logger.info("Scan time for %s: %d seconds", toplevel_dir, (dir_scan_end - dir_scan_start))
-            if dir_scan_end - dir_scan_start >= self.scan_timeout - 2:  # pragma: no cover
-                logger.warning("Scan of %s timed-out after %d seconds and may not have been fully scanned.  "
-                               "Consider increasing the scan_timeout value in %s",
-                               toplevel_dir, self.scan_timeout, MALWARE_CONFIG_FILE)
+        files = []
+        for toplevel_dir in sorted(scan_dict):
+            files.extend(find_modified_files(scan_dict[toplevel_dir].get('include', [toplevel_dir]), timestamp,
+                                             self.scan_state))
+        parts = split_scan_list(files, self.filesystem_scan_jobs)
+        if not parts:
+            logger.info("No files to scan")
+            return
 
-        fs_scan_end = time.time()
-        logger.info("Filesystem scan time: %s", time.strftime("%H:%M:%S", time.gmtime(fs_scan_end - fs_scan_start)))
-        return True
+        scan_list_files, cmds = [], []
+        for part in parts:
+            scan_list_file = NamedTemporaryFile(prefix='part%d_scan_list.' % (len(cmds) + 1), mode='w', delete=True)
+            scan_list_file.write('\n'.join(part))
+            scan_list_file.flush()
+            scan_list_files.append(scan_list_file)
+            cmds.append(self.active_cmd + ['--scan-list', scan_list_file.name])
+        logger.info("Scanning %d files with %d yara processes ...", len(files), len(parts))
+
+        def scan_part(index):
+            part_scan_start = time.time()
+            output = self._run_yara(cmds[index], 'part %d' % (index + 1))
+            return output, time.time() - part_scan_start
+
+        # The yara processes run in threads, but their output is parsed here, one part at a time
+        pool = ThreadPool(len(parts))
+        try:
+            for index, (output, scan_time) in enumerate(pool.imap(scan_part, range(len(parts)))):
+                self._handle_scan_output(output, 'part %d' % (index + 1), scan_time, parts[index])
+        finally:
+            pool.close()
+            pool.join()
+            for scan_list_file in scan_list_files:
+                scan_list_file.close()
+
+    def _run_yara(self, cmd, scanned):
+        """
+        Run the yara command and return its output, or None if it failed
+        """
+        logger.debug("Yara command: %s", cmd)
+        try:
+            return call([cmd]).strip()
+        except CalledProcessError as cpe:  # pragma: no cover
+            logger.debug("Unable to scan %s: %s", scanned, cpe.output.strip())
+            return None
+
+    def _handle_scan_output(self, output, scanned, scan_time, scanned_files):
+        """
+        Parse the output of the yara command that scanned 'scanned'
+        The scanned_files won't be skipped by the next incremental scan unless they were scanned successfully
+        """
+        if output is None:  # pragma: no cover
+            if self.scan_state:
+                self.scan_state.discard(scanned_files)
+            return
+
+        try:
+            self.parse_scan_output(output.strip())
+        except Exception as e:  # pragma: no cover
+            self.potential_matches += 1
+            logger.exception("Rule match(es) potentially found in %s but problems encountered parsing the results: %s.  Skipping ...",
+                             scanned, str(e))
+            if self.scan_state:
+                self.scan_state.discard(scanned_files)
+
+        logger.info("Scan time for %s: %d seconds", scanned, scan_time)
+        if scan_time >= self.scan_timeout - 2:  # pragma: no cover
+            logger.warning("Scan of %s timed-out after %d seconds and may not have been fully scanned.  "
+                           "Consider increasing the scan_timeout value in %s",
+                           scanned, self.scan_timeout, MALWARE_CONFIG_FILE)
+            if self.scan_state:
+                self.scan_state.discard(scanned_files)
+
+    def _matched_files(self):
+        """
+        Return the files that rules matched
+        """
+        return set(match['source'] for rule in self.host_scan.values() for match in rule['matches']
+                   if match['metadata']['source_type'] == 'file')
 
     def scan_processes(self):
         if not self.do_process_scan:
@@ -1874,36 +1993,142 @@ def get_scan_since_timestamp(scan_since_option, since):
         exit(constants.sig_kill_bad)
 
 
-def is_recent_mtime(item, timestamp):
+if hasattr(os, "scandir"):
+    def walk_files(directory):
+        """
+        Yield the path and lstat result of each regular file under 'directory', in the same order as os.walk
+        Links aren't followed, and each entry is stat'ed once
+        """
+        dirs = [directory]
+        while dirs:
+            subdirs = []
+            try:
+                with os.scandir(dirs.pop()) as it:
+                    entries = list(it)
+            except OSError:  # pragma: no cover
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat(follow_symlinks=False)
+                except OSError:  # pragma: no cover
+                    continue
+            dirs.extend(reversed(subdirs))
+
+
+else:  # pragma: no cover
+    def walk_files(directory):
+        """
+        Yield the path and lstat result of each regular file under 'directory', in the same order as os.walk
+        """
+        for root, dirs, files in os.walk(directory):
+            for afile in files:
+                path = os.path.join(root, afile)
+                try:
+                    st = os.lstat(path)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    yield path, st
+
+
+def find_modified_files(item_list, timestamp=None, scan_state=None):
     """
-    Return True if the given 'item' has a modification time that is newer than 'timestamp'
-    Return False otherwise, or if the the 'item' is a link or another non-file type (eg pipes)
+    Yield the path and lstat result of the files in the given list of items (files/directories)
+    that have been created/modified since 'timestamp', if given, and that were changed since the
+    last successful scan, if a 'scan_state' is given
     """
-    if os.path.exists(item) and not os.path.islink(item) and os.path.isfile(item):
-        return os.path.getmtime(item) > timestamp
-    return False  # pragma: no cover
+    for item in item_list:
+        if os.path.isdir(item) and not os.path.islink(item):
+            files = walk_files(item)
+        else:
+            try:
+                st = os.lstat(item)
+            except OSError:  # pragma: no cover
+                continue
+            files = [(item, st)] if stat.S_ISREG(st.st_mode) else []
+        for path, st in files:
+            if timestamp and st.st_mtime <= timestamp:
+                continue
+            if scan_state and not scan_state.is_changed(path, st):
+                continue
+            yield path, st
 
 
-def find_modified_in_directory(directory, timestamp, output_file):
+def split_scan_list(files, parts):
     """
-    Find files in 'directory' that have been created/modified since 'timestamp'
-    and write their names to 'output_file'
+    Split the (path, lstat result) pairs in 'files' into at most 'parts' lists of paths with about the same
+    total size, largest files first.  Each list is sorted by path
     """
-    for root, dirs, files in os.walk(directory):
-        for afile in files:
-            path = os.path.join(root, afile)
-            if is_recent_mtime(path, timestamp):
-                output_file.write(path + "\n")
+    heap = [(0, index, []) for index in range(min(parts, len(files)))]
+    for path, st in sorted(files, key=lambda f: f[1].st_size, reverse=True):
+        size, index, paths = heapq.heappop(heap)
+        paths.append(path)
+        heapq.heappush(heap, (size + st.st_size, index, paths))
+    return [sorted(paths) for _, _, paths in sorted(heap, key=lambda p: p[1])]
 
 
-def find_modified_include_items(item_list, timestamp, output_file):
+class FilesystemScanState(object):
     """
-    Find files in the given list of items (files/directories) that have been created/modified since 'timestamp'
-    and write their names to 'output_file'
+    The size, modification time and inode of the files from the last successful filesystem scan,
+    used for skipping the files that haven't changed since then.
+    The state is discarded when the rules have changed
     """
-    for item in item_list:
-        if os.path.isdir(item):
-            find_modified_in_directory(item, timestamp, output_file)
-        else:
-            if is_recent_mtime(item, timestamp):  # pragma: no cover
-                output_file.write(item + '\n')
+    def __init__(self, state_file, rules_files):
+        self.state_file = state_file
+        self.rules = self._rules_digest(rules_files)
+        # The files from the last scan, the files found by this scan and those that must be scanned again
+        self.last_files = {}
+        self.files = {}
+        self.discarded = set()
+        try:
+            with open(state_file) as f:
+                state = json.load(f)
+            if state.get('rules') == self.rules:
+                self.last_files = state['files']
+            else:
+                logger.info("Rules have changed since the last scan, so all files will be scanned")
+        except (IOError, OSError):
+            logger.debug("File %s doesn't exist, so all files will be scanned", state_file)
+        except Exception as e:
+            logger.debug("Ignoring the scan state in %s: %s", state_file, str(e))
+
+    @staticmethod
+    def _rules_digest(rules_files):
+        digest = hashlib.sha256()
+        for rules_file in sorted(rules_files):
+            digest.update(rules_file.encode('utf-8'))
+            try:
+                with open(rules_file, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                        digest.update(chunk)
+            except (IOError, OSError):  # pragma: no cover
+                pass
+        return digest.hexdigest()
+
+    def is_changed(self, path, st):
+        """
+        Return True if the file at 'path' with the lstat result 'st' was added or changed since the last scan
+        """
+        entry = [st.st_size, st.st_mtime, st.st_ino]
+        self.files[path] = entry
+        return self.last_files.get(path) != entry
+
+    def discard(self, paths):
+        """
+        Forget the given files so the next scan doesn't skip them
+        """
+        self.discarded.update(paths)
+
+    def save(self):
+        """
+        Write the state of the files found by this scan, for the next one
+        """
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            files = dict((path, entry) for path, entry in self.files.items() if path not in self.discarded)
+            json.dump({'rules': self.rules, 'files': files}, f)
+        os.chmod(tmp_file, 0o600)
+        os.rename(tmp_file, self.state_file)
@@ -45,6 +45,9 @@ client:
     - name: insights.specs.Specs
       enabled: true
 
+  # "serial" or "parallel". With "parallel", each spec is submitted to a
+  # thread pool as soon as its dependencies have run; "args" are passed to
+  # the pool, e.g. "max_workers".
   run_strategy:
     name: serial
     args:
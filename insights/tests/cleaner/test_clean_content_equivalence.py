@@ -0,0 +1,194 @@
+import os
+import random
+import re
+import time
+
+from pytest import mark
+
+from insights.cleaner import Cleaner
+from insights.cleaner.filters import AllowFilter
+from insights.cleaner.password import DEFAULT_PASSWORD_REGEXS
+from insights.client.config import InsightsConfig
+
+HOSTNAME = "host1.example.com"
+KEYWORDS = ['secret', 'cret', 'keyword1', 'abc def']
+ALLOWLIST = {'kernel:': 3, 'error': 10, 'ret': 5, 'password': 2, 'abc': 1}
+PATTERNS = ['abc', 'ignore me', 'x=1']
+REGEX_PATTERNS = [r'^ignore.*', r'\d{4}-\d{2}', r'(ab|cd)\1', r'(?i)CASE']
+
+WORDS = [
+    'kernel:', 'error', 'secret', 'cret', 'keyword1', 'abc', 'def', 'x=1', 'ignore', 'me',
+    'password', 'password=abc123', 'password: "xyz"', 'password ** foo', '10.0.0.1',
+    '192.168.10.200', '127.0.0.1', '2a00:1:2::3', 'fe80::1', '52:54:00:ab:cd:ef',
+    '00:00:00:00:00:00', 'host1', 'host1.example.com', 'www.example.com', 'abab', 'CASE',
+    '2024-10', 'ret', '-', ':', '.', 'foo', 'bar', '1:2:3:4:5:6:7:8', 'AA-BB-CC-DD-EE-FF',
+    'a.example.com', 'example', 'com',
+]
+
+
+def _legacy_pattern(exclude, regex, line):
+    if not line:
+        return line
+    find = re.search if regex else lambda x, y: x in y
+    if any(find(pat, line) for pat in exclude):
+        return None
+    return line
+
+
+def _legacy_allow_filter(allowlist, line):
+    if not line:
+        return line
+    if allowlist:
+        for a_key in list(allowlist.keys()):
+            if a_key in line:
+                allowlist[a_key] -= 1
+                allowlist.pop(a_key) if allowlist[a_key] == 0 else None
+                return line
+
+
+def _legacy_keyword(kw_db, line):
+    if not line:
+        return line
+    for k, v in kw_db.items():
+        if k in line:
+            line = line.replace(k, v)
+    return line
+
+
+def _legacy_password(line):
+    if not line:
+        return line
+    for regex in DEFAULT_PASSWORD_REGEXS:
+        tmp_line = line
+        line = re.sub(regex, r"\1\2********", tmp_line)
+        if line != tmp_line:
+            break
+    return line
+
+
+def _legacy_ipv6(ipv6, line):
+    if not line:
+        return line
+    for ip in re.findall(ipv6.pattern, line, re.I):
+        if any(re.search(_i, ip[0], re.I) for _i in ipv6._ignore_list):
+            continue
+        new_ip = ipv6._ip2db(ip[0])
+        line = line.replace(ip[0], new_ip) if new_ip else line
+    return line
+
+
+def _legacy_mac(mac, line):
+    if not line:
+        return line
+    for m in re.findall(mac.pattern, line, re.I):
+        if not any(re.search(_i, m[0], re.I) for _i in mac._ignore_list):
+            new_mac = mac._mac2db(m[0])
+            line = line.replace(m[0], new_mac) if new_mac else line
+    return line
+
+
+def _legacy_hostname(hostname, line):
+    if not line:
+        return line
+    if hostname.pattern:
+        for hn in re.findall(hostname.pattern, line):
+            line = line.replace(hn, hostname._hn2db(hn))
+    if hostname._hostname in line:
+        line = line.replace(hostname._hostname, hostname._hn2db(hostname._hostname))
+    return line
+
+
+def _corpus(size, seed=0):
+    rand = random.Random(seed)
+    lines = []
+    for _ in range(size):
+        lines.append(' '.join(rand.choice(WORDS) for _ in range(rand.randint(0, 6))))
+    return lines
+
+
+def _legacy_clean_content(cleaner, lines, exclude, regex, allowlist):
+    # The same parsers chain as Cleaner.clean_content, the obfuscation
+    # databases are taken from a fresh Cleaner.
+    kw_db = cleaner.obfuscate['keyword']._kw_db
+    allowlist = dict(allowlist) if allowlist is not None else None
+    chain = []
+    if exclude:
+        chain.append(lambda l: _legacy_pattern(exclude, regex, l))
+    if allowlist is not None:
+        chain.append(lambda l: _legacy_allow_filter(allowlist, l))
+    for obf in set(cleaner.obfuscate.keys()) - set([]):
+        if obf == 'keyword':
+            chain.append(lambda l: _legacy_keyword(kw_db, l))
+        elif obf == 'password':
+            chain.append(_legacy_password)
+        elif obf == 'ipv6':
+            chain.append(lambda l: _legacy_ipv6(cleaner.obfuscate['ipv6'], l))
+        elif obf == 'mac':
+            chain.append(lambda l: _legacy_mac(cleaner.obfuscate['mac'], l))
+        elif obf == 'hostname':
+            chain.append(lambda l: _legacy_hostname(cleaner.obfuscate['hostname'], l))
+        else:
+            chain.append(cleaner.obfuscate[obf].parse_line)
+    result = []
+    for line in reversed(lines):
+        for parse in chain:
+            line = parse(line)
+        result.append(line) if line is not None else None
+    if result and any(l for l in result):
+        result.reverse()
+        return result
+    return []
+
+
+@mark.parametrize("regex", [False, True])
+@mark.parametrize("allowlist", [None, {}, ALLOWLIST])
+def test_clean_content_equivalence(regex, allowlist):
+    conf = InsightsConfig(obfuscate=True, obfuscate_hostname=True, obfuscation_list='ipv4,ipv6,mac,hostname')
+    exclude = {'regex': REGEX_PATTERNS} if regex else PATTERNS
+    rm_conf = {'keywords': KEYWORDS, 'patterns': exclude}
+    lines = _corpus(3000)
+
+    actual = Cleaner(conf, rm_conf, HOSTNAME).clean_content(list(lines), allowlist=allowlist)
+    expected = _legacy_clean_content(
+        Cleaner(conf, rm_conf, HOSTNAME),
+        list(lines),
+        REGEX_PATTERNS if regex else PATTERNS,
+        regex,
+        allowlist,
+    )
+    assert actual == expected
+
+
+def test_filter_content_equivalence():
+    lines = _corpus(3000, seed=1)
+    expected = []
+    allowlist = dict(ALLOWLIST)
+    for line in reversed(lines):
+        if _legacy_allow_filter(allowlist, line):
+            expected.append(line)
+    expected.reverse()
+    assert AllowFilter.filter_content(lines, ALLOWLIST) == expected
+    assert AllowFilter.filter_content(lines, {}) == []
+
+
+@mark.skipif(
+    not os.environ.get('TEST_CLEANER_BENCHMARK'),
+    reason="Throughput benchmark of the Cleaner. Use TEST_CLEANER_BENCHMARK=True to enable it",
+)
+def test_clean_content_benchmark():
+    conf = InsightsConfig(obfuscate=True, obfuscate_hostname=True, obfuscation_list='ipv4,ipv6,mac,hostname')
+    rm_conf = {'keywords': KEYWORDS, 'patterns': PATTERNS}
+    lines = _corpus(200000, seed=2)
+    allowlist = dict(('key%d' % i, 1000) for i in range(50))
+    allowlist.update(ALLOWLIST)
+
+    start = time.time()
+    Cleaner(conf, rm_conf, HOSTNAME).clean_content(list(lines), allowlist=allowlist)
+    current = time.time() - start
+
+    start = time.time()
+    _legacy_clean_content(Cleaner(conf, rm_conf, HOSTNAME), list(lines), PATTERNS, False, allowlist)
+    legacy = time.time() - start
+
+    print("Cleaner throughput: %.0f lines/s (legacy chain: %.0f lines/s)" % (len(lines) / current, len(lines) / legacy))
+    assert current < legacy
@@ -0,0 +1,88 @@
+import os
+import pytest
+import tempfile
+import time
+
+from insights.cleaner.ip import IPv4, IPv6
+from insights.cleaner.mac import Mac
+from insights.cleaner.utilities import ObfuscationDB
+
+CORPUS_SIZE = 100000
+
+
+def test_obfuscation_db():
+    db = ObfuscationDB(start=10)
+    assert len(db) == 0
+    assert db.add('a', db.next_value()) == 10
+    assert db.add('b', db.next_value()) == 11
+    assert 'a' in db
+    assert 10 not in db
+    assert db.get('b') == 11
+    assert db.get('c') is None
+    assert db.is_obfuscated(11)
+    assert not db.is_obfuscated('b')
+    assert list(db.items()) == [('a', 10), ('b', 11)]
+    assert len(db) == 2
+
+
+def test_ipv4_mapping_and_report():
+    ipv4 = IPv4()
+    assert ipv4.parse_line("10.0.2.15 192.168.1.1 10.0.2.15") == "10.230.230.2 10.230.230.1 10.230.230.2"
+    assert ipv4.parse_line("10.0.2.16") == "10.230.230.3"
+    assert ipv4.mapping() == [
+        {'original': '192.168.1.1', 'obfuscated': '10.230.230.1'},
+        {'original': '10.0.2.15', 'obfuscated': '10.230.230.2'},
+        {'original': '10.0.2.16', 'obfuscated': '10.230.230.3'},
+    ]
+
+    report_dir = tempfile.mkdtemp()
+    ipv4.generate_report(report_dir, 'test')
+    with open(os.path.join(report_dir, 'test-ipv4.csv')) as fp:
+        assert fp.read() == (
+            "Obfuscated IPv4,Original IPv4\n"
+            "10.230.230.1,192.168.1.1\n"
+            "10.230.230.2,10.0.2.15\n"
+            "10.230.230.3,10.0.2.16\n"
+        )
+
+
+def test_ipv6_mac_not_nested():
+    ipv6 = IPv6()
+    obf = ipv6._ip2db('2a00:1:2::3')
+    assert ipv6._ip2db('2a00:1:2::3') == obf
+    assert ipv6._ip2db(obf) is None
+
+    mac = Mac()
+    obf = mac._mac2db('10:20:02:15:f5:ab')
+    assert mac._mac2db('10:20:02:15:f5:ab') == obf
+    assert mac._mac2db(obf) is None
+
+
+@pytest.mark.skipif(
+    not os.environ.get('TEST_OBFUSCATION_DB_BENCHMARK'),
+    reason="Benchmark of the obfuscation lookups. Use TEST_OBFUSCATION_DB_BENCHMARK=True to enable it",
+)
+def test_benchmark_large_corpus():
+    # Every lookup is constant time, so 100k distinct addresses (plus a second
+    # round of repeated lookups) finish in a couple of seconds.  The previous
+    # linear scan per lookup took hours for a corpus of this size.
+    ipv4, ipv6, mac = IPv4(), IPv6(), Mac()
+    ips = ['172.{0}.{1}.{2}'.format(i >> 16 & 255, i >> 8 & 255, (i & 255) or 1) for i in range(CORPUS_SIZE)]
+    ip6s = ['2a00:{0:x}:{1:x}::1'.format(i >> 16, i & 0xFFFF) for i in range(CORPUS_SIZE)]
+    macs = ['52:54:00:{0:02x}:{1:02x}:{2:02x}'.format(i >> 16 & 255, i >> 8 & 255, i & 255) for i in range(CORPUS_SIZE)]
+
+    start = time.time()
+    for _ in range(2):
+        for ip in ips:
+            ipv4._ip2db(ip)
+        for ip in ip6s:
+            ipv6._ip2db(ip)
+        for m in macs:
+            mac._mac2db(m)
+    elapsed = time.time() - start
+
+    assert len(ipv4.mapping()) == len(set(ips))
+    assert len(ipv6.mapping()) == CORPUS_SIZE
+    assert len(mac.mapping()) == CORPUS_SIZE
+    assert ipv4.mapping()[-1]['obfuscated'] == ipv4._int2ip(ipv4._ip2int('10.230.230.1') + len(set(ips)) - 1)
+    assert elapsed < 60
@@ -0,0 +1,81 @@
+import pytest
+
+from unittest.mock import patch
+
+from insights.core import dr
+from insights.core.context import HostContext
+from insights.core.exceptions import ContentException
+from insights.core.plugins import datasource
+from insights.core.spec_factory import (
+    COMMAND_CACHE,
+    CommandCache,
+    CommandOutputProvider,
+    SAFE_ENV,
+    foreach_execute,
+)
+from insights.util import which
+
+
+@datasource(HostContext)
+def numbers(broker):
+    return [str(i) for i in range(100)]
+
+
+echo_numbers = foreach_execute(numbers, "echo 'number %s'")
+
+
+@pytest.fixture()
+def command_cache():
+    COMMAND_CACHE.clear()
+    yield COMMAND_CACHE
+    COMMAND_CACHE.clear()
+
+
+def test_command_cache():
+    cache = CommandCache()
+    assert cache.split("echo 'a b' c") == ["echo", "a b", "c"]
+    split = cache.split("echo 'a b' c")
+    split.append("d")
+    assert cache.split("echo 'a b' c") == ["echo", "a b", "c"]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    assert cache.which("echo", env=SAFE_ENV) == which("echo", env=SAFE_ENV)
+    assert cache.which("echo", env=SAFE_ENV) == which("echo", env=SAFE_ENV)
+    assert cache.which("echo", env={"PATH": "/nonexistent"}) is None
+    assert cache.which("echo", env={"PATH": "/nonexistent"}) is None
+    assert (cache.hits, cache.misses) == (4, 3)
+
+    cache.clear()
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_command_cache_max_size():
+    cache = CommandCache(max_size=2)
+    for cmd in ["echo 1", "echo 2", "echo 1", "echo 3"]:
+        cache.split(cmd)
+    # "echo 2" was the least recently used
+    assert list(cache._split) == ["echo 1", "echo 3"]
+    cache.split("echo 2")
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_command_provider(command_cache):
+    ctx = HostContext()
+    with patch("insights.core.spec_factory.which", side_effect=which) as mock_which:
+        for _ in range(3):
+            CommandOutputProvider("echo 'a b'", ctx)
+            with pytest.raises(ContentException):
+                CommandOutputProvider("no_such_command_for_the_test", ctx)
+    assert mock_which.call_count == 2
+    # the split and the which lookup of each command
+    assert (command_cache.hits, command_cache.misses) == (8, 4)
+
+
+def test_foreach_execute(command_cache):
+    broker = dr.Broker()
+    broker[HostContext] = HostContext()
+    with patch("insights.core.spec_factory.which", side_effect=which) as mock_which:
+        broker = dr.run(dr.get_dependency_graph(echo_numbers), broker)
+    assert len(broker[echo_numbers]) == 100
+    assert mock_which.call_count == 1
+    assert broker[echo_numbers][-1].content == ["number 99"]
@@ -0,0 +1,89 @@
+import os
+from collections import defaultdict
+
+import pytest
+from unittest.mock import patch
+
+from insights.cleaner import Cleaner
+from insights.client.config import InsightsConfig
+from insights.core import filters
+from insights.core.context import HostContext
+from insights.core.exceptions import ContentException
+from insights.core.filters import add_filter
+from insights.core.spec_factory import RegistryPoint, SpecSet, TextFileProvider, simple_file
+
+SAMPLE_FILE = "sample_file.log"
+CONTENT_LINES = 2000
+
+
+class Specs(SpecSet):
+    log_file = RegistryPoint(filterable=False)
+    log_file_wf = RegistryPoint(filterable=True)
+
+
+class Stuff(Specs):
+    log_file = simple_file(SAMPLE_FILE, context=HostContext)
+    log_file_wf = simple_file(SAMPLE_FILE, context=HostContext)
+
+
+@pytest.fixture()
+def reset_filters():
+    original_cache = filters._CACHE
+    original_filters = filters.FILTERS
+    filters._CACHE = {}
+    filters.FILTERS = defaultdict(dict)
+    yield
+    filters._CACHE = original_cache
+    filters.FILTERS = original_filters
+
+
+@pytest.fixture(scope="module")
+def sample_file(tmpdir_factory):
+    root = str(tmpdir_factory.mktemp("test_content_provider_write"))
+    with open(os.path.join(root, SAMPLE_FILE), 'wb') as fd:
+        for i in range(CONTENT_LINES):
+            fd.write(b'- %d from 10.0.%d.1 password=pass%d\n' % (i, i % 250, i))
+            if i % 100 == 0:
+                fd.write(b'\n- %d ends with CR\r\n' % i)
+                fd.write(b'- %d with CR\r in the middle\n' % i)
+        fd.write(b'- last line without new line')
+    return root
+
+
+def _write(root, dst, spec, stream):
+    conf = InsightsConfig(obfuscate=True, obfuscation_list='ipv4')
+    provider = TextFileProvider(
+        SAMPLE_FILE, root=root, ds=spec, ctx=HostContext(), cleaner=Cleaner(conf, {}, 'test.example.com')
+    )
+    with patch('insights.core.spec_factory.STREAM_WRITE_SIZE', 0 if stream else 2**62):
+        provider.write(dst)
+    with open(dst, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("max_size", [1024, 2**30])
+@pytest.mark.parametrize(
+    "spec, filters",
+    [
+        (Stuff.log_file, []),
+        (Stuff.log_file_wf, ["ends with", "99 from"]),
+        (Stuff.log_file_wf, ["no such line"]),
+    ],
+)
+def test_write_stream(tmpdir, reset_filters, sample_file, max_size, spec, filters):
+    for filter_kw in filters:
+        add_filter(spec, filter_kw, 2)
+
+    with patch('insights.core.spec_factory.MAX_CONTENT_SIZE', max_size):
+        try:
+            expected = _write(sample_file, str(tmpdir / 'loaded'), spec, False)
+        except ContentException as ce:
+            with pytest.raises(ContentException) as e:
+                _write(sample_file, str(tmpdir / 'streamed'), spec, True)
+            assert str(e.value) == str(ce)
+            assert not os.path.exists(str(tmpdir / 'streamed'))
+            return
+        actual = _write(sample_file, str(tmpdir / 'streamed'), spec, True)
+
+    assert actual == expected
+    assert b'********' in actual
@@ -0,0 +1,153 @@
+import os
+import pytest
+
+from glob import glob
+from unittest.mock import patch
+
+from insights.core import dr
+from insights.core.context import HostArchiveContext
+from insights.core.file_index import DIR, FILE, MISSING, FileIndex
+from insights.core.hydration import create_context, get_all_files
+from insights.core.spec_factory import first_file, glob_file, listdir, listglob, simple_file
+
+PATHS = [
+    "etc/hosts",
+    "etc/.hidden",
+    "etc/yum.repos.d/base.repo",
+    "etc/yum.repos.d/extra.repo",
+    "etc/yum.repos.d/notes.txt",
+    "etc/sysconfig/network-scripts/ifcfg-eth0",
+    "etc/sysconfig/network-scripts/ifcfg-lo",
+    "var/log/messages",
+    "var/log/messages-1",
+    "var/log/audit/audit.log",
+]
+
+PATTERNS = [
+    "etc/*",
+    "etc/.*",
+    "etc/*/*.repo",
+    "etc/yum.repos.d/*.repo",
+    "etc/sysconfig/*/ifcfg-*",
+    "etc/sysconfig/network-scripts/ifcfg-[el]*",
+    "*/*/*",
+    "var/log/messages*",
+    "var/log/audit/*",
+    "var/log/nothing*",
+    "etc/hosts",
+    "etc/hosts/*",
+    "etc/missing",
+    "missing/*",
+    "*",
+]
+
+
+@pytest.fixture()
+def archive(tmpdir):
+    root = str(tmpdir.join("insights-archive"))
+    for path in PATHS:
+        full = os.path.join(root, path)
+        if not os.path.isdir(os.path.dirname(full)):
+            os.makedirs(os.path.dirname(full))
+        with open(full, "w") as f:
+            f.write(path + "\n")
+    os.makedirs(os.path.join(root, "etc", "empty.d"))
+    open(os.path.join(root, "insights_commands"), "w").close()
+    return root
+
+
+def _link(root):
+    os.symlink(os.path.join(root, "etc", "yum.repos.d"), os.path.join(root, "etc", "repos"))
+    os.symlink("hosts", os.path.join(root, "etc", "hosts.link"))
+
+
+def test_file_index(archive):
+    index = FileIndex(archive)
+    assert sorted(index.files) == sorted(get_all_files(archive))
+    assert index.kind(archive) == DIR
+    assert index.kind(os.path.join(archive, "etc", "hosts")) == FILE
+    assert index.kind(os.path.join(archive, "etc", "empty.d")) == DIR
+    assert index.kind(os.path.join(archive, "etc", "missing")) == MISSING
+    assert index.kind(os.path.join(archive, "etc", "hosts", "x")) == MISSING
+    assert index.kind(os.path.join(archive, "etc", "..", "etc", "hosts")) is None
+    assert index.kind(os.path.join(archive, "etc", "hosts", "")) is None
+    assert index.kind("/etc/hosts") is None
+
+    assert index.listdir(os.path.join(archive, "etc", "empty.d")) == []
+    assert index.listdir(archive) == sorted(os.listdir(archive))
+    with pytest.raises(OSError):
+        index.listdir(os.path.join(archive, "missing"))
+    with pytest.raises(OSError):
+        index.listdir(os.path.join(archive, "etc", "hosts"))
+
+    for pattern in PATTERNS:
+        pattern = os.path.join(archive, pattern)
+        assert index.glob(pattern) == sorted(glob(pattern)), pattern
+
+
+def test_file_index_links(archive):
+    _link(archive)
+    index = FileIndex(archive)
+    assert index.kind(os.path.join(archive, "etc", "repos")) is None
+    assert index.kind(os.path.join(archive, "etc", "repos", "base.repo")) is None
+    assert index.isdir(os.path.join(archive, "etc", "hosts.link")) is None
+    assert index.glob(os.path.join(archive, "etc", "*", "*.repo")) is None
+    assert index.glob(os.path.join(archive, "etc", "hosts*")) == sorted(glob(os.path.join(archive, "etc", "hosts*")))
+
+
+def _run(ctx, specs):
+    broker = dr.Broker()
+    broker[HostArchiveContext] = ctx
+    return dr.run(specs, broker)
+
+
+@pytest.mark.parametrize("links", [False, True])
+def test_datasources(archive, links):
+    if links:
+        _link(archive)
+    specs = [glob_file(p) for p in PATTERNS] + [
+        glob_file("etc/repos/*.repo"),
+        simple_file("etc/hosts"),
+        simple_file("etc/hosts.link"),
+        simple_file("etc/missing"),
+        simple_file("etc/yum.repos.d"),
+        first_file(["etc/missing", "etc/repos/base.repo", "etc/hosts"]),
+        listdir("etc/yum.repos.d"),
+        listdir("etc/repos"),
+        listdir("etc/missing"),
+        listglob("etc/*"),
+        listglob("var/log/*"),
+    ]
+    ctx = create_context(archive)
+    assert ctx.file_index is not None
+    indexed = _run(ctx, specs)
+
+    plain = HostArchiveContext(ctx.root, all_files=ctx.all_files)
+    with patch("insights.core.file_index.FileIndex.kind", side_effect=AssertionError):
+        expected = _run(plain, specs)
+
+    for spec in specs:
+        if spec in expected:
+            value = expected[spec]
+            if isinstance(value, list) and value and not isinstance(value[0], str):
+                assert [p.path for p in indexed[spec]] == [p.path for p in value]
+            elif hasattr(value, "path"):
+                assert indexed[spec].path == value.path
+            else:
+                assert indexed[spec] == value
+        else:
+            assert spec not in indexed
+
+
+def test_datasources_no_filesystem(archive):
+    ctx = create_context(archive)
+    specs = [glob_file("etc/yum.repos.d/*.repo"), simple_file("etc/missing"), listglob("var/log/*"),
+             first_file(["etc/missing", "etc/none", "etc/hosts"])]
+    with patch("os.path.exists", side_effect=AssertionError), \
+            patch("os.path.realpath", side_effect=AssertionError), \
+            patch("os.path.isdir", side_effect=AssertionError):
+        broker = _run(ctx, specs)
+    assert len(broker[specs[0]]) == 2
+    assert specs[1] not in broker
+    assert broker[specs[2]] == ["var/log/audit", "var/log/messages", "var/log/messages-1"]
+    assert broker[specs[3]].relative_path == "etc/hosts"
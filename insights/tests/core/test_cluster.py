@@ -0,0 +1,131 @@
+import logging
+import os
+import sys
+import types
+
+try:
+    import ansible  # noqa: F401
+except ImportError:
+    # ansible is only used to parse the inventories, which aren't tested here.
+    for name, attr in [("ansible.parsing.dataloader", "DataLoader"), ("ansible.inventory.manager", "InventoryManager")]:
+        module = sys.modules[name] = types.ModuleType(name)
+        setattr(module, attr, None)
+
+from insights.core import dr  # noqa: E402
+from insights.core.cluster import (  # noqa: E402
+    get_facts, machine_id, merge_facts, process_archives, process_archives_parallel, process_cluster
+)
+from insights.core.context import HostArchiveContext  # noqa: E402
+from insights.core.plugins import combiner, datasource, fact  # noqa: E402
+from insights.specs import insights_archive  # noqa: E402, F401
+
+HOSTS = {
+    "one": {"insights_commands/hostname_-f": "one.example.com", "etc/redhat-release": "8.9"},
+    "two": {"insights_commands/hostname_-f": "two.example.com", "etc/redhat-release": "9.3"},
+    "anonymous": {"insights_commands/uname_-a": "Linux", "etc/redhat-release": "9.3"},
+}
+
+
+@datasource(HostArchiveContext)
+def release_file(broker):
+    with open(os.path.join(broker[HostArchiveContext].root, "etc", "redhat-release")) as f:
+        return f.read().strip()
+
+
+@fact(release_file)
+def release(rel):
+    return {"release": rel}
+
+
+@fact(release_file)
+def packages(rel):
+    return [{"package": "kernel", "release": rel}, {"package": "bash", "release": rel}]
+
+
+@combiner(release, packages, cluster=True)
+def cluster_report(releases, pkgs):
+    return {"releases": releases, "packages": pkgs}
+
+
+def _archives(tmpdir):
+    archives = []
+    for host, files in sorted(HOSTS.items()):
+        for name, content in files.items():
+            tmpdir.join(host, name).write(content, ensure=True)
+        archives.append(str(tmpdir.join(host)))
+    return archives
+
+
+def _host_graph():
+    graph = dr.get_dependency_graph(release)
+    graph.update(dr.get_dependency_graph(packages))
+    graph.update(dr.get_dependency_graph(machine_id))
+    return graph
+
+
+def _rows(frame, ids=None):
+    return sorted(
+        tuple(sorted(r.items())) for r in frame.to_dict("records")
+        if ids is None or r["machine_id"] in ids
+    )
+
+
+def test_get_facts(tmpdir):
+    archives = _archives(tmpdir)
+    facts = [get_facts(b) for b in process_archives(_host_graph(), archives[1:2])]
+    assert facts == [{
+        dr.get_name(release): [{"release": "8.9", "machine_id": "one.example.com"}],
+        dr.get_name(packages): [
+            {"package": "kernel", "release": "8.9", "machine_id": "one.example.com"},
+            {"package": "bash", "release": "8.9", "machine_id": "one.example.com"},
+        ],
+    }]
+
+    merged = merge_facts(facts * 2)
+    assert set(merged) == set([release, packages])
+    assert len(merged[release]) == 2
+    assert len(merged[packages]) == 4
+
+
+def test_process_archives_parallel(tmpdir):
+    archives = _archives(tmpdir)
+    facts = list(process_archives_parallel(_host_graph(), archives, processes=2, max_archives_per_worker=1))
+    # The archive without a hostname is identified by its position.
+    assert sorted(f[dr.get_name(release)][0]["machine_id"] for f in facts) == [
+        "0", "one.example.com", "two.example.com"
+    ]
+
+
+def test_process_archives_parallel_unnamed(tmpdir, caplog):
+    @fact(release_file)
+    def local(rel):
+        return {"local": rel}
+
+    graph = _host_graph()
+    graph.update(dr.get_dependency_graph(local))
+    archives = _archives(tmpdir)
+    with caplog.at_level(logging.WARNING):
+        facts = list(process_archives_parallel(graph, archives, processes=2))
+    assert "Processing the cluster archives serially" in caplog.text
+    assert sorted(f[dr.get_name(local)][0]["local"] for f in facts) == ["8.9", "9.3", "9.3"]
+
+
+def test_process_cluster(tmpdir):
+    archives = _archives(tmpdir)
+    graph = dr.get_dependency_graph(cluster_report)
+    graph.update(dr.get_dependency_graph(machine_id))
+    serial = process_cluster(graph, archives, dr.Broker())[cluster_report]
+    parallel = process_cluster(graph, archives, dr.Broker(), processes=2)[cluster_report]
+
+    # Hosts without a machine id or hostname get a counter in the serial path
+    # and their position in the parallel one.
+    ids = set(["one.example.com", "two.example.com"])
+    for name in ("releases", "packages"):
+        assert len(serial[name]) == len(parallel[name])
+        assert _rows(serial[name], ids) == _rows(parallel[name], ids)
+        assert _rows(serial[name].drop(columns="machine_id")) == _rows(parallel[name].drop(columns="machine_id"))
+    assert _rows(parallel["releases"]) == [
+        (("machine_id", "0"), ("release", "9.3")),
+        (("machine_id", "one.example.com"), ("release", "8.9")),
+        (("machine_id", "two.example.com"), ("release", "9.3")),
+    ]
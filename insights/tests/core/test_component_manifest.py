@@ -0,0 +1,140 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import insights
+
+MODULES = {
+    "__init__.py": "",
+    "specs.py": """
+        from insights.core.spec_factory import RegistryPoint, SpecSet
+
+        class Specs(SpecSet):
+            one = RegistryPoint()
+            two = RegistryPoint()
+    """,
+    "impl/__init__.py": "",
+    "impl/default.py": """
+        from insights.core.spec_factory import simple_file
+        from manifest_pkg.specs import Specs
+
+        class DefaultSpecs(Specs):
+            one = simple_file("/etc/one")
+    """,
+    "impl/other.py": """
+        from insights.core.spec_factory import simple_file
+        from manifest_pkg.specs import Specs
+
+        class OtherSpecs(Specs):
+            two = simple_file("/etc/two")
+    """,
+    "parsers/__init__.py": "",
+    "parsers/one.py": """
+        from insights.core import Parser
+        from insights.core.plugins import parser
+        from manifest_pkg.specs import Specs
+
+        @parser(Specs.one)
+        class One(Parser):
+            def parse_content(self, content):
+                pass
+    """,
+    "parsers/two.py": """
+        from insights.core import Parser
+        from insights.core.plugins import parser
+        from manifest_pkg.specs import Specs
+
+        @parser(Specs.two)
+        class Two(Parser):
+            def parse_content(self, content):
+                pass
+    """,
+    "rules.py": """
+        from insights.core.plugins import rule, make_pass
+        from manifest_pkg.parsers.one import One
+
+        @rule(One)
+        def report(one):
+            return make_pass("ONE")
+    """,
+}
+
+PATHS = ["manifest_pkg.impl", "manifest_pkg.parsers"]
+
+LOAD = """
+import json, sys
+from insights.core import dr
+from manifest_pkg.rules import report
+loaded = dr.load_components(*%r, manifest=sys.argv[1], components=[report])
+print(json.dumps([loaded, sorted(m for m in sys.modules if m.startswith("manifest_pkg."))]))
+"""
+
+
+@pytest.fixture
+def package(tmpdir):
+    for name, content in MODULES.items():
+        path = tmpdir.join("manifest_pkg", name)
+        path.dirpath().ensure(dir=True)
+        path.write(textwrap.dedent(content))
+    return str(tmpdir)
+
+
+def _python(package, code, *args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([package, os.path.dirname(os.path.dirname(insights.__file__))])
+    return subprocess.check_output([sys.executable, "-c", code] + list(args), env=env, cwd=package)
+
+
+def _build(package):
+    manifest = os.path.join(package, "manifest.json")
+    code = "import json, sys; from insights.core import dr; json.dump(dr.build_manifest(*%r), open(sys.argv[1], 'w'))"
+    _python(package, code % (PATHS,), manifest)
+    return manifest
+
+
+def _load(package, manifest):
+    return json.loads(_python(package, LOAD % (PATHS,), manifest).decode("utf-8"))
+
+
+def test_component_manifest(package):
+    manifest = _build(package)
+    with open(manifest) as f:
+        data = json.load(f)
+    assert sorted(data["modules"]) == [
+        "manifest_pkg.impl", "manifest_pkg.impl.default", "manifest_pkg.impl.other",
+        "manifest_pkg.parsers", "manifest_pkg.parsers.one", "manifest_pkg.parsers.two",
+    ]
+    one = data["components"]["manifest_pkg.specs.Specs.one"]
+    assert one["module"] == "manifest_pkg.specs"
+    assert one["type"] == "insights.core.plugins.datasource"
+    assert one["dependencies"] == ["manifest_pkg.impl.default.DefaultSpecs.one"]
+
+    # only the implementation of the spec the rule needs is imported
+    loaded, modules = _load(package, manifest)
+    assert loaded == 2
+    assert "manifest_pkg.impl.default" in modules
+    assert "manifest_pkg.impl.other" not in modules
+    assert "manifest_pkg.parsers.two" not in modules
+
+    # a changed module makes the manifest stale
+    with open(os.path.join(package, "manifest_pkg", "parsers", "two.py"), "a") as f:
+        f.write("\n# changed\n")
+    loaded, modules = _load(package, manifest)
+    assert loaded == 6
+    assert "manifest_pkg.impl.other" in modules
+
+
+def test_component_manifest_new_module(package):
+    manifest = _build(package)
+    with open(os.path.join(package, "manifest_pkg", "parsers", "three.py"), "w") as f:
+        f.write("")
+    loaded, modules = _load(package, manifest)
+    assert "manifest_pkg.parsers.three" in modules
+    assert "manifest_pkg.impl.other" in modules
+
+    loaded, modules = _load(package, os.path.join(package, "missing.json"))
+    assert "manifest_pkg.impl.other" in modules
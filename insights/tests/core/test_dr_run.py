@@ -1,5 +1,9 @@
 import os
 import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
 from insights import run, make_fail, make_pass
 from insights.core import dr
 from insights.plugins import always_fires, never_fires
@@ -61,6 +65,171 @@ def test_run_incremental():
     assert len(brokers) == 3
 
 
+def test_execution_plan():
+    graph = dr.get_dependency_graph(stage3)
+    graph.update(dr.get_dependency_graph(stage4))
+    plan = dr.get_execution_plan(graph)
+    assert dr.get_execution_plan(dict(graph)) is plan
+    assert dr.get_execution_plan(plan.graph) is plan
+    assert dr.get_execution_plan(plan) is plan
+    assert plan.order.index("common") < plan.order.index(stage3)
+    assert [set(p.graph) for p in plan.subgraphs()] == [set(plan.graph)]
+    assert dr.get_execution_plan([stage3, stage4]) is dr.get_execution_plan([stage3, stage4])
+
+    with patch("insights.core.dr.run_order", side_effect=dr.run_order) as run_order:
+        for _ in range(3):
+            broker = dr.Broker()
+            broker["common"] = 3
+            broker = dr.run(plan.graph, broker)
+            assert broker[stage3] == 3
+        assert not run_order.called
+
+    # registering, enabling or disabling components invalidates the plans
+    @stage("common")
+    def stage5(common):
+        return common
+
+    assert dr.get_execution_plan(graph) is not plan
+    plan = dr.get_execution_plan(graph)
+    dr.set_enabled(stage3, False)
+    try:
+        assert dr.get_execution_plan(graph) is not plan
+        broker = dr.Broker()
+        broker["common"] = 3
+        broker = dr.run(graph, broker)
+        assert stage3 not in broker
+        assert broker[stage4] == 3
+    finally:
+        dr.set_enabled(stage3)
+
+
+def test_run_lazy():
+    loaded = []
+
+    def loader(comp, broker):
+        loaded.append(comp)
+        broker[comp] = 3
+
+    broker = dr.Broker()
+    broker.add_lazy("common", loader)
+    broker.add_lazy("dep1", lambda comp, broker: loaded.append(comp))
+    assert "common" not in broker.instances
+
+    broker = dr.run(dr.get_dependency_graph(stage3), broker)
+    assert broker[stage3] == 3
+    assert loaded == ["common"]
+
+    # a loader that sets nothing leaves the component missing
+    assert "dep1" not in broker
+    assert loaded == ["common", "dep1"]
+    assert not broker.lazy
+
+
+def test_lazy_lookup_while_loading():
+    started = threading.Event()
+
+    def loader(comp, broker):
+        started.set()
+        time.sleep(0.1)
+        broker[comp] = 1
+
+    broker = dr.Broker()
+    broker.add_lazy("common", loader)
+    thread = threading.Thread(target=broker.get, args=("common",))
+    thread.start()
+    started.wait(5)
+    # the other thread is still loading it, the lookups wait for it
+    assert "common" in broker
+    assert broker["common"] == 1
+    thread.join()
+
+
+SLOW_TIMES = {}
+
+
+def _sleep(name):
+    start = time.time()
+    time.sleep(0.2)
+    SLOW_TIMES[name] = (start, time.time())
+    return threading.current_thread().name
+
+
+@stage("common")
+def slow_left(common):
+    return _sleep("left")
+
+
+@stage("common")
+def slow_right(common):
+    return _sleep("right")
+
+
+@stage(slow_left, slow_right)
+def joined(left, right):
+    return (left, right)
+
+
+@stage("common")
+def boom(common):
+    raise Exception("boom")
+
+
+@stage(boom)
+def after_boom(b):
+    return "unreachable"
+
+
+def test_run_parallel():
+    graph = dr.get_dependency_graph(joined)
+    graph.update(dr.get_dependency_graph(after_boom))
+
+    fired = []
+    broker = dr.Broker()
+    broker["common"] = 3
+    broker.add_observer(lambda c, b: fired.append(c), stage)
+    SLOW_TIMES.clear()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        broker = dr.run(graph, broker, pool=pool)
+
+    # the independent slow components ran side by side
+    starts, ends = zip(*SLOW_TIMES.values())
+    assert max(starts) < min(ends)
+    left, right = broker[joined]
+    assert left != right
+    assert fired.index(joined) > max(fired.index(slow_left), fired.index(slow_right))
+    assert set(fired) == set([slow_left, slow_right, joined, boom, after_boom])
+
+    assert boom in broker.exceptions
+    assert after_boom not in broker
+    assert after_boom in broker.missing_requirements
+    assert joined in broker.exec_times
+
+
+def test_run_parallel_matches_serial():
+    graph = dr.get_dependency_graph(stage3)
+    graph.update(dr.get_dependency_graph(stage4))
+    graph.update(dr.get_dependency_graph(after_boom))
+
+    serial = dr.Broker()
+    serial["common"] = 3
+    serial = dr.run(dict(graph), serial)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        brokers = dr.run_all(dict(graph), dr.Broker(), pool)
+    assert len(brokers) == 1
+    # "common" is missing, so everything is skipped like a serial run
+    assert set(brokers[0].missing_requirements) == set([stage3, stage4, boom, after_boom])
+
+    parallel = dr.Broker()
+    parallel["common"] = 3
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        parallel = dr.run(dict(graph), parallel, pool=pool)
+
+    assert parallel.instances == serial.instances
+    assert set(parallel.exceptions) == set(serial.exceptions)
+    assert set(parallel.missing_requirements) == set(serial.missing_requirements)
+
+
 ALWAYS_FIRES_RESULT = make_pass("ALWAYS_FIRES", kernel="this is junk")
 NEVER_FIRES_RESULT = {
     'rule_fqdn': 'insights.plugins.never_fires.report',
@@ -121,6 +290,16 @@ def test_run_command(tmpdir):
         assert Specs.uname in broker
         assert broker[Specs.uname].content == [UNAME]
 
+    broker = run(
+        [Specs.redhat_release, always_fires.report, never_fires.report],
+        root=tmpdir.strpath,
+        parallel=True,
+        max_workers=2,
+    )
+    assert broker[always_fires.report] == ALWAYS_FIRES_RESULT
+    assert broker[never_fires.report] == NEVER_FIRES_RESULT
+    assert broker[Specs.redhat_release].content == [REDHAT_RELEASE]
+
 
 SAMPLE_LOG = """
 1 line one
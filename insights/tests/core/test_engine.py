@@ -0,0 +1,97 @@
+import os
+import tarfile
+
+import pytest
+
+from insights import Engine, Parser, make_info, parser, rule
+from insights.core.context import HostArchiveContext
+from insights.core.dr import get_name
+from insights.core.spec_factory import simple_file
+
+hostname = simple_file("etc/hostname", context=HostArchiveContext)
+
+
+@rule(hostname)
+def report(hostname):
+    return make_info("HOST", name=hostname.content[0], pid=os.getpid())
+
+
+@rule(hostname)
+def broken(hostname):
+    raise Exception("broken")
+
+
+@parser(hostname)
+class Hostname(Parser):
+    def parse_content(self, content):
+        self.name = content[0]
+
+
+@rule(Hostname)
+def parsed(hostname):
+    return make_info("HOST", name=hostname.name)
+
+
+def pids(broker):
+    return broker[report]["pid"]
+
+
+@pytest.fixture
+def archives(tmpdir):
+    paths = []
+    for name in ("one", "two", "three"):
+        root = tmpdir.join(name)
+        root.join("etc", "hostname").write(name + "\n", ensure=True)
+        root.join("insights_commands", "hostname").write(name + "\n", ensure=True)
+        paths.append(str(root))
+    tar = str(tmpdir.join("three.tar.gz"))
+    with tarfile.open(tar, "w:gz") as t:
+        t.add(paths[-1], arcname="three")
+    paths[-1] = tar
+    return paths
+
+
+def test_engine(archives):
+    with Engine([report, get_name(broken)], load_default=False) as engine:
+        with open(archives[-1], "rb") as f:
+            results = list(engine.process(archives + [f, "/missing.tar.gz"]))
+
+    assert [r.archive for r in results] == archives + [archives[-1], "/missing.tar.gz"]
+    for name, result in zip(["one", "two", "three", "three"], results):
+        assert result.error is None
+        assert result.result[get_name(report)]["name"] == name
+        assert get_name(broken) not in result.result
+        assert list(result.errors) == [get_name(broken)]
+        assert "broken" in result.errors[get_name(broken)][0]
+        assert set(result.timings) == set(["extract", "run", "total"])
+    assert results[-1].result is None
+    assert "InvalidContentType" in results[-1].error
+    assert set(results[-1].to_dict()) == set(["archive", "result", "errors", "error", "timings", "parser_cache"])
+
+
+def test_engine_processes(archives):
+    with Engine(report, load_default=False, processes=1, handler=pids) as engine:
+        results = list(engine.process(archives))
+    assert all(r.error is None for r in results)
+    assert len(set(r.result for r in results)) == 1
+    assert results[0].result != os.getpid()
+
+    with Engine(report, load_default=False, processes=1, max_archives_per_worker=1, handler=pids) as engine:
+        results = list(engine.process(archives))
+    assert len(set(r.result for r in results)) == 3
+
+
+def test_engine_filter_members(archives, tmpdir):
+    extract_dir = str(tmpdir.mkdir("extract"))
+    with Engine(report, load_default=False, filter_members=True, extract_dir=extract_dir) as engine:
+        assert engine.members.patterns == ["etc/hostname"]
+        result = engine.process_one(archives[-1])
+    assert result.error is None
+    assert result.result[get_name(report)]["name"] == "three"
+
+
+def test_engine_parser_cache(archives, tmpdir):
+    with Engine(parsed, load_default=False, parser_cache=str(tmpdir.mkdir("cache"))) as engine:
+        results = list(engine.process(archives[:1] * 2))
+    assert [r.parser_cache for r in results] == [{"misses": 1}, {"hits": 1}]
+    assert results[1].result[get_name(parsed)]["name"] == "one"
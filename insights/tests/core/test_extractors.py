@@ -1,12 +1,21 @@
+import io
 import os
 import shlex
+import stat
 import subprocess
+import tarfile
 import tempfile
 import zipfile
 from contextlib import closing
 
-from insights.core.hydration import get_all_files
-from insights.core.archives import extract
+import pytest
+
+from insights.core import dr
+from insights.core.archives import MemberFilter, extract
+from insights.core.context import HostArchiveContext
+from insights.core.hydration import create_context, get_all_files
+from insights.core.plugins import datasource
+from insights.core.spec_factory import archive_patterns, first_file, glob_file, listdir, simple_file
 
 
 def test_with_zip():
@@ -46,3 +55,149 @@ def test_with_zip():
         os.unlink("/tmp/test.zip")
 
     subprocess.call(shlex.split("rm -rf %s" % tmp_dir))
+
+
+FILES = {
+    "insights_commands/uname_-a": "Linux",
+    "insights_commands/hostname": "host",
+    "etc/hosts": "127.0.0.1 localhost",
+    "etc/yum.repos.d/base.repo": "[base]",
+    "etc/yum.repos.d/notes.txt": "notes",
+    "var/log/messages": "log",
+    "real/file": "real",
+}
+
+LINKS = {
+    "etc/hosts.link": "hosts",
+    "etc/passwd": "/etc/passwd",
+    "etc/outside": "../../../outside",
+    "var/linked": "../real",
+}
+
+PATTERNS = ["/etc/hosts.link", "etc/yum.repos.d/*.repo", "var/linked/*", "etc/passwd", "etc/outside"]
+
+
+def _add(archive, name, data=None, link=None):
+    if isinstance(archive, tarfile.TarFile):
+        info = tarfile.TarInfo(name)
+        if link is not None:
+            info.type = tarfile.SYMTYPE
+            info.linkname = link
+            archive.addfile(info)
+        else:
+            data = data.encode("utf-8")
+            info.size = len(data)
+            info.mode = 0o644
+            archive.addfile(info, io.BytesIO(data))
+    else:
+        info = zipfile.ZipInfo(name)
+        if link is not None:
+            info.external_attr = (stat.S_IFLNK | 0o777) << 16
+            archive.writestr(info, link)
+        else:
+            info.external_attr = (stat.S_IFREG | 0o644) << 16
+            archive.writestr(info, data)
+
+
+@pytest.fixture(params=["tar", "zip"])
+def archive(request, tmpdir):
+    path = str(tmpdir.join("archive." + ("tar.gz" if request.param == "tar" else "zip")))
+    if request.param == "tar":
+        archive = tarfile.open(path, "w:gz")
+    else:
+        archive = zipfile.ZipFile(path, "w")
+    with closing(archive):
+        for name, data in FILES.items():
+            _add(archive, "insights-host/" + name, data)
+        for name, link in LINKS.items():
+            _add(archive, "insights-host/" + name, link=link)
+        _add(archive, "../escaped", "escaped")
+        _add(archive, "/absolute", "absolute")
+        _add(archive, "insights-host/sys/dev/null", "null")
+    return path
+
+
+def _extracted(tmp_dir):
+    return sorted(os.path.relpath(f, tmp_dir) for f in get_all_files(tmp_dir))
+
+
+def test_member_filter(archive, tmpdir):
+    extract_dir = str(tmpdir.mkdir("extract"))
+    with extract(archive, extract_dir=extract_dir, members=MemberFilter(PATTERNS)) as ex:
+        root = os.path.join(ex.tmp_dir, "insights-host")
+        assert _extracted(ex.tmp_dir) == [
+            "insights-host/etc/hosts",
+            "insights-host/etc/yum.repos.d/base.repo",
+            "insights-host/insights_commands/uname_-a",
+            "insights-host/real/file",
+        ]
+        assert os.path.islink(os.path.join(root, "etc", "hosts.link"))
+        with open(os.path.join(root, "var", "linked", "file")) as f:
+            assert f.read() == "real"
+        assert not os.path.lexists(os.path.join(root, "etc", "passwd"))
+        assert not os.path.lexists(os.path.join(root, "etc", "outside"))
+        assert not os.path.lexists(os.path.join(root, "var", "log", "messages"))
+        assert os.listdir(extract_dir) == [os.path.basename(ex.tmp_dir)]
+
+        ctx = create_context(ex.tmp_dir)
+        assert isinstance(ctx, HostArchiveContext)
+        assert ctx.root == root
+    assert os.listdir(extract_dir) == []
+
+
+def test_member_filter_links_through_links(tmpdir):
+    path = str(tmpdir.join("archive.tar"))
+    with closing(tarfile.open(path, "w")) as archive:
+        _add(archive, "insights-host/insights_commands/hostname", "host")
+        _add(archive, "insights-host/etc/hosts", "127.0.0.1 localhost")
+        info = tarfile.TarInfo("insights-host/w")
+        info.type = tarfile.DIRTYPE
+        archive.addfile(info)
+        _add(archive, "insights-host/p/q/d", link="../../w")
+        _add(archive, "insights-host/p/q/d/e", link="../../../../etc/passwd")
+        _add(archive, "insights-host/p/q/up", link="../../../insights-host")
+        info = tarfile.TarInfo("insights-host/p/q/up/etc/passwd")
+        info.type = tarfile.LNKTYPE
+        info.linkname = "insights-host/p/q/up/../../../etc/passwd"
+        archive.addfile(info)
+        info = tarfile.TarInfo("insights-host/etc/hosts.hard")
+        info.type = tarfile.LNKTYPE
+        info.linkname = "insights-host/etc/hosts"
+        archive.addfile(info)
+
+    with extract(path, extract_dir=str(tmpdir), members=MemberFilter(["p/q/*", "p/q/d/e", "p/q/up/etc/passwd", "etc/*"])) as ex:
+        root = os.path.join(ex.tmp_dir, "insights-host")
+        assert os.path.realpath(os.path.join(root, "p", "q", "d")) == os.path.join(os.path.realpath(root), "w")
+        assert not os.path.lexists(os.path.join(root, "w", "e"))
+        assert os.path.realpath(os.path.join(root, "p", "q", "up")) == os.path.realpath(root)
+        assert not os.path.lexists(os.path.join(root, "p", "q", "up", "etc", "passwd"))
+        with open(os.path.join(root, "etc", "hosts.hard")) as f:
+            assert f.read() == "127.0.0.1 localhost"
+        for f in get_all_files(ex.tmp_dir):
+            assert os.path.realpath(f).startswith(os.path.realpath(ex.tmp_dir) + os.sep)
+
+
+def test_member_filter_unfiltered():
+    names = ["a/insights_archive.txt", "a/data/etc/hosts"]
+    assert MemberFilter(["etc/hosts"]).select(names) is None
+    assert MemberFilter(["etc/hosts"]).select(["a/etc/hosts", "a/etc/other"]) is None
+
+
+def test_archive_patterns():
+    path = simple_file("/etc/hosts", context=HostArchiveContext)
+    repos = glob_file(["etc/yum.repos.d/*.repo"], context=HostArchiveContext)
+    files = first_file(["/etc/a", "/etc/b"], context=HostArchiveContext)
+    logs = listdir("/var/log", context=HostArchiveContext)
+    graph = dr.get_dependency_graph(path)
+    for ds in (repos, files, logs):
+        graph.update(dr.get_dependency_graph(ds))
+    assert archive_patterns(graph) == [
+        "etc/a", "etc/b", "etc/hosts", "etc/yum.repos.d/*.repo", "var/log/*",
+    ]
+
+    @datasource(HostArchiveContext)
+    def custom(broker):
+        pass
+
+    graph.update(dr.get_dependency_graph(custom))
+    assert archive_patterns(graph) is None
@@ -0,0 +1,111 @@
+import os
+
+from insights import package_info
+from insights.core import Parser, dr, parser_cache
+from insights.core.parser_cache import ParserCache, _imported_modules, parser_version
+from insights.core.plugins import datasource, parser
+from insights.tests import context_wrap
+
+CALLS = []
+
+
+@datasource()
+def hosts():
+    pass
+
+
+@parser(hosts)
+class Hosts(Parser):
+    def parse_content(self, content):
+        CALLS.append(self.__class__)
+        self.names = set(l.split()[1] for l in content)
+
+
+@parser(hosts, cache=False)
+class NotCached(Hosts):
+    pass
+
+
+@parser(hosts)
+class Unpicklable(Hosts):
+    def parse_content(self, content):
+        super(Unpicklable, self).parse_content(content)
+        self.func = lambda: None
+
+
+CONTENT = """
+127.0.0.1 localhost
+10.0.0.1 one
+""".strip()
+
+
+def _run(cache, value):
+    del CALLS[:]
+    broker = dr.Broker()
+    broker.parser_cache = cache
+    broker[hosts] = value
+    return dr.run([Hosts, NotCached, Unpicklable], broker=broker)
+
+
+def test_parser_cache(tmpdir):
+    cache = ParserCache(str(tmpdir))
+    broker = _run(cache, context_wrap(CONTENT, path="/etc/hosts"))
+    assert broker[Hosts].names == set(["localhost", "one"])
+    assert set(CALLS) == set([Hosts, NotCached, Unpicklable])
+    assert dict(broker.parser_cache_stats) == {"misses": 2}
+
+    broker = _run(cache, context_wrap(CONTENT, path="/etc/hosts"))
+    assert set(CALLS) == set([NotCached, Unpicklable])
+    assert broker.parser_cache_stats["hits"] == 1
+    assert broker[Hosts].names == set(["localhost", "one"])
+    assert broker[Hosts].file_path == "/etc/hosts"
+
+    # other content, other path or a list of inputs
+    broker = _run(cache, context_wrap(CONTENT + "\n10.0.0.2 two", path="/etc/hosts"))
+    assert broker[Hosts].names == set(["localhost", "one", "two"])
+    broker = _run(cache, [context_wrap(CONTENT, path="/etc/hosts"), context_wrap(CONTENT, path="/etc/hosts.bak")])
+    assert broker.parser_cache_stats["hits"] == 1
+    assert [h.file_path for h in broker[Hosts]] == ["/etc/hosts", "/etc/hosts.bak"]
+
+    # a new instance finds the entries on disk
+    assert ParserCache(str(tmpdir)).size == cache.size > 0
+
+
+def test_parser_cache_eviction(tmpdir):
+    cache = ParserCache(str(tmpdir), max_size=1)
+    _run(cache, context_wrap(CONTENT, path="/etc/hosts"))
+    assert cache.size == 0
+    assert all(not files for _, _, files in os.walk(str(tmpdir)))
+    broker = _run(cache, context_wrap(CONTENT, path="/etc/hosts"))
+    assert "hits" not in broker.parser_cache_stats
+
+
+def test_parser_version(monkeypatch):
+    assert parser_version(Hosts) == parser_version(NotCached)
+    assert parser_version(Hosts) != parser_version(Parser)
+    assert "insights.tests" in _imported_modules(__name__)
+
+    version = parser_version(Hosts)
+    monkeypatch.setattr(parser_cache, "_VERSIONS", {})
+    monkeypatch.setitem(package_info, "COMMIT", "other")
+    assert parser_version(Hosts) != version
+
+
+def test_no_parser_cache():
+    broker = _run(None, context_wrap(CONTENT, path="/etc/hosts"))
+    assert set(CALLS) == set([Hosts, NotCached, Unpicklable])
+    assert not broker.parser_cache_stats
+
+
+def test_parser_cache_shared_max_size(tmpdir):
+    entry_size = ParserCache(str(tmpdir.mkdir("size")))
+    _run(entry_size, context_wrap(CONTENT, path="/etc/hosts"))
+    max_size = entry_size.size * 3
+
+    first = ParserCache(str(tmpdir), max_size=max_size)
+    second = ParserCache(str(tmpdir), max_size=max_size)
+    for i in range(10):
+        _run(first if i % 2 else second, context_wrap(CONTENT + "\n10.0.0.%d a" % i, path="/etc/hosts"))
+    on_disk = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(str(tmpdir)) for f in files
+                  if not d.startswith(str(tmpdir.join("size"))))
+    assert on_disk <= max_size
@@ -265,3 +265,81 @@ def test_dehydrate():
             assert "Fake Datasource" in tb
     finally:
         fs.remove(tmp_path)
+
+
+def test_round_trip_with_pool():
+    from concurrent.futures import ThreadPoolExecutor
+
+    tmp_path = mkdtemp()
+    try:
+        h = Hydration(tmp_path, meta_index=True)
+        broker = dr.run(report)
+        broker[thing] = [Foo(), Foo()]
+        broker.exec_times[thing] = 0.5
+        h.dehydrate(thing, broker)
+        h.dehydrate(Specs.the_data, broker)
+        assert os.path.exists(h.meta_index)
+
+        expected = Hydration(tmp_path).hydrate()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            from_index = Hydration(tmp_path, pool=pool).hydrate()
+            os.remove(h.meta_index)
+            from_files = Hydration(tmp_path, pool=pool).hydrate()
+
+        for broker in (expected, from_index, from_files):
+            assert [(f.a, f.b) for f in broker[thing]] == [(1, 2), (1, 2)]
+            assert broker.exec_times[thing] >= 0.5
+            assert Specs.the_data not in broker
+    finally:
+        fs.remove(tmp_path)
+
+
+def test_hydrate_meta_index():
+    tmp_path = mkdtemp()
+    try:
+        h = Hydration(tmp_path, meta_index=True)
+        broker = dr.Broker()
+        broker[thing] = Foo()
+        broker.exec_times[thing] = 0.5
+        h.dehydrate(thing, broker)
+        broker[thing].a = 3
+        h.dehydrate(thing, broker)
+        with open(h.meta_index, "a") as f:
+            f.write("not.a.component\t{\"name\": \"not.a.component\"}\n")
+            f.write("truncated line\n")
+
+        # the index is read instead of the meta_data files and the last
+        # entry of a component wins
+        fs.remove(h.meta_root)
+        broker = Hydration(tmp_path).hydrate()
+        assert broker[thing].a == 3
+        assert len(broker.instances) == 1
+    finally:
+        fs.remove(tmp_path)
+
+
+def test_hydrate_lazy():
+    tmp_path = mkdtemp()
+    try:
+        h = Hydration(tmp_path, meta_index=True)
+        broker = dr.run(report)
+        broker[thing] = Foo()
+        broker.exec_times[thing] = 0.5
+        h.dehydrate(thing, broker)
+        h.dehydrate(Specs.the_data, broker)
+
+        for index in (True, False):
+            if not index:
+                os.remove(h.meta_index)
+            broker = Hydration(tmp_path).hydrate(lazy=True)
+            assert set(broker.lazy) == set([thing, Specs.the_data])
+            assert not broker.instances
+
+            assert broker[thing].a == 1
+            assert broker.exec_times[thing] >= 0.5
+            assert list(broker.lazy) == [Specs.the_data]
+            # saved without results, so it's missing once touched
+            assert Specs.the_data not in broker
+            assert not broker.lazy
+    finally:
+        fs.remove(tmp_path)
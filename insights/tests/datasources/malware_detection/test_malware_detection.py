@@ -38,6 +38,8 @@ from insights.specs.datasources.malware_detection import (
     process_include_items,
     process_exclude_items,
     process_include_exclude_items,
+    find_modified_files,
+    split_scan_list,
     logger,
     MIN_YARA_VERSION,
 )
@@ -299,6 +301,13 @@ class TestsNotUtilizingYara:
         default_list = process_exclude_items()
         assert default_list == []
 
+    def test_split_scan_list(self):
+        files = [('/a', Mock(st_size=5)), ('/b', Mock(st_size=1)), ('/c', Mock(st_size=3)), ('/d', Mock(st_size=2))]
+        assert split_scan_list(files, 2) == [['/a', '/b'], ['/c', '/d']]
+        assert split_scan_list(files, 1) == [['/a', '/b', '/c', '/d']]
+        assert split_scan_list(files[:1], 4) == [['/a']]
+        assert split_scan_list([], 4) == []
+
     def test_process_include_items(self, caplog):
         # Call process_include_items with variously populated lists
         logger.setLevel('DEBUG')
@@ -2928,6 +2937,80 @@ class TestsUtilizingFakeYara:
             assert len(contents) == 2
             assert contents == [scan_me_file, scan_me_too_file]
 
+        @patch(LOAD_CONFIG_TARGET, return_value=CONFIG)
+        @patch.dict(os.environ)
+        def test_filesystem_scan_jobs_n_incremental(
+            self, conf, log_mock, yara, cmd, remove, extract_tmp_files, create_test_files_fake_yara, tmp_path
+        ):
+            # Scan the tmp files with 2 yara processes and record their state, then scan again
+            # and make sure only the changed files and the files that must be scanned again are scanned
+            scan_lists = []
+
+            def fake_yara(cmds):
+                scan_list = cmds[0][cmds[0].index('--scan-list') + 1]
+                with open(scan_list) as f:
+                    scan_lists.append(f.read().splitlines())
+                return ""
+
+            def scan():
+                del scan_lists[:]
+                mdc = MalwareDetectionClient(None)
+                with patch(CALL_TARGET, side_effect=fake_yara):
+                    mdc.active_cmd = ['lol']
+                    mdc.scan_filesystem()
+                mdc.scan_state.save()
+                return mdc
+
+            def run_with_match(cmds):
+                fake_yara(cmds)
+                return 'Rule [author="Red Hat Insights"] %s\n0x4a:$re1: changed' % MATCHING_ENTITY_FILE
+
+            os.environ['TEST_SCAN'] = 'false'
+            os.environ['EXCLUDE_NETWORK_FILESYSTEM_MOUNTPOINTS'] = 'false'
+            os.environ['REMOTE_RULES_LOCATION'] = TEST_RULE_FILE
+            os.environ['FILESYSTEM_SCAN_ONLY'] = TEMP_TEST_DIR
+            os.environ['FILESYSTEM_SCAN_JOBS'] = '2'
+            os.environ['FILESYSTEM_SCAN_INCREMENTAL'] = 'true'
+            state_file = str(tmp_path / 'scan_state')
+            with patch("insights.specs.datasources.malware_detection.FILESYSTEM_SCAN_STATE_FILE", state_file):
+                mdc = scan()
+                assert mdc.filesystem_scan_jobs == 2
+                assert len(scan_lists) == 2
+                assert not set(scan_lists[0]) & set(scan_lists[1])
+                expected = set(path for path, _ in find_modified_files([TEMP_TEST_DIR])) - set([TEST_RULE_FILE])
+                assert set(scan_lists[0] + scan_lists[1]) == expected
+
+                # Nothing has changed since the last scan, so nothing is scanned
+                scan()
+                assert scan_lists == []
+
+                # Change a file and scan it with a single yara process through run(), which finds a match
+                os.environ['FILESYSTEM_SCAN_JOBS'] = '1'
+                os.environ['SCAN_PROCESSES'] = 'false'
+                os.environ['ADD_METADATA'] = 'false'
+                with open(MATCHING_ENTITY_FILE, 'a') as f:
+                    f.write('changed\n')
+                del scan_lists[:]
+                mdc = MalwareDetectionClient(None)
+                with patch(CALL_TARGET, side_effect=run_with_match), \
+                        patch("insights.specs.datasources.malware_detection.LAST_FILESYSTEM_SCAN_FILE",
+                              str(tmp_path / 'last_scan')):
+                    mdc.run()
+                assert set(sum(scan_lists, [])) == set([MATCHING_ENTITY_FILE])
+                assert mdc._matched_files() == set([MATCHING_ENTITY_FILE])
+
+                # Files with matches are scanned again even though they haven't changed
+                scan()
+                assert scan_lists == [[MATCHING_ENTITY_FILE]]
+                scan()
+                assert scan_lists == [[]]
+
+                # Scan all the files when the rules have changed
+                with open(TEST_RULE_FILE, 'a') as f:
+                    f.write('\n')
+                scan()
+                assert set(scan_lists[0]) == expected
+
         @patch(LOAD_CONFIG_TARGET, return_value=CONFIG)
         @patch.dict(os.environ)
         def test_rule_n_glob_files_excluded(
@@ -1,10 +1,13 @@
+import pytest
 import time
 
+from concurrent.futures import ThreadPoolExecutor
 from insights.core import dr
 from insights.core.context import HostContext, SosArchiveContext
 from insights.core.exceptions import TimeoutException
 from insights.core.plugins import datasource
 from insights.core.spec_factory import DatasourceProvider, RegistryPoint, SpecSet, foreach_execute
+from insights.util.deadline import Deadline, popen
 
 
 class Specs(SpecSet):
@@ -12,6 +15,7 @@ class Specs(SpecSet):
     spec_ds_timeout_3_1 = RegistryPoint()
     spec_ds_timeout_default_1 = RegistryPoint()
     spec_foreach_ds_timeout_1_2 = RegistryPoint(multi_output=True)
+    spec_ds_timeout_cmd_1_30 = RegistryPoint()
 
 
 @datasource(timeout=1)
@@ -38,11 +42,18 @@ def ds_timeout_default_1(broker):
     return DatasourceProvider('foo', "test_ds_timeout_default_1")
 
 
+@datasource(HostContext, timeout=1)
+def ds_timeout_cmd_1_30(broker):
+    broker[HostContext].shell_out("sleep 30")
+    return DatasourceProvider('foo', "test_ds_timeout_cmd_1_30")
+
+
 class TestSpecs(Specs):
     spec_ds_timeout_1_2 = ds_timeout_1_2
     spec_ds_timeout_3_1 = ds_timeout_3_1
     spec_ds_timeout_default_1 = ds_timeout_default_1
     spec_foreach_ds_timeout_1_2 = foreach_execute(foreach_ds_timeout_1_2, "/usr/bin/echo %s")
+    spec_ds_timeout_cmd_1_30 = ds_timeout_cmd_1_30
 
 #
 # TEST
@@ -133,3 +144,39 @@ def test_not_hostcontext_timeout_foreach_datasource_hit():
     assert ds_timeout_default_1 in broker
     assert foreach_ds_timeout_1_2 in broker
     assert Specs.spec_foreach_ds_timeout_1_2 not in broker.exceptions
+
+
+def test_timeout_datasource_hit_in_threads():
+    broker = dr.Broker()
+    broker[HostContext] = HostContext()
+    persist = set([
+        TestSpecs.spec_ds_timeout_1_2,
+        TestSpecs.spec_ds_timeout_3_1,
+        TestSpecs.spec_ds_timeout_cmd_1_30,
+    ])
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        dr.run(list(persist), broker=broker, pool=pool)
+    # the command is killed instead of sleeping for 30 seconds
+    assert time.time() - start < 10
+
+    assert ds_timeout_3_1 in broker
+    assert ds_timeout_1_2 not in broker
+    assert ds_timeout_cmd_1_30 not in broker
+    for spec in (Specs.spec_ds_timeout_1_2, Specs.spec_ds_timeout_cmd_1_30):
+        assert [ex for ex in broker.exceptions[spec] if isinstance(ex, TimeoutException)]
+
+
+def test_deadline():
+    with Deadline(1) as deadline:
+        proc = popen(["sleep", "30"])
+        assert proc.wait() != 0
+        assert deadline.expired
+        with pytest.raises(TimeoutException):
+            popen(["true"])
+    assert popen(["true"]).wait() == 0
+
+    with Deadline() as deadline:
+        assert popen(["true"]).wait() == 0
+    assert not deadline.expired
@@ -1,3 +1,4 @@
+import os
 import pytest
 
 from collections import defaultdict
@@ -9,6 +10,7 @@ from insights.core.exceptions import SkipComponent
 from insights.core.spec_factory import DatasourceProvider
 from insights.parsers.ps import PsEoCmd
 from insights.specs import Specs
+from insights.specs.datasources import PACKAGE_OWNERS
 from insights.specs.datasources.package_provides import cmd_and_pkg, get_package
 from insights.tests import context_wrap
 
@@ -19,57 +21,40 @@ JAVA_PATH_ERR = '/error/java'
 JAVA_PKG_2 = 'java-1.8.0-openjdk-headless-1.8.0.292.b10-1.el7_9.x86_64'
 HTTPD_PATH = '/usr/sbin/httpd'
 HTTPD_PKG = 'httpd-2.4.6-97.el7_9.x86_64'
+JAVA_PATH_MULTI = '/usr/lib/jvm/multilib/bin/java'
+JAVA_PKG_2_I686 = 'java-1.8.0-openjdk-headless-1.8.0.292.b10-1.el7_9.i686'
+
+
+REAL_PATHS = {
+    JAVA_PATH_1: JAVA_PATH_2,
+}
+
+OWNERS = {
+    JAVA_PATH_2: [JAVA_PKG_2],
+    HTTPD_PATH: [HTTPD_PKG],
+    JAVA_PATH_MULTI: [JAVA_PKG_2, JAVA_PKG_2_I686],
+}
 
 
 class FakeContext(HostContext):
+    def __init__(self, *args, **kwargs):
+        super(FakeContext, self).__init__(*args, **kwargs)
+        self.rpm_calls = []
+
     def shell_out(self, cmd, split=True, timeout=None, keep_rc=False, env=None, signum=None):
         tmp_cmd = cmd.strip().split()
         shell_cmd = tmp_cmd[0]
         arg = tmp_cmd[-1]
-        if 'readlink' in shell_cmd:
-            if arg == JAVA_PATH_1:
-                return (
-                    0,
-                    [
-                        JAVA_PATH_2,
-                    ],
-                )
-            elif arg == JAVA_PATH_ERR:
-                return (
-                    1,
-                    [
-                        'file not found',
-                    ],
-                )
-            elif arg.startswith('/'):
-                return (
-                    0,
-                    [
-                        arg,
-                    ],
-                )
-        elif 'rpm' in shell_cmd:
-            if arg == JAVA_PATH_2:
-                return (
-                    0,
-                    [
-                        JAVA_PKG_2,
-                    ],
-                )
-            elif arg == HTTPD_PATH:
-                return (
-                    0,
-                    [
-                        HTTPD_PKG,
-                    ],
-                )
-            else:
-                return (
-                    1,
-                    [
-                        'file {0} is not owned by any package'.format(arg),
-                    ],
-                )
+        if 'rpm' in shell_cmd:
+            self.rpm_calls.append(tmp_cmd[2:])
+            rc, lines = 0, []
+            for path in tmp_cmd[2:]:
+                if path in OWNERS:
+                    lines.extend(OWNERS[path])
+                else:
+                    rc = 1
+                    lines.append('file {0} is not owned by any package'.format(path))
+            return rc, lines
         elif 'which' in shell_cmd:
             if 'exception' in arg:
                 raise Exception()
@@ -89,6 +74,28 @@ class FakeContext(HostContext):
         raise Exception()
 
 
+@pytest.fixture(autouse=True)
+def fake_paths(monkeypatch):
+    exists = os.path.exists
+    realpath = os.path.realpath
+
+    def fake_exists(path):
+        if path.startswith(('/usr', '/random', '/error', '/home')):
+            return path != JAVA_PATH_ERR
+        return exists(path)
+
+    def fake_realpath(path):
+        if path.startswith(('/usr', '/random', '/error', '/home')):
+            return REAL_PATHS.get(path, path)
+        return realpath(path)
+
+    monkeypatch.setattr(os.path, 'exists', fake_exists)
+    monkeypatch.setattr(os.path, 'realpath', fake_realpath)
+    PACKAGE_OWNERS.clear()
+    yield
+    PACKAGE_OWNERS.clear()
+
+
 def setup_function(func):
     if func is test_cmd_and_pkg:
         filters.add_filter(Specs.package_provides_command, ['httpd', 'java'])
@@ -165,6 +172,8 @@ def test_cmd_and_pkg():
     result = cmd_and_pkg(broker)
     assert result is not None
     assert sorted(result.content) == sorted(EXPECTED.content)
+    # one rpm query for all the commands
+    assert len(broker[HostContext].rpm_calls) == 1
 
 
 def test_cmd_and_pkg_no_filters():
@@ -187,3 +196,31 @@ def test_cmd_and_pkg_not_found():
 
     with pytest.raises(SkipComponent):
         cmd_and_pkg(broker)
+
+
+def test_package_owners():
+    ctx = FakeContext()
+    paths = [JAVA_PATH_1, JAVA_PATH_2, HTTPD_PATH, JAVA_PATH_BAD, JAVA_PATH_ERR]
+    assert PACKAGE_OWNERS.get(ctx, paths) == {
+        JAVA_PATH_1: JAVA_PKG_2,
+        JAVA_PATH_2: JAVA_PKG_2,
+        HTTPD_PATH: HTTPD_PKG,
+        JAVA_PATH_BAD: None,
+        JAVA_PATH_ERR: None,
+    }
+    assert ctx.rpm_calls == [[JAVA_PATH_BAD, JAVA_PATH_2, HTTPD_PATH]]
+
+    # cached for the collection
+    assert get_package(ctx, JAVA_PATH_1) == JAVA_PKG_2
+    assert len(ctx.rpm_calls) == 1
+
+    # files owned by more than one package are asked for one by one
+    assert PACKAGE_OWNERS.get(ctx, [JAVA_PATH_MULTI, '/usr/bin/other']) == {
+        JAVA_PATH_MULTI: JAVA_PKG_2,
+        '/usr/bin/other': None,
+    }
+    assert ctx.rpm_calls[1:] == [['/usr/bin/other', JAVA_PATH_MULTI], ['/usr/bin/other'], [JAVA_PATH_MULTI]]
+
+    PACKAGE_OWNERS.clear()
+    get_package(ctx, JAVA_PATH_1)
+    assert len(ctx.rpm_calls) == 5
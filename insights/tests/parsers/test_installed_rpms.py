@@ -604,6 +604,40 @@ def test_rpm_with_diff_length_version():
     assert rpm1 > rpm2
 
 
+def test_rpm_sort_key():
+    packages = [
+        'kernel-3.10.0-327.el7',
+        'kernel-3.10.0-327.10.1.el7',
+        'kernel-3.10.0-1160.el7',
+        'kernel-3.10.0-1160~rc1.el7',
+        'kernel-3.10.0-1160.el7^git1',
+        'kernel-3.10.0-957.el7',
+    ]
+    rpms = [InstalledRpm.from_package(p) for p in packages]
+    assert [r.package for r in sorted(rpms)] == [
+        'kernel-3.10.0-327.el7',
+        'kernel-3.10.0-327.10.1.el7',
+        'kernel-3.10.0-957.el7',
+        'kernel-3.10.0-1160~rc1.el7',
+        'kernel-3.10.0-1160.el7',
+        'kernel-3.10.0-1160.el7^git1',
+    ]
+    assert max(rpms).package == 'kernel-3.10.0-1160.el7^git1'
+    assert min(rpms).package == 'kernel-3.10.0-327.el7'
+
+    same = InstalledRpm.from_package('kernel-3.10.0-327_el7')
+    assert same == rpms[0]
+    assert hash(same) == hash(rpms[0])
+
+    # the key follows changes of the epoch, version and release
+    rpm = InstalledRpm.from_package('kernel-3.10.0-327.el7')
+    assert rpm == rpms[0]
+    rpm.epoch = '1'
+    assert rpm > rpms[2]
+    with pytest.raises(ValueError):
+        rpm < InstalledRpm.from_package('bash-4.2.46-34.el7')
+
+
 def test_container_installed_rpms():
     rpms = ContainerInstalledRpms(
         context_wrap(
@@ -642,6 +676,40 @@ def test_container_installed_rpms():
     assert rpms_json.get_max("libteam").source.version == "1.17"
 
 
+def test_compare_many():
+    rpms = InstalledRpms(context_wrap(RPMS_DOCTEST_EXAMPLE))
+    refs = [
+        'kernel-3.10.0-327.36.3.el7',
+        'kernel-3.10.0-327.36.4.el7',
+        InstalledRpm.from_package('kernel-3.10.0-267.el7'),
+        'zsh-5.0.2-14.el7_2.2',
+        'zsh-1:4.0-1.el7',
+        'no-such-package-1.0-1.el7',
+    ]
+    expected = []
+    for ref in refs:
+        rpm = rpms.get_max(getattr(ref, 'name', None) or InstalledRpm.from_package(ref).name)
+        ref = ref if isinstance(ref, InstalledRpm) else InstalledRpm.from_package(ref)
+        expected.append(None if rpm is None else (rpm > ref) - (rpm < ref))
+    assert rpms.compare_many(refs) == expected == [0, -1, 1, 0, -1, None]
+    assert rpms.vulnerable(refs) == ['kernel-3.10.0-327.36.4.el7', 'zsh-1:4.0-1.el7']
+    assert rpms.compare_many([]) == []
+
+
+def test_rpm_indexes():
+    rpms = InstalledRpms(context_wrap(RPMS_JSON))
+    assert rpms.get_by_arch('bash', 'x86_64') == [rpms.get_max('bash')]
+    assert rpms.get_by_arch('bash', 'noarch') == []
+    assert [r.name for r in rpms.get_by_vendor('Red Hat, Inc.')] == ['crash', 'xorg-x11-drv-vmmouse']
+    assert [r.name for r in rpms.get_by_vendor('(none)')] == ['libnl']
+    assert len(rpms.get_by_signed()) == len(rpms.packages)
+    assert rpms.get_by_signed(False) == []
+    for rpms_list in rpms.packages.values():
+        for rpm in rpms_list:
+            assert any(r is rpm for r in rpms.get_by_vendor(rpm.vendor))
+            assert any(r is rpm for r in rpms.get_by_signed(rpm.redhat_signed))
+
+
 def test_doc_examples():
     env = {
         'rpms': InstalledRpms(context_wrap(RPMS_DOCTEST_EXAMPLE)),
@@ -1,7 +1,9 @@
+import os
 import pytest
+import random
 
 from insights.core.exceptions import SkipComponent
-from insights.parsers import lsof
+from insights.parsers import ColumnarTable, lsof
 from insights.tests import context_wrap
 
 LSOF = """
@@ -215,6 +217,84 @@ def test_lsof_scan():
     assert l.root_stdin[1]['NAME'] == '/dev/null'
 
 
+def test_lsof_streamed():
+    class StreamedLsof(lsof.Lsof):
+        pass
+
+    StreamedLsof.collect_keys('root_stdin', USER='root', FD='0r', SIZE_OFF='0t0')
+    l = StreamedLsof(context_wrap(LSOF_GOOD_V1))
+    # only the collected rows are kept
+    assert isinstance(l.root_stdin, ColumnarTable)
+    assert [r['PID'] for r in l.root_stdin] == ['8619', '641']
+    assert not hasattr(l, 'rows')
+    with pytest.raises(ValueError):
+        l.search(USER='root')
+    with pytest.raises(ValueError):
+        list(l)
+    # the parser is still true in rules with an optional Lsof
+    assert StreamedLsof(context_wrap(LSOF_GOOD_V1.splitlines()[:2]))
+
+
+def test_lsof_rows():
+    class KeptLsof(lsof.Lsof):
+        pass
+
+    KeptLsof.keep_rows()
+    KeptLsof.keep_rows()
+    l = KeptLsof(context_wrap(LSOF_GOOD_V1))
+    assert isinstance(l.rows, ColumnarTable)
+    assert len(l.rows) == 19
+    assert l
+    assert list(l)[4] == {
+        'COMMAND': 'dbus-daem', 'PID': '603', 'TID': '615', 'USER': 'dbus', 'FD': '0r', 'TYPE': 'CHR',
+        'DEVICE': '1,3', 'SIZE/OFF': '0t0', 'NODE': '4674', 'NAME': '/dev/null'
+    }
+    assert [r['PID'] for r in l.search(USER='root', FD='0r', SIZE_OFF='0t0')] == ['8619', '641']
+    assert [r['FD'] for r in l.search(COMMAND='JS', TYPE__startswith='B')] == ['1r']
+    assert l.search(USER='nobody') == []
+
+
+def _lsof_content(count):
+    rand = random.Random(0)
+    commands = ['postgres', 'java', 'httpd', 'sshd', 'systemd']
+    lines = ["COMMAND       PID     TID   USER   FD      TYPE             DEVICE  SIZE/OFF       NODE NAME"]
+    for i in range(count):
+        pid = rand.randint(1, 60000)
+        lines.append("%-9s %9d %7s %6s %4s %9s %18s %9s %10d %s" % (
+            rand.choice(commands), pid, rand.choice(['', str(pid + 1)]), rand.choice(['root', 'postgres']),
+            '%d%s' % (rand.randint(0, 500), rand.choice('urw')), rand.choice(['REG', 'IPv4', 'unix', 'CHR']),
+            '253,%d' % rand.randint(0, 3), rand.choice(['0t0', str(rand.randint(0, 10 ** 9))]),
+            rand.randint(1, 10 ** 8), '/var/lib/pgsql/data/base/16384/%d' % rand.randint(1, 10 ** 6)))
+    return lines
+
+
+@pytest.mark.skipif(
+    not os.environ.get('TEST_LSOF_MEMORY_BENCHMARK'),
+    reason="Memory benchmark of the lsof rows. Use TEST_LSOF_MEMORY_BENCHMARK=True to enable it",
+)
+def test_lsof_memory_benchmark():
+    import tracemalloc
+
+    content = _lsof_content(200000)
+    l = lsof.Lsof(context_wrap(content[:2]))
+    lines = list(l._start(content))
+
+    tracemalloc.start()
+    try:
+        rows = [l._parse_line(line) for line in lines]
+        dicts = tracemalloc.get_traced_memory()[0]
+        del rows
+        start = tracemalloc.get_traced_memory()[0]
+        table = ColumnarTable(l._parse_line(line) for line in lines)
+        columnar = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+    print("%d lsof rows: columnar table %.1f MB, list of dicts %.1f MB" % (
+        len(table), columnar / 2.0 ** 20, dicts / 2.0 ** 20))
+    assert columnar < dicts / 2
+
+
 LSOF_BAD = """
 lsof: WARNING: can't stat() xfs file system /var/lib/origin/openshift.local.volumes/pods/abca2a21-da4c-22eb-b49c-011d3a938eb5/volume-subpaths/config/wh/0
 """
@@ -1,10 +1,17 @@
+import json
+import os
+import pickle
 import pytest
+import random
+import time
+
+from array import array
 
 from collections import OrderedDict
 
 from insights.core.exceptions import ParseException, SkipComponent
-from insights.parsers import (calc_offset, keyword_search, optlist_to_dict, parse_delimited_table, parse_fixed_table,
-                              split_kv_pairs, unsplit_lines)
+from insights.parsers import (ColumnarTable, KeywordSearchTable, calc_offset, keyword_search, optlist_to_dict,
+                              parse_delimited_table, parse_fixed_table, split_kv_pairs, unsplit_lines)
 
 SPLIT_TEST_1 = """
 # Comment line
@@ -665,6 +672,144 @@ def test_keyword_search_None():
     assert keyword_search(PS_LIST, NONE__startswith='xfs') == []
 
 
+def _table_rows(count, seed=0):
+    rand = random.Random(seed)
+    users = ['root', 'postgres', 'apache', 'Root', None]
+    rows = []
+    for i in range(count):
+        row = {
+            'PID': str(i),
+            'USER': rand.choice(users),
+            'COMMAND': rand.choice(['/usr/bin/python', '/usr/sbin/httpd', 'bash', '[kworker/0:1]', '']),
+            'ST-AT': rand.choice(['S', 'Ss', 'R+', 'Z']),
+            'RSS': rand.randint(0, 5),
+        }
+        if rand.random() < 0.2:
+            del row['USER']
+        rows.append(row)
+    return rows
+
+
+TABLE_QUERIES = [
+    {'USER': 'root'},
+    {'USER': 'nobody'},
+    {'USER': None},
+    {'USER': 'root', 'ST_AT': 'Ss'},
+    {'USER__lower_value': 'root', 'COMMAND__startswith': '/usr'},
+    {'COMMAND__startswith': ''},
+    {'COMMAND__startswith': '/usr/sbin/httpd'},
+    {'COMMAND__startswith': 'zzz'},
+    {'COMMAND__contains': 'python', 'ST_AT__startswith': 'S'},
+    {'COMMAND__endswith': 'd', 'PID': '42'},
+    {'RSS': 3},
+    {'RSS': 3, 'USER': 'apache'},
+    {'PID': 42},
+    {'USER__startswith': 'ro'},
+    {'UNKNOWN': 'x'},
+    {'ST_AT__bad_suffix': 'S'},
+]
+
+
+@pytest.mark.parametrize("row_keys_change", [False, True])
+def test_keyword_search_table(row_keys_change):
+    rows = _table_rows(1000)
+    table = KeywordSearchTable(rows)
+    for kwargs in TABLE_QUERIES:
+        expected = keyword_search(rows, row_keys_change=row_keys_change, **kwargs)
+        assert keyword_search(table, row_keys_change=row_keys_change, **kwargs) == expected, kwargs
+        # the indexes are reused
+        assert keyword_search(table, row_keys_change=row_keys_change, **kwargs) == expected, kwargs
+
+    # the indexes follow rows being added
+    table.append({'PID': '1000', 'USER': 'root', 'COMMAND': 'bash', 'ST-AT': 'S', 'RSS': 0})
+    assert keyword_search(table, PID='1000') == [table[-1]]
+    assert table == rows + [table[-1]]
+
+
+@pytest.mark.parametrize("row_keys_change", [False, True])
+def test_columnar_table_search(row_keys_change):
+    rows = _table_rows(1000)
+    table = ColumnarTable(rows)
+    assert table == rows
+    assert len(table) == 1000
+    for kwargs in TABLE_QUERIES:
+        expected = keyword_search(rows, row_keys_change=row_keys_change, **kwargs)
+        assert keyword_search(table, row_keys_change=row_keys_change, **kwargs) == expected, kwargs
+
+    table.append({'PID': '1000', 'USER': 'root', 'COMMAND': 'bash', 'ST-AT': 'S', 'RSS': 0})
+    assert keyword_search(table, PID='1000') == [table[-1]]
+    assert table == rows + [table[-1]]
+
+
+def test_columnar_table():
+    table = ColumnarTable([
+        {'PID': '1', 'TID': '', 'USER': 'root', 'NODE': '128'},
+        {'PID': '2', 'TID': '3', 'USER': 'root', 'NODE': 'TCP'},
+        {'PID': '10', 'USER': 'postgres', 'NODE': '0'},
+    ])
+    # numbers and empty strings are kept in integer columns, and read back as strings
+    assert isinstance(table._columns['PID'], array)
+    assert isinstance(table._columns['TID'], array)
+    assert not isinstance(table._columns['NODE'], array)
+    assert table[0] == {'PID': '1', 'TID': '', 'USER': 'root', 'NODE': '128'}
+    assert {'PID': '10', 'USER': 'postgres', 'NODE': '0'} == table[-1]
+    assert table[0]['USER'] is table[1]['USER']
+    assert 'TID' not in table[2]
+    assert table[2].get('TID') is None
+    assert list(table[2].keys()) == ['PID', 'USER', 'NODE']
+    assert repr(table[2]) == repr({'PID': '10', 'USER': 'postgres', 'NODE': '0'})
+    assert table[1:] == [table[1], table[2]]
+    with pytest.raises(IndexError):
+        table[3]
+    with pytest.raises(KeyError):
+        table[2]['TID']
+
+    # changes to the rows are made in the table
+    row = table[0]
+    row.update({'STAT': 'S', 'threads': 2})
+    row['PID'] = '01'
+    del row['TID']
+    assert table[0] == {'PID': '01', 'USER': 'root', 'NODE': '128', 'STAT': 'S', 'threads': 2}
+    assert not isinstance(table._columns['PID'], array)
+    assert [r['PID'] for r in table] == ['01', '2', '10']
+    assert keyword_search(table, STAT='S') == [table[0]]
+    # the rows found are dicts, which rules can put in their responses
+    found = keyword_search(table, USER='root')
+    assert [type(r) for r in found] == [dict, dict]
+    assert json.loads(json.dumps(found)) == [table[0], table[1]]
+    copy = table[0].copy()
+    assert type(copy) is dict
+    copy['PID'] = '1'
+    assert table[0]['PID'] == '01'
+
+    assert pickle.loads(pickle.dumps(table, pickle.HIGHEST_PROTOCOL)) == table
+    assert ColumnarTable() == []
+    assert ColumnarTable() != [{}]
+
+
+@pytest.mark.skipif(
+    not os.environ.get('TEST_KEYWORD_SEARCH_BENCHMARK'),
+    reason="Benchmark of the indexed keyword_search. Use TEST_KEYWORD_SEARCH_BENCHMARK=True to enable it",
+)
+def test_keyword_search_table_benchmark():
+    rows = _table_rows(50000, seed=1)
+    table = KeywordSearchTable(rows)
+    queries = [{'PID': str(i), 'USER': 'root'} for i in range(0, 50000, 500)]
+    queries += [{'COMMAND__startswith': '[kworker', 'PID': str(i)} for i in range(0, 50000, 500)]
+
+    start = time.time()
+    expected = [keyword_search(rows, **q) for q in queries]
+    linear = time.time() - start
+
+    start = time.time()
+    actual = [keyword_search(table, **q) for q in queries]
+    indexed = time.time() - start
+
+    print("%d searches of %d rows: indexed %.2fs, linear %.2fs" % (len(queries), len(rows), indexed, linear))
+    assert actual == expected
+    assert indexed < linear
+
+
 def test_parse_exception():
     with pytest.raises(ParseException) as e_info:
         raise ParseException('This is a parse exception')
@@ -324,6 +324,22 @@ def test_glob_max(max_globs):
         too_many(broker)
 
 
+def test_glob_max_cutoff(max_globs):
+    too_many = glob_file([here + "/../test_a*.py", max_globs + "/tmp_*_glob"], max_files=10)
+    broker = dr.Broker()
+    broker[HostContext] = HostContext()
+    with patch("insights.core.spec_factory.TextFileProvider", side_effect=AssertionError):
+        with pytest.raises(ContentException) as ce:
+            too_many(broker)
+    assert "over the 10 file limit" in str(ce.value)
+
+    # the matches of each pattern are sorted
+    tests = glob_file([here + "/../test_b*.py", here + "/../test_a*.py"])
+    paths = [p.path for p in tests(broker)]
+    expected = sorted(glob.glob(here + "/../test_b*.py")) + sorted(glob.glob(here + "/../test_a*.py"))
+    assert paths == expected
+
+
 def test_datasource_provider():
     data = "blahblah\nblahblah2"
 
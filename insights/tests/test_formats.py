@@ -1,4 +1,7 @@
+import json
+
 import pytest
+import yaml
 from six import StringIO
 from insights import dr, make_fail, rule
 from insights.formats.text import HumanReadableFormat
@@ -7,6 +10,7 @@ from insights.formats._json import JsonFormat
 from insights.formats._syslog import SysLogFormat
 from insights.formats.html import HtmlFormat
 from insights.formats.simple_html import SimpleHtmlFormat
+from insights.parsers import ColumnarTable
 
 
 SL_MSG = "Running insights.tests.test_formats.report"
@@ -111,3 +115,23 @@ def test_simple_html_format():
     data = output.read()
     assert "foo" in data
     assert "bar" in data
+
+
+@rule()
+def report_rows():
+    table = ColumnarTable([{"PID": "1", "COMMAND": "systemd"}, {"PID": "2", "COMMAND": "bash"}])
+    return make_fail("ROWS", row=table[1], rows=table)
+
+
+@pytest.mark.parametrize("Format", [JsonFormat, YamlFormat])
+def test_format_table_rows(Format):
+    broker = dr.Broker()
+    output = StringIO()
+    with Format(broker, stream=output):
+        dr.run(report_rows, broker=broker)
+    text = output.getvalue()
+    assert "TableRow" not in text and "ColumnarTable" not in text
+    data = json.loads(text) if Format is JsonFormat else yaml.load(text, Loader=yaml.Loader)
+    details = data["reports"][0]["details"]
+    assert details["row"] == {"PID": "2", "COMMAND": "bash"}
+    assert details["rows"] == [{"PID": "1", "COMMAND": "systemd"}, {"PID": "2", "COMMAND": "bash"}]
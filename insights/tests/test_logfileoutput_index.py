@@ -0,0 +1,154 @@
+import datetime
+import os
+import random
+import time
+
+import pytest
+
+from insights import core
+from insights.core import LogFileOutput, _time_parser
+from insights.tests import context_wrap
+
+
+class YearLog(LogFileOutput):
+    time_format = '%Y-%m-%d %H:%M:%S'
+
+
+class NoYearLog(LogFileOutput):
+    time_format = '%b %d %H:%M:%S'
+
+
+class MixedLog(LogFileOutput):
+    time_format = {'old': '%y%m%d %H:%M:%S', 'new': '%Y-%m-%d %H:%M:%S'}
+
+
+def _legacy_get_after(log, timestamp, s=None, end=None):
+    time_re, parse_fn, logs_have_year = _time_parser(log.time_format)
+    eleven_months = datetime.timedelta(days=330)
+    including_lines = False
+    search_by_expression = log._valid_search(s)
+    for line in log.lines:
+        if s and not search_by_expression(line):
+            continue
+        match = time_re.search(line)
+        if match:
+            logstamp = parse_fn(match.group(0))
+            if not logs_have_year:
+                logstamp = logstamp.replace(year=timestamp.year)
+                if logstamp - timestamp > eleven_months:
+                    logstamp = logstamp.replace(year=timestamp.year - 1)
+                elif timestamp - logstamp > eleven_months:
+                    logstamp = logstamp.replace(year=timestamp.year + 1)
+            including_lines = logstamp >= timestamp and (end is None or logstamp < end)
+            if including_lines:
+                yield log._parse_line(line)
+        elif including_lines:
+            yield log._parse_line(line)
+
+
+def _content(fmt, count, ordered=True, seed=0, start=datetime.datetime(2017, 12, 20)):
+    rand = random.Random(seed)
+    lines = ['continuation before any time stamp']
+    stamp = start
+    for i in range(count):
+        stamp += datetime.timedelta(seconds=rand.randint(0, 3600))
+        shown = stamp if ordered else start + datetime.timedelta(seconds=rand.randint(0, 3600 * count))
+        lines.append('%s host%d service[%d]: message %d' % (shown.strftime(fmt), i % 3, i, i))
+        if rand.random() < 0.3:
+            lines.append('    continuation of message %d on host%d' % (i, i % 3))
+    return '\n'.join(lines)
+
+
+def _timestamps(seed=0):
+    rand = random.Random(seed)
+    stamps = [datetime.datetime(2017, 12, 19), datetime.datetime(2018, 1, 5, 12), datetime.datetime(2016, 1, 2)]
+    stamps.extend(datetime.datetime(2017, 12, 20) + datetime.timedelta(seconds=rand.randint(0, 3600 * 400))
+                  for _ in range(10))
+    return stamps
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+@pytest.mark.parametrize("cls, fmt", [
+    (YearLog, '%Y-%m-%d %H:%M:%S'),
+    (NoYearLog, '%b %d %H:%M:%S'),
+    (MixedLog, '%y%m%d %H:%M:%S'),
+])
+def test_get_after_equivalent(cls, fmt, ordered):
+    log = cls(context_wrap(_content(fmt, 500, ordered)))
+    for timestamp in _timestamps():
+        for s in (None, 'host1', ['host2', 'message']):
+            assert list(log.get_after(timestamp, s)) == list(_legacy_get_after(log, timestamp, s))
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_get_between(ordered):
+    log = YearLog(context_wrap(_content('%Y-%m-%d %H:%M:%S', 500, ordered)))
+    stamps = sorted(_timestamps())
+    for start, end in zip(stamps, stamps[1:]):
+        for s in (None, 'host1'):
+            assert list(log.get_between(start, end, s)) == list(_legacy_get_after(log, start, s, end))
+    assert list(log.get_between(stamps[-1], stamps[0])) == []
+
+
+def test_get_between_no_year():
+    log = NoYearLog(context_wrap(_content('%b %d %H:%M:%S', 500, start=datetime.datetime(2017, 12, 28))))
+    found = list(log.get_between(datetime.datetime(2017, 12, 31, 23), datetime.datetime(2018, 1, 1, 1)))
+    assert found
+    assert all(l['raw_message'].startswith(('Dec 31 23', 'Jan 01 00', '    ')) for l in found)
+
+
+@pytest.mark.parametrize("typecode", ['q', 'd'])
+def test_get_between_no_year_equivalent(monkeypatch, typecode):
+    # 'd' is the typecode of the keys on Python 2
+    monkeypatch.setattr(core, '_INT64', typecode)
+    content = '\n'.join(_content('%b %d %H:%M:%S', 300, ordered, seed, start)
+                        for seed, (ordered, start) in enumerate([
+                            (True, datetime.datetime(2017, 12, 20)),
+                            (False, datetime.datetime(2018, 2, 20)),
+                            (False, datetime.datetime(2017, 6, 1)),
+                        ]))
+    log = NoYearLog(context_wrap(content))
+    rand = random.Random(0)
+    stamps = [datetime.datetime(2017, 12, 31, 23), datetime.datetime(2016, 2, 28), datetime.datetime(2017, 2, 28, 12)]
+    stamps.extend(datetime.datetime(2016, 1, 1) + datetime.timedelta(seconds=rand.randint(0, 86400 * 1000))
+                  for _ in range(20))
+    for start in stamps:
+        for end in (None, start + datetime.timedelta(days=3), start + datetime.timedelta(days=300)):
+            for s in (None, 'host1'):
+                expected = list(_legacy_get_after(log, start, s, end))
+                assert list(log.get_between(start, end, s) if end else log.get_after(start, s)) == expected
+    assert log._timestamp_index[1].keys.typecode == typecode
+
+
+def test_timestamp_index_errors():
+    log = NoYearLog(context_wrap('Feb 28 10:00:00 one\nFeb 29 10:00:00 two'))
+    assert list(log.get_after(datetime.datetime(2016, 2, 27), 'one')) == [{'raw_message': 'Feb 28 10:00:00 one'}]
+    with pytest.raises(ValueError):
+        list(log.get_after(datetime.datetime(2016, 2, 27)))
+
+    log = YearLog(context_wrap('no time stamp here'))
+    assert list(log.get_after(datetime.datetime(2016, 2, 27))) == []
+    with pytest.raises(TypeError):
+        list(log.get_after(datetime.datetime(2016, 2, 27), set(['here'])))
+
+
+@pytest.mark.skipif(
+    not os.environ.get('TEST_TIMESTAMP_INDEX_BENCHMARK'),
+    reason="Benchmark of the timestamp index. Use TEST_TIMESTAMP_INDEX_BENCHMARK=True to enable it",
+)
+def test_get_after_benchmark():
+    log = YearLog(context_wrap(_content('%Y-%m-%d %H:%M:%S', 50000)))
+    stamps = _timestamps()
+
+    start = time.time()
+    for timestamp in stamps:
+        list(_legacy_get_after(log, timestamp))
+    legacy = time.time() - start
+
+    start = time.time()
+    for timestamp in stamps:
+        list(log.get_after(timestamp))
+    indexed = time.time() - start
+
+    print("%d get_after calls: indexed %.2fs, linear scan %.2fs" % (len(stamps), indexed, legacy))
+    assert indexed < legacy
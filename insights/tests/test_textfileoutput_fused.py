@@ -0,0 +1,150 @@
+import os
+import random
+import time
+
+import pytest
+
+from insights.core import LogFileOutput, TextFileOutput
+from insights.parsers.messages import Messages
+from insights.tests import context_wrap
+
+WORDS = ['kernel:', 'error', 'systemd', 'Started', 'session', 'oom-killer', 'eth0', 'link', 'down', 'up',
+         'segfault', 'at', 'ip', 'sp', 'audit', 'type=AVC', 'denied', 'foo', 'bar', 'x']
+
+SCANNERS = [
+    ('token_scan', 'has_oom', 'oom-killer'),
+    ('token_scan', 'has_nothing', 'no such token'),
+    ('token_scan', 'has_link_all', ['link', 'down']),
+    ('token_scan', 'has_link_any', ['link', 'nope'], any),
+    ('keep_scan', 'errors', 'error'),
+    ('keep_scan', 'first_3_errors', 'error', all, 3),
+    ('keep_scan', 'last_3_errors', 'error', all, 3, True),
+    ('keep_scan', 'all_errors_reversed', 'error', all, None, True),
+    ('keep_scan', 'none_errors', 'error', all, 0),
+    ('keep_scan', 'avc', ['type=AVC', 'denied']),
+    ('keep_scan', 'avc_any', ['type=AVC', 'segfault'], any, 5, True),
+    ('keep_scan', 'empty_token', '', all, 2),
+    ('keep_scan', 'not_any', ['kernel:', 'error'], lambda x: not any(x), 4),
+    ('keep_scan', 'bad_num', 'error', all, 2.5),
+    ('last_scan', 'last_link', 'link'),
+    ('last_scan', 'last_nothing', 'no such token'),
+    ('last_scan', 'last_session', ['Started', 'session']),
+]
+
+
+FILLER = ['systemd[1]:', 'Started', 'Session', 'of', 'user', 'root.', 'dhclient[830]:', 'DHCPREQUEST', 'on',
+          'eth1', 'to', '10.0.0.1', 'port', '67']
+
+
+def _corpus(size, seed=0, rare=None):
+    rand = random.Random(seed)
+    lines = []
+    for _ in range(size):
+        words = [rand.choice(FILLER if rare else WORDS) for _ in range(rand.randint(0, 8))]
+        if rare and rand.random() < rare:
+            words.insert(rand.randint(0, len(words)), rand.choice(WORDS))
+        lines.append(' '.join(words))
+    return lines
+
+
+def _register(cls, scanners):
+    for scanner in scanners:
+        getattr(cls, scanner[0])(*scanner[1:])
+    cls.scan('line_count', lambda self: len(self.lines))
+    return cls
+
+
+class Fused(TextFileOutput):
+    pass
+
+
+class Sequential(TextFileOutput):
+    fuse_scanners = False
+
+
+class FusedLog(LogFileOutput):
+    def _parse_line(self, line):
+        return {'raw_message': line, 'words': line.split()}
+
+
+class SequentialLog(FusedLog):
+    fuse_scanners = False
+
+
+_register(Fused, [s for s in SCANNERS if s[1] != 'bad_num'])
+_register(Sequential, [s for s in SCANNERS if s[1] != 'bad_num'])
+_register(FusedLog, SCANNERS[:8])
+_register(SequentialLog, SCANNERS[:8])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("fused, sequential", [(Fused, Sequential), (FusedLog, SequentialLog)])
+def test_fused_scanners(seed, fused, sequential):
+    content = '\n'.join(_corpus(2000, seed))
+    expected = sequential(context_wrap(content))
+    actual = fused(context_wrap(content))
+    assert fused._scan_plan[1].others
+    for key in fused.scanners:
+        assert getattr(actual, key) == getattr(expected, key), key
+
+
+def test_fused_scanners_invalid():
+    class BadNum(TextFileOutput):
+        pass
+
+    BadNum.token_scan('has_error', 'error')
+    BadNum.keep_scan('bad_num', 'error', num=2.5)
+    with pytest.raises(TypeError) as e:
+        BadNum(context_wrap('error'))
+    assert 'Required numbers must be given as a integer' in str(e)
+
+    class BadToken(TextFileOutput):
+        pass
+
+    BadToken.keep_scan('bad_token', 1)
+    with pytest.raises(TypeError) as e:
+        BadToken(context_wrap('error'))
+    assert 'Search items must be given as a string or a list of strings' in str(e)
+
+
+def test_fused_scanners_plan_refresh():
+    class Texter(TextFileOutput):
+        pass
+
+    Texter.token_scan('has_one', 'one')
+    assert Texter(context_wrap('one\ntwo')).has_one
+    Texter.last_scan('last_two', 'two')
+    texter = Texter(context_wrap('one\ntwo'))
+    assert texter.has_one
+    assert texter.last_two == {'raw_line': 'two', 'raw_message': 'two'}
+
+
+@pytest.mark.skipif(
+    not os.environ.get('TEST_SCANNER_BENCHMARK'),
+    reason="Benchmark of the fused scanners. Use TEST_SCANNER_BENCHMARK=True to enable it",
+)
+def test_fused_scanners_benchmark():
+    class FusedMessages(Messages):
+        pass
+
+    class SequentialMessages(Messages):
+        fuse_scanners = False
+
+    for cls in (FusedMessages, SequentialMessages):
+        _register(cls, [s for s in SCANNERS if s[1] not in ('bad_num', 'not_any', 'empty_token')])
+    lines = ['Mar 27 03:18:15 system ' + line for line in _corpus(1000000, seed=3, rare=0.01)]
+    context = context_wrap('\n'.join(lines))
+
+    start = time.time()
+    expected = SequentialMessages(context)
+    sequential = time.time() - start
+
+    start = time.time()
+    actual = FusedMessages(context)
+    fused = time.time() - start
+
+    print("%d scanners over %d lines: fused %.2fs, one pass per scanner %.2fs" % (
+        len(FusedMessages.scanners), len(lines), fused, sequential))
+    for key in FusedMessages.scanners:
+        assert getattr(actual, key) == getattr(expected, key)
+    assert fused < sequential
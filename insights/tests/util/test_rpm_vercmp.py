@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 import pytest
-from insights.util.rpm_vercmp import _rpm_vercmp, version_compare
+from insights.util.rpm_vercmp import _rpm_vercmp, version_compare, version_key
 
 
 # data copied from
@@ -178,6 +178,19 @@ def test_rpm_vercmp(rpm_data):
         assert actual == expected, (l, r, actual, expected)
 
 
+def test_version_key(rpm_data):
+    for l, r, expected in rpm_data:
+        lk, rk = version_key(l), version_key(r)
+        actual = (lk > rk) - (lk < rk)
+        assert actual == expected, (l, r, actual, expected)
+
+    versions = [v for l, r, _ in rpm_data for v in (l, r)] + [u"1.1.\u03b1", u"1.1.\u03b2\u03b2", "", "0"]
+    for l in versions:
+        for r in versions:
+            lk, rk = version_key(l), version_key(r)
+            assert (lk > rk) - (lk < rk) == _rpm_vercmp(l, r), (l, r)
+
+
 def test_version_compare():
     rpm1 = 'kernel-rt-debug-3.10.0-327.rt56.204.el7_2.1'
     rpm2 = 'kernel-rt-debug-3.10.0-327.rt56.204.el7_2.2'
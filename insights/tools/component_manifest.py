@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+"""
+Builds the component manifest that ``insights.core.dr.load_components`` and
+``insights-run --component-manifest`` use to import only the modules the
+components of a run need.
+
+    python -m insights.tools.component_manifest -o manifest.json -p my.rules
+"""
+import argparse
+import json
+import sys
+
+from insights import DEFAULT_PLUGINS, parse_plugins
+from insights.core import dr
+
+DEFAULT_PACKAGES = DEFAULT_PLUGINS + ("insights.parsers", "insights.combiners")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-o", "--output", help="Output file. Defaults to stdout.", default="")
+    parser.add_argument(
+        "-p", "--plugins", help="Comma-separated list without spaces of plugins.", default=""
+    )
+    args = parser.parse_args()
+
+    manifest = dr.build_manifest(*(DEFAULT_PACKAGES + tuple(parse_plugins(args.plugins))))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(manifest, f, sort_keys=True)
+    else:
+        json.dump(manifest, sys.stdout, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Per thread deadlines for the subprocesses started while evaluating a
+component.
+
+A :class:`Deadline` is entered in the thread that runs the component. Every
+subprocess started through :func:`popen` in that thread while the deadline is
+active is tracked, and a single watchdog thread per process terminates them
+when the deadline expires. Unlike ``signal.alarm``, any number of deadlines
+can be active at once, and they work in worker threads and in forked worker
+processes.
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+from subprocess import Popen
+
+from insights.core.exceptions import TimeoutException
+
+log = logging.getLogger(__name__)
+
+KILL_GRACE = 1
+"""
+Seconds between terminating the subprocesses of an expired deadline and
+killing the ones that are still running.
+"""
+
+_local = threading.local()
+
+
+class _Watchdog(object):
+    """
+    Runs scheduled actions from a daemon thread that's started the first time
+    something is scheduled in a process.
+    """
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._thread = None
+
+    def schedule(self, when, action):
+        entry = [when, next(self._seq), action]
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="insights-deadline-watchdog")
+                self._thread.daemon = True
+                self._thread.start()
+            heapq.heappush(self._heap, entry)
+            self._cond.notify()
+        return entry
+
+    def cancel(self, entry):
+        entry[2] = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.time():
+                    self._cond.wait(self._heap[0][0] - time.time() if self._heap else None)
+                action = heapq.heappop(self._heap)[2]
+            if action is not None:
+                try:
+                    action()
+                except Exception as ex:
+                    log.exception(ex)
+
+
+_WATCHDOG = _Watchdog()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_WATCHDOG._reset)
+
+
+def _signal(procs, method):
+    for proc in procs:
+        try:
+            getattr(proc, method)()
+        except OSError:
+            pass
+
+
+class Deadline(object):
+    """
+    Context manager that makes ``seconds`` the time limit of the subprocesses
+    started through :func:`popen` by the current thread. A falsy ``seconds``
+    means no limit.
+
+    When the deadline expires, those subprocesses are terminated, killed
+    :data:`KILL_GRACE` seconds later if they're still running, and starting
+    new ones raises :class:`insights.core.exceptions.TimeoutException`. Code
+    that doesn't start subprocesses isn't interrupted, so callers check
+    :attr:`expired` once the protected code returns.
+
+    Attributes:
+        seconds (int): the time limit.
+        expired (bool): whether the deadline has expired.
+    """
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expired = False
+        self._procs = []
+        self._lock = threading.Lock()
+        self._entry = None
+        self._previous = None
+
+    def __enter__(self):
+        if self.seconds:
+            self._previous = current()
+            _local.deadline = self
+            self._entry = _WATCHDOG.schedule(time.time() + self.seconds, self.expire)
+        return self
+
+    def __exit__(self, *exc):
+        if self._entry is not None:
+            _WATCHDOG.cancel(self._entry)
+            _local.deadline = self._previous
+            self._procs = []
+        return False
+
+    def track(self, proc):
+        """
+        Adds a subprocess to the ones terminated when the deadline expires.
+        """
+        with self._lock:
+            if not self.expired:
+                self._procs.append(proc)
+                return
+        _signal([proc], "kill")
+
+    def expire(self):
+        """
+        Expires the deadline now.
+        """
+        with self._lock:
+            self.expired = True
+            procs, self._procs = self._procs, []
+        if procs:
+            _signal(procs, "terminate")
+            _WATCHDOG.schedule(time.time() + KILL_GRACE, lambda: _signal(procs, "kill"))
+
+
+def current():
+    """
+    Returns the active :class:`Deadline` of the current thread or ``None``.
+    """
+    return getattr(_local, "deadline", None)
+
+
+def popen(*args, **kwargs):
+    """
+    Starts a :class:`subprocess.Popen` that's tracked by the active deadline
+    of the current thread.
+    """
+    deadline = current()
+    if deadline is not None and deadline.expired:
+        raise TimeoutException("Deadline of %s seconds expired" % deadline.seconds)
+    proc = Popen(*args, **kwargs)
+    if deadline is not None:
+        deadline.track(proc)
+    return proc
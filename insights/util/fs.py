@@ -13,6 +13,34 @@ def read_in_chunks(file_object, chunk_size=1024):
         yield data
 
 
+def read_lines_reversed(file_object, start=0, chunk_size=65536):
+    """
+    Yields the lines of a binary file object from the last one to the first
+    one, reading `chunk_size` bytes at a time from the end of the file.  The
+    lines are split on ``b"\\n"`` which is not included.  Only the bytes
+    after the offset `start` are read.
+    """
+    file_object.seek(0, os.SEEK_END)
+    pos = file_object.tell()
+    tail = b''
+    first = True
+    while pos > start:
+        size = min(chunk_size, pos - start)
+        pos -= size
+        file_object.seek(pos)
+        lines = (file_object.read(size) + tail).split(b'\n')
+        if first:
+            first = False
+            if lines[-1] == b'':
+                # the file ends with a new line
+                lines.pop()
+        tail = lines[0]
+        for line in reversed(lines[1:]):
+            yield line
+    if not first:
+        yield tail
+
+
 def touch(fname, times=None):
     with open(fname, 'a'):
         os.utime(fname, times)
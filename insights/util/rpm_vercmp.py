@@ -12,11 +12,23 @@ Handles all of the cases in the rpm test file, including the "buggy" tests
 and non-ascii characters.
 
 https://raw.githubusercontent.com/rpm-software-management/rpm/master/tests/rpmvercmp.at
+
+The `version_key` turns a version string into a tuple that sorts the same as
+`_rpm_vercmp`, so it can be computed once and compared many times.
 """
 
+import re
+
 from collections import deque
 from itertools import takewhile
 
+# Ranks of the tokens of a version key. At the same position, a tilde sorts
+# before the end of the version, which sorts before a caret, which sorts
+# before an alpha segment, which sorts before a numeric segment.
+_TILDE, _END, _CARET, _ALPHA, _NUM = range(5)
+_SEGMENTS = re.compile(r"[0-9]+|[a-zA-Z]+|[~^]")
+_KEY_END = ((_END, ""),)
+
 
 def _rpm_vercmp(a, b):
     if a == b:
@@ -128,6 +140,27 @@ def _rpm_vercmp(a, b):
     return 1
 
 
+def version_key(version):
+    """
+    Returns a tuple for the version string `version` such that comparing the
+    tuples of two versions gives the same result as `_rpm_vercmp`.
+
+    Non-ascii characters are separators like in `_rpm_vercmp`, numeric
+    segments compare as integers and alpha segments as strings.
+    """
+    key = []
+    for seg in _SEGMENTS.findall(version or ""):
+        if seg == "~":
+            key.append((_TILDE, ""))
+        elif seg == "^":
+            key.append((_CARET, ""))
+        elif seg[0].isdigit():
+            key.append((_NUM, int(seg)))
+        else:
+            key.append((_ALPHA, seg))
+    return tuple(key) + _KEY_END
+
+
 try:
     import rpm
     import six
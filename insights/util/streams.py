@@ -6,9 +6,10 @@ import os
 import shlex
 import signal
 from contextlib import contextmanager
-from subprocess import Popen, PIPE, STDOUT
+from subprocess import PIPE, STDOUT
 
 from insights.util import which
+from insights.util.deadline import popen
 
 stream_options = {
     "bufsize": -1,  # use OS defaults. Non buffered if not set.
@@ -61,7 +62,7 @@ def stream(command, stdin=None, env=os.environ, timeout=None):
 
     output = None
     try:
-        output = Popen(command, env=env, stdin=stdin, **stream_options)
+        output = popen(command, env=env, stdin=stdin, **stream_options)
         yield output.stdout
     finally:
         if output:
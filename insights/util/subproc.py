@@ -5,10 +5,11 @@ import signal
 import six
 import sys
 
-from subprocess import Popen, PIPE, STDOUT
+from subprocess import PIPE, STDOUT
 
 from insights.core.exceptions import CalledProcessError
 from insights.util import which
+from insights.util.deadline import popen
 
 try:
     from subprocess import DEVNULL
@@ -71,7 +72,7 @@ class Pipeline(object):
     def _build_pipes(self, out_stream=PIPE):
         log.debug("Executing: %s" % str(self.cmds))
         if len(self.cmds) == 1:
-            return Popen(
+            return popen(
                 self.cmds[0],
                 bufsize=self.bufsize,
                 stdin=DEVNULL,
@@ -80,7 +81,7 @@ class Pipeline(object):
                 env=self.env,
             )
 
-        stdout = Popen(
+        stdout = popen(
             self.cmds[0],
             bufsize=self.bufsize,
             stdin=DEVNULL,
@@ -91,7 +92,7 @@ class Pipeline(object):
         last = len(self.cmds) - 2
         for i, arg in enumerate(self.cmds[1:]):
             if i < last:
-                stdout = Popen(
+                stdout = popen(
                     arg,
                     bufsize=self.bufsize,
                     stdin=stdout,
@@ -100,7 +101,7 @@ class Pipeline(object):
                     env=self.env,
                 ).stdout
             else:
-                return Popen(
+                return popen(
                     arg,
                     bufsize=self.bufsize,
                     stdin=stdout,